@@ -0,0 +1,203 @@
+"""
+Benchmark de l'extraction PDF (extract_pdf_structure_keep_tables).
+
+Mesure, pour des notices synthétiques (src/devtools/synthetic_manuals.py) et
+pour les vraies notices déposées dans benchmarks/samples/ :
+- le débit en pages par seconde (meilleur de plusieurs passes)
+- le pic de mémoire résidente (RSS) du processus
+- la taille des sections extraites et leur empreinte SHA-256
+
+puis compare au fichier de référence benchmarks/baseline.json. Le code de
+sortie est 1 en cas de régression significative (débit, mémoire) ou si les
+sections extraites ont changé.
+
+    python -m benchmarks.bench_pdf_extraction                    # comparer à la référence
+    python -m benchmarks.bench_pdf_extraction --update-baseline  # enregistrer la référence
+    python -m benchmarks.bench_pdf_extraction --case spec_tables --ignore-timings
+
+Chaque notice est traitée dans un processus neuf (pic RSS propre à la notice),
+depuis son contenu en mémoire comme avec PDF_DOWNLOAD_IN_MEMORY (aucune image
+écrite sur disque). Les débits ne se comparent que sur la même machine :
+--ignore-timings ne vérifie que les sections et la mémoire.
+"""
+
+import argparse
+import hashlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Dict, List
+
+BENCHMARKS_FOLDER = Path(__file__).resolve().parent
+SAMPLES_FOLDER = BENCHMARKS_FOLDER / "samples"
+BASELINE_FILE = BENCHMARKS_FOLDER / "baseline.json"
+
+# Notices synthétiques : paramètres de src.devtools.synthetic_manuals.default_spec
+SYNTHETIC_CASES = {
+    "text_only": {"pages": 8, "tables": 0, "logo": False},
+    "spec_tables": {"pages": 30, "tables": 2, "table_columns": 6, "table_rows": 12, "seed": 1},
+    "large_images": {"pages": 8, "images": 2, "image_size": 1000, "seed": 2},
+    "long_manual": {"pages": 120, "toc_pages": 3, "sections_per_page": 3, "seed": 3},
+}
+
+MIN_MEASURE_SECONDS = 1.0  # Les petites notices sont extraites en boucle au moins ce temps (mesure stable)
+MAX_SLOWDOWN = 0.25  # Baisse de débit tolérée (fraction)
+MAX_RSS_GROWTH = 0.25  # Hausse du pic RSS tolérée (fraction)
+
+
+def _peak_rss_mb() -> float:
+    """Pic RSS du processus courant en Mio (None si la plateforme ne le fournit pas)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en Kio sous Linux, en octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(pdf_path: str, repeat: int) -> Dict:
+    """Exécuté dans un processus dédié : extrait la notice au moins `repeat` fois."""
+    import fitz
+
+    from src.pdf.pdf_parser import extract_pdf_structure_keep_tables
+
+    pdf_bytes = Path(pdf_path).read_bytes()
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = doc.page_count
+    timings = []
+    sections = []
+    while len(timings) < repeat or sum(timings) < MIN_MEASURE_SECONDS:
+        start = time.perf_counter()
+        sections = extract_pdf_structure_keep_tables(pdf_bytes)
+        timings.append(time.perf_counter() - start)
+    output = json.dumps(sections, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    best = min(timings)
+    return {
+        "pages": pages,
+        "input_bytes": len(pdf_bytes),
+        "best_seconds": round(best, 4),
+        "pages_per_second": round(pages / best, 1) if best else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "sections": len(sections),
+        "output_bytes": len(output),
+        "output_sha256": hashlib.sha256(output).hexdigest(),
+    }
+
+
+def _collect_cases(workdir: Path, selected: List[str]) -> Dict[str, Path]:
+    """Génère les notices synthétiques et liste les notices réelles."""
+    from src.devtools.synthetic_manuals import default_spec, generate_manual
+
+    cases = {}
+    for name, overrides in SYNTHETIC_CASES.items():
+        if not selected or name in selected:
+            cases[name] = Path(generate_manual(workdir / f"{name}.pdf", default_spec(**overrides))["path"])
+    for pdf_path in sorted(SAMPLES_FOLDER.glob("*.pdf")):
+        name = f"sample:{pdf_path.name}"
+        if not selected or name in selected or pdf_path.name in selected:
+            cases[name] = pdf_path
+    return cases
+
+
+def _environment() -> Dict:
+    import fitz
+
+    return {"machine": platform.machine(), "processor": platform.processor() or platform.machine(),
+            "system": platform.system(), "python": platform.python_version(), "pymupdf": fitz.VersionBind}
+
+
+def _compare(name: str, result: Dict, reference: Dict, args) -> List[str]:
+    """Liste les régressions d'une notice par rapport à sa référence."""
+    problems = []
+    if result["output_sha256"] != reference.get("output_sha256"):
+        problems.append(f"sections modifiées ({reference.get('sections')} -> {result['sections']} section(s), "
+                        f"{reference.get('output_bytes')} -> {result['output_bytes']} octets)")
+    if not args.ignore_timings and reference.get("pages_per_second") and result["pages_per_second"]:
+        ratio = result["pages_per_second"] / reference["pages_per_second"]
+        if ratio < 1 - args.max_slowdown:
+            problems.append(f"débit {reference['pages_per_second']} -> {result['pages_per_second']} pages/s "
+                            f"({(ratio - 1) * 100:+.0f} %)")
+    if reference.get("peak_rss_mb") and result["peak_rss_mb"]:
+        growth = result["peak_rss_mb"] / reference["peak_rss_mb"] - 1
+        if growth > args.max_rss_growth:
+            problems.append(f"pic RSS {reference['peak_rss_mb']} -> {result['peak_rss_mb']} Mio ({growth * 100:+.0f} %)")
+    return [f"{name} : {problem}" for problem in problems]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de l'extraction PDF")
+    parser.add_argument("--case", action="append", default=[],
+                        help="Ne lancer que ce cas (nom synthétique ou fichier de samples/, option répétable)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes minimales par notice, la meilleure est retenue (défaut : 3)")
+    parser.add_argument("--baseline", default=str(BASELINE_FILE), help=f"Référence (défaut : {BASELINE_FILE})")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistrer les résultats comme référence")
+    parser.add_argument("--ignore-timings", action="store_true",
+                        help="Ne pas comparer les débits (référence mesurée sur une autre machine)")
+    parser.add_argument("--max-slowdown", type=float, default=MAX_SLOWDOWN,
+                        help=f"Baisse de débit tolérée (défaut : {MAX_SLOWDOWN})")
+    parser.add_argument("--max-rss-growth", type=float, default=MAX_RSS_GROWTH,
+                        help=f"Hausse du pic RSS tolérée (défaut : {MAX_RSS_GROWTH})")
+    parser.add_argument("--json", help="Écrire aussi les résultats dans ce fichier")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_pdf_") as workdir:
+        cases = _collect_cases(Path(workdir), args.case)
+        if not cases:
+            print("[ERROR] Aucun cas de benchmark sélectionné")
+            return 1
+        print(f"{'cas':<32} {'pages':>6} {'pages/s':>9} {'RSS Mio':>8} {'sections':>9} {'sortie':>10}")
+        for name, pdf_path in cases.items():
+            # Un processus neuf par notice : le pic RSS mesuré est celui de cette notice
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                result = executor.submit(_measure, str(pdf_path), args.repeat).result()
+            results[name] = result
+            print(f"{name:<32} {result['pages']:>6} {result['pages_per_second']:>9} {result['peak_rss_mb']!s:>8} "
+                  f"{result['sections']:>9} {result['output_bytes']:>10}")
+
+    report = {"environment": _environment(), "repeat": args.repeat, "cases": results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        # Les cas non relancés (--case) gardent leur référence
+        report["cases"] = {**baseline.get("cases", {}), **results}
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"\n[OK] Référence enregistrée dans {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"\n[WARNING] Pas de référence ({baseline_path}) : lancer avec --update-baseline")
+        return 0
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if not args.ignore_timings and baseline.get("environment") != report["environment"]:
+        print("\n[WARNING] Référence mesurée dans un autre environnement "
+              f"({baseline.get('environment')}) : débits peu comparables, voir --ignore-timings")
+
+    problems = []
+    for name, result in results.items():
+        reference = baseline.get("cases", {}).get(name)
+        if reference is None:
+            print(f"[INFO] {name} : pas de référence, ajouté avec --update-baseline")
+            continue
+        problems.extend(_compare(name, result, reference, args))
+
+    if problems:
+        print("\n[ERROR] Régressions :")
+        for problem in problems:
+            print(f"  - {problem}")
+        return 1
+    print("\n[OK] Aucune régression par rapport à la référence")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,68 @@ Point d'entrée principal de l'application Avidsen.
 Lance le scraping des produits et la création d'articles Zoho.
 """
 
+import argparse
+
+from src.config.settings import (
+    HTTP_REPLAY_BANDWIDTH,
+    HTTP_REPLAY_LATENCY,
+    PROFILE_FOLDER,
+    PROFILE_TOP_N,
+    STAGING_BUNDLE_FILE,
+    TUTORIAL_STORE_FILE,
+)
 from src.scraper.web_scraper import scrape_all_pages
+from src.utils.profiling import enable_profiling
+from src.zoho.bundle import enable_staging, close_staging
 
 
 def main():
     """
     Fonction principale qui lance le processus de scraping.
     """
+    parser = argparse.ArgumentParser(description="Scraping des notices Avidsen et publication sur Zoho Desk")
+    parser.add_argument("--stage-only", action="store_true",
+                        help="Écrire les articles rendus dans un bundle au lieu de les publier "
+                             "(à publier ensuite avec publish_bundle.py)")
+    parser.add_argument("--bundle", default=str(STAGING_BUNDLE_FILE),
+                        help=f"Bundle utilisé par --stage-only (défaut : {STAGING_BUNDLE_FILE})")
+    parser.add_argument("--tutorial-store", default=str(TUTORIAL_STORE_FILE),
+                        help="Tutoriels extraits ajoutés aux articles produits (store de scrape_tutorials.py, "
+                             f"défaut : {TUTORIAL_STORE_FILE})")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profiler chaque produit et chaque extraction PDF (cProfile + tracemalloc)")
+    parser.add_argument("--profile-dir", default=str(PROFILE_FOLDER),
+                        help=f"Dossier des profils (défaut : {PROFILE_FOLDER})")
+    parser.add_argument("--profile-top", type=int, default=PROFILE_TOP_N,
+                        help=f"Nombre de produits les plus lents / gourmands conservés (défaut : {PROFILE_TOP_N})")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="DOSSIER",
+                          help="Enregistrer les réponses HTTP du crawl dans cette cassette")
+    cassette.add_argument("--replay", metavar="DOSSIER",
+                          help="Rejouer le crawl depuis cette cassette, sans réseau")
+    parser.add_argument("--latency", type=float, default=HTTP_REPLAY_LATENCY,
+                        help=f"Latence simulée par requête rejouée, en secondes (défaut : {HTTP_REPLAY_LATENCY:g})")
+    parser.add_argument("--bandwidth", type=float, default=HTTP_REPLAY_BANDWIDTH,
+                        help="Débit simulé en rejeu, en octets par seconde (défaut : illimité)")
+    args = parser.parse_args()
+
+    if args.profile:
+        enable_profiling(args.profile_dir, args.profile_top)
+    if args.record or args.replay:
+        from src.utils.cassette import configure_cassette
+        configure_cassette("record" if args.record else "replay", args.record or args.replay,
+                           args.latency, args.bandwidth)
+
     print("=" * 60)
     print("Démarrage du scraping Avidsen")
     print("=" * 60)
     
-    scrape_all_pages()
+    if args.stage_only:
+        enable_staging(args.bundle)
+    try:
+        scrape_all_pages(args.tutorial_store)
+    finally:
+        close_staging()
     
     print("\n" + "=" * 60)
     print("Scraping terminé")
@@ -0,0 +1,36 @@
+"""
+Script de publication d'un bundle d'articles préparé avec --stage-only.
+Rejoue les articles vers Zoho Desk via l'outbox (concurrence, débit et reprises).
+"""
+
+import argparse
+
+from src.config.settings import STAGING_BUNDLE_FILE
+from src.utils.run_report import save_run_report
+from src.zoho.bundle import replay_bundle
+
+
+def main():
+    """
+    Publie sur Zoho Desk les articles d'un bundle.
+    """
+    parser = argparse.ArgumentParser(description="Publication d'un bundle d'articles sur Zoho Desk")
+    parser.add_argument("bundle", nargs="?", default=str(STAGING_BUNDLE_FILE),
+                        help=f"Bundle à publier (défaut : {STAGING_BUNDLE_FILE})")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"Publication du bundle {args.bundle}")
+    print("=" * 60)
+
+    counts = replay_bundle(args.bundle)
+    print(f"\n📬 État de l'outbox : {counts}")
+    save_run_report()
+
+    print("\n" + "=" * 60)
+    print("Publication terminée")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
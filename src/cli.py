@@ -0,0 +1,202 @@
+"""
+Interface en ligne de commande, sans question interactive (cron, CI).
+
+    python -m src.cli discover [--max-pages N] [--limit N]
+    python -m src.cli fetch [--workers N] [--ref REF ...] [--match TEXTE] [--limit N] [--force]
+    python -m src.cli extract [--ref REF ...] [--match TEXTE] [--limit N] [--force]
+    python -m src.cli render [--bundle FICHIER] [--append] [--tutorial-store FICHIER] [--ref REF ...] [--match TEXTE]
+                             [--limit N]
+    python -m src.cli publish [--bundle FICHIER]
+    python -m src.cli tutorials [--fetch-workers N] [--parse-workers N] [--publish | --stage-only]
+    python -m src.cli refresh-token
+
+Options globales (avant la sous-commande) : --profile [--profile-dir DOSSIER] [--profile-top N]
+profilent chaque produit et chaque extraction PDF (cProfile + tracemalloc) ;
+--record DOSSIER / --replay DOSSIER [--latency S] [--bandwidth OCTETS/S] enregistrent
+ou rejouent les réponses HTTP du crawl (src/utils/cassette.py).
+
+Chaque étape lit et écrit ses artefacts dans PIPELINE_FOLDER (voir src/pipeline/stages.py) :
+seule l'étape modifiée et les suivantes sont à relancer.
+
+Le code de sortie est non nul si un produit a échoué, ou si l'étape n'a rien produit
+alors que des produits étaient sélectionnés (aucun produit découvert, extrait ou rendu).
+"""
+
+import argparse
+import sys
+
+from src.config.settings import (
+    HTTP_REPLAY_BANDWIDTH,
+    HTTP_REPLAY_LATENCY,
+    PIPELINE_FETCH_WORKERS,
+    PROFILE_FOLDER,
+    PROFILE_TOP_N,
+    STAGING_BUNDLE_FILE,
+    TUTORIAL_FETCH_WORKERS,
+    TUTORIAL_PARSE_WORKERS,
+    TUTORIAL_STORE_FILE,
+)
+from src.utils.profiling import enable_profiling
+from src.utils.run_report import save_run_report
+
+
+def _add_filters(parser: argparse.ArgumentParser):
+    parser.add_argument("--ref", action="append", default=[],
+                        help="Ne traiter que cette référence produit (option répétable)")
+    parser.add_argument("--match", help="Ne traiter que les produits dont le titre contient ce texte")
+    parser.add_argument("--limit", type=int, help="Nombre maximal de produits traités")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Construit l'analyseur des sous-commandes."""
+    parser = argparse.ArgumentParser(prog="python -m src.cli",
+                                     description="Notices Avidsen vers Zoho Desk, étape par étape")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profiler chaque produit et chaque extraction PDF (cProfile + tracemalloc)")
+    parser.add_argument("--profile-dir", default=str(PROFILE_FOLDER),
+                        help=f"Dossier des profils (défaut : {PROFILE_FOLDER})")
+    parser.add_argument("--profile-top", type=int, default=PROFILE_TOP_N,
+                        help=f"Nombre d'appels les plus lents / gourmands conservés (défaut : {PROFILE_TOP_N})")
+    cassette = parser.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="DOSSIER",
+                          help="Enregistrer les réponses HTTP du crawl dans cette cassette")
+    cassette.add_argument("--replay", metavar="DOSSIER",
+                          help="Rejouer le crawl depuis cette cassette, sans réseau")
+    parser.add_argument("--latency", type=float, default=HTTP_REPLAY_LATENCY,
+                        help=f"Latence simulée par requête rejouée, en secondes (défaut : {HTTP_REPLAY_LATENCY:g})")
+    parser.add_argument("--bandwidth", type=float, default=HTTP_REPLAY_BANDWIDTH,
+                        help="Débit simulé en rejeu, en octets par seconde (défaut : illimité)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    discover = commands.add_parser("discover", help="Lister les produits du site (products.jsonl)")
+    discover.add_argument("--max-pages", type=int, help="Nombre maximal de pages de la liste")
+    discover.add_argument("--limit", type=int, help="Nombre maximal de produits")
+
+    fetch = commands.add_parser("fetch", help="Télécharger PDF et images (fetched.jsonl)")
+    fetch.add_argument("--workers", type=int, default=PIPELINE_FETCH_WORKERS,
+                       help=f"Téléchargements simultanés (défaut : {PIPELINE_FETCH_WORKERS})")
+    fetch.add_argument("--force", action="store_true", help="Télécharger à nouveau les produits déjà traités")
+    _add_filters(fetch)
+
+    extract = commands.add_parser("extract", help="Extraire les sections des PDF (extracted.jsonl)")
+    extract.add_argument("--force", action="store_true", help="Extraire à nouveau les PDF inchangés")
+    _add_filters(extract)
+
+    render = commands.add_parser("render", help="Construire les articles dans un bundle")
+    render.add_argument("--bundle", default=str(STAGING_BUNDLE_FILE),
+                        help=f"Bundle de sortie (défaut : {STAGING_BUNDLE_FILE})")
+    render.add_argument("--append", action="store_true", help="Ajouter au bundle au lieu de le remplacer")
+    render.add_argument("--tutorial-store", default=str(TUTORIAL_STORE_FILE),
+                        help=f"Tutoriels extraits ajoutés aux articles (store de 'tutorials', défaut : {TUTORIAL_STORE_FILE})")
+    _add_filters(render)
+
+    publish = commands.add_parser("publish", help="Publier un bundle sur Zoho Desk")
+    publish.add_argument("--bundle", default=str(STAGING_BUNDLE_FILE),
+                         help=f"Bundle à publier (défaut : {STAGING_BUNDLE_FILE})")
+
+    tutorials = commands.add_parser("tutorials", help="Découvrir et extraire les tutoriels (store JSONL)")
+    tutorials.add_argument("--store", default=str(TUTORIAL_STORE_FILE),
+                           help=f"Fichier des tutoriels extraits (défaut : {TUTORIAL_STORE_FILE})")
+    tutorials.add_argument("--no-resume", action="store_true",
+                           help="Extraire à nouveau les tutoriels déjà stockés")
+    tutorials.add_argument("--fetch-workers", type=int, default=TUTORIAL_FETCH_WORKERS,
+                           help=f"Téléchargements simultanés (défaut : {TUTORIAL_FETCH_WORKERS})")
+    tutorials.add_argument("--parse-workers", type=int, default=TUTORIAL_PARSE_WORKERS,
+                           help=f"Processus de nettoyage HTML (défaut : {TUTORIAL_PARSE_WORKERS})")
+    output = tutorials.add_mutually_exclusive_group()
+    output.add_argument("--publish", action="store_true", help="Publier les tutoriels sur Zoho Desk")
+    output.add_argument("--stage-only", action="store_true",
+                        help="Ajouter les articles des tutoriels au bundle (publiés par 'publish')")
+    tutorials.add_argument("--bundle", default=str(STAGING_BUNDLE_FILE),
+                           help=f"Bundle utilisé par --stage-only (défaut : {STAGING_BUNDLE_FILE})")
+    tutorials.add_argument("--limit", type=int, help="Nombre maximal de tutoriels extraits")
+
+    commands.add_parser("refresh-token", help="Rafraîchir le token Zoho (config.txt)")
+    return parser
+
+
+def _run_tutorials(args) -> int:
+    from src.pipeline.tutorials import (
+        create_zoho_tutorial_articles,
+        discover_all_tutorials,
+        scrape_all_tutorials_content,
+    )
+    from src.scraper.tutorial_store import TutorialStore
+    from src.zoho.bundle import close_staging, enable_staging
+
+    tutorial_list = discover_all_tutorials()[:args.limit or None]
+    if not tutorial_list:
+        print("\n[ERROR] Aucun tutoriel trouvé")
+        return 1
+    full_tutorials = scrape_all_tutorials_content(tutorial_list, TutorialStore(args.store),
+                                                  resume=not args.no_resume,
+                                                  fetch_workers=args.fetch_workers,
+                                                  parse_workers=args.parse_workers)
+    if args.stage_only:
+        enable_staging(args.bundle)
+        try:
+            create_zoho_tutorial_articles(full_tutorials)
+        finally:
+            close_staging()
+    elif args.publish:
+        create_zoho_tutorial_articles(full_tutorials)
+    return 0 if full_tutorials else 1
+
+
+def main(argv=None) -> int:
+    """
+    Lance une étape du traitement.
+
+    Returns:
+        Code de sortie (0 si l'étape a réussi)
+    """
+    args = build_parser().parse_args(argv)
+    if args.profile:
+        enable_profiling(args.profile_dir, args.profile_top)
+    if args.record or args.replay:
+        from src.utils.cassette import configure_cassette
+        configure_cassette("record" if args.record else "replay", args.record or args.replay,
+                           args.latency, args.bandwidth)
+
+    if args.command == "refresh-token":
+        from src.zoho.auth import refresh_zoho_token
+        return 0 if refresh_zoho_token() else 1
+
+    if args.command == "tutorials":
+        code = _run_tutorials(args)
+        save_run_report()
+        return code
+
+    from src.pipeline import stages
+
+    if args.command == "discover":
+        summary = stages.discover(max_pages=args.max_pages, limit=args.limit)
+        return 0 if summary["products"] else 1
+    if args.command == "fetch":
+        summary = stages.fetch(workers=args.workers, refs=args.ref, match=args.match, limit=args.limit,
+                               force=args.force)
+    elif args.command == "extract":
+        summary = stages.extract(refs=args.ref, match=args.match, limit=args.limit, force=args.force)
+    elif args.command == "render":
+        summary = stages.render(args.bundle, refs=args.ref, match=args.match, limit=args.limit,
+                                append=args.append, tutorial_store=args.tutorial_store)
+    else:
+        summary = stages.publish(args.bundle)
+        save_run_report()
+        # Échec si un article de cette exécution a échoué ou reste en attente dans l'outbox
+        return 0 if summary and not summary.get("failed") and not summary.get("pending") else 1
+
+    save_run_report()
+    if summary.get("failed"):
+        return 1
+    # Comme discover, une étape qui ne produit rien pour les produits sélectionnés échoue
+    if args.command == "extract":
+        produced = summary["extracted"] + summary["duplicates"] + summary["skipped"]
+        return 1 if summary["selected"] and not produced else 0
+    if args.command == "render":
+        return 1 if summary["skipped"] and not summary["rendered"] else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
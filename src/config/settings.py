@@ -3,16 +3,36 @@ Module de gestion de la configuration.
 Charge et sauvegarde les paramètres depuis/vers config.txt.
 """
 
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
-# Fichier de configuration
-CONFIG_FILE = "config.txt"
+# Fichier de configuration (surchargeable pour faire tourner plusieurs configurations)
+CONFIG_FILE = os.environ.get("AVIDSEN_CONFIG_FILE", "config.txt")
+# Clés de config.txt pouvant être surchargées par une variable d'environnement du même nom
+CONFIG_ENV_OVERRIDES = (
+    "ZOHO_CLIENT_ID",
+    "ZOHO_CLIENT_SECRET",
+    "GRANTED_CODE",
+    "ZOHO_REFRESH_TOKEN",
+    "ZOHO_ORG_ID",
+    "ZOHO_PRODUCT_CATEGORY_ID",
+    "ZOHO_TUTORIAL_CATEGORY_ID",
+)
 
-# Configuration du scraping
-BASE_URL_TEMPLATE = "https://www.avidsen.com/fr/produit/page/{page}"
+# Configuration du scraping (site surchargeable pour viser src/devtools/synthetic_site.py)
+SITE_BASE_URL = os.environ.get("AVIDSEN_SITE_BASE_URL", "https://www.avidsen.com").rstrip("/")
+BASE_URL_TEMPLATE = os.environ.get("AVIDSEN_BASE_URL_TEMPLATE", f"{SITE_BASE_URL}/fr/produit/page/{{page}}")
+TUTORIAL_BASE_URL = os.environ.get("AVIDSEN_TUTORIAL_BASE_URL",
+                                   f"{SITE_BASE_URL}/fr/assistance/tutoriel-sav").rstrip("/")
 HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
-OUTPUT_FOLDER = Path("notices")
-OUTPUT_FOLDER.mkdir(exist_ok=True)
+OUTPUT_FOLDER = Path("notices")  # Créé à la première écriture (l'import des réglages n'écrit rien)
+
+# Configuration du téléchargement des PDF
+PDF_DOWNLOAD_IN_MEMORY = False  # True : le PDF est analysé depuis la mémoire, sans relecture disque
+PDF_MMAP_THRESHOLD = 32 * 1024 * 1024  # Au-delà, le tampon mémoire est remplacé par un fichier temporaire mappé
+PDF_CACHE_ENABLED = True  # En mode mémoire, conserve aussi une copie du PDF dans OUTPUT_FOLDER
 
 # Configuration PDF
 FOOTER_BOTTOM_FRAC = 0.15  # Fraction du bas de page à ignorer pour les footers
@@ -21,28 +41,235 @@ FOOTER_BOTTOM_FRAC = 0.15  # Fraction du bas de page à ignorer pour les footers
 Y_TOLERANCE = 3  # Tolérance en pixels pour grouper les lignes
 X_GAP_TOLERANCE = 8  # Tolérance pour les petits espaces entre colonnes
 
+# Configuration de la détection des notices quasi-identiques (MinHash/LSH)
+DEDUP_ENABLED = True
+DEDUP_SIMILARITY_THRESHOLD = 0.9  # Similarité de Jaccard estimée à partir de laquelle deux notices sont doublons
+DEDUP_NUM_PERM = 64  # Nombre de permutations de la signature MinHash
+DEDUP_BANDS = 16  # Nombre de bandes LSH (DEDUP_NUM_PERM doit être divisible par ce nombre)
+DEDUP_SHINGLE_SIZE = 5  # Nombre de mots par shingle
+MANUAL_INDEX_FILE = OUTPUT_FOLDER / "manual_index.json"
+SECTIONS_CACHE_FOLDER = OUTPUT_FOLDER / "sections"
+
+# Configuration du pré-contrôle des PDF (avant l'extraction complète)
+PRESCREEN_MAX_FILE_SIZE = 200 * 1024 * 1024  # Taille maximale acceptée en octets
+PRESCREEN_MAX_PAGES = 500  # Nombre maximal de pages accepté
+PRESCREEN_SAMPLE_PAGES = 5  # Nombre de pages échantillonnées pour détecter la couche texte
+PRESCREEN_MIN_TEXT_CHARS = 50  # En dessous, le PDF est considéré comme scanné (images seules)
+
+# Configuration de l'API Zoho Desk (surchargeable pour viser un autre datacenter ou src/devtools/mock_zoho.py)
+ZOHO_API_BASE = os.environ.get("AVIDSEN_ZOHO_API_BASE", "https://desk.zoho.com/api/v1").rstrip("/")
+ZOHO_ACCOUNTS_BASE = os.environ.get("AVIDSEN_ZOHO_ACCOUNTS_BASE", "https://accounts.zoho.com").rstrip("/")
+ZOHO_TOKEN_URL = f"{ZOHO_ACCOUNTS_BASE}/oauth/v2/token"
+ZOHO_ARTICLE_INDEX_FILE = OUTPUT_FOLDER / "zoho_article_index.json"  # Index permalink -> articleId
+
+# Publication vers Zoho Desk (limitation de débit et reprises)
+ZOHO_PUBLISH_WORKERS = 4  # Nombre de publications simultanées
+ZOHO_REQUESTS_PER_SECOND = 2.0  # Débit moyen autorisé (seau à jetons), à ajuster selon les crédits API Zoho
+ZOHO_REQUESTS_BURST = 5  # Nombre de requêtes pouvant partir d'un coup
+ZOHO_MAX_RETRIES = 5  # Reprises sur 429 / 5xx / erreur réseau avant abandon
+ZOHO_BACKOFF_BASE = 1.0  # Délai initial (secondes) du backoff exponentiel
+ZOHO_BACKOFF_MAX = 60.0  # Délai maximal (secondes) entre deux reprises
+
+# Authentification Zoho
+TOKEN_REFRESH_MARGIN = 300  # Le token est rafraîchi s'il expire dans moins de N secondes
+
+# File d'attente persistante (outbox) des articles à publier
+ZOHO_OUTBOX_FILE = OUTPUT_FOLDER / "zoho_outbox.sqlite3"
+OUTBOX_RETRIES_PER_RUN = 3  # Tentatives par exécution avant de laisser l'article pour la suivante
+OUTBOX_CLAIM_TIMEOUT = 600  # Secondes après lesquelles un article "en cours" abandonné est repris
+ZOHO_PAYLOAD_FOLDER = OUTPUT_FOLDER / "payloads"  # Corps JSON des articles en attente, écrits en flux
+
+# Découpage des notices volumineuses en plusieurs articles
+ZOHO_ARTICLE_MAX_BYTES = 4 * 1024 * 1024  # Au-delà, la notice est publiée en plusieurs parties
+ARTICLE_SPLIT_MIN_FILL = 0.5  # Remplissage minimal d'une partie avant une coupure sur section ancre
+ZOHO_KB_ARTICLE_URL = "/portal/fr/kb/articles/{permalink}"  # Lien vers un article (sommaire, navigation)
+
+# Rendu HTML des articles
+ARTICLE_CSS_CLASSES = False  # True : styles en ligne répétés remplacés par des classes dans un bloc <style>
+ARTICLE_COMPACT_HTML = False  # True : retours à la ligne et indentation supprimés du HTML publié
+TUTORIAL_MAIN_CONTENT_ONLY = True  # Ne garder que la zone de contenu des pages tutoriels (densité texte/liens)
+
+# Extraction parallèle des tutoriels
+TUTORIAL_FETCH_WORKERS = 8  # Téléchargements simultanés de pages tutoriels
+TUTORIAL_PARSE_WORKERS = min(4, (os.cpu_count() or 1) - 1)  # Processus de nettoyage HTML (0 : dans les threads de téléchargement)
+
+# Stockage des tutoriels extraits (JSONL en ajout seul, compressé si l'extension est .gz)
+TUTORIALS_FOLDER = Path("tutorials_data")
+TUTORIAL_STORE_FILE = TUTORIALS_FOLDER / "tutorials.jsonl.gz"
+ATTACH_TUTORIALS_TO_PRODUCTS = True  # Ajouter aux articles produits les tutoriels stockés de même référence
+
+# Mode staging (--stage-only) : articles rendus écrits dans un bundle, publiés plus tard
+STAGING_BUNDLE_FILE = OUTPUT_FOLDER / "staged_articles.jsonl.gz"
+
+# Pipeline par étapes (python -m src.cli) : artefacts intermédiaires de chaque étape
+PIPELINE_FOLDER = OUTPUT_FOLDER / "pipeline"
+PIPELINE_PRODUCTS_FILE = PIPELINE_FOLDER / "products.jsonl"  # discover : produits de la liste
+PIPELINE_FETCHED_FILE = PIPELINE_FOLDER / "fetched.jsonl"  # fetch : PDF et images téléchargés
+PIPELINE_EXTRACTED_FILE = PIPELINE_FOLDER / "extracted.jsonl"  # extract : sections extraites des PDF
+PIPELINE_SECTIONS_FOLDER = PIPELINE_FOLDER / "sections"
+PIPELINE_FETCH_WORKERS = 4  # Téléchargements simultanés de l'étape fetch
+
+# Cassettes HTTP du crawl : "live" (réseau), "record" (réseau + enregistrement), "replay" (hors ligne)
+HTTP_MODE = os.environ.get("AVIDSEN_HTTP_MODE", "live")
+HTTP_CASSETTE_FOLDER = Path(os.environ.get("AVIDSEN_HTTP_CASSETTE", "cassettes/avidsen"))
+HTTP_REPLAY_LATENCY = float(os.environ.get("AVIDSEN_HTTP_LATENCY", "0"))  # Secondes ajoutées à chaque réponse rejouée
+HTTP_REPLAY_BANDWIDTH = float(os.environ.get("AVIDSEN_HTTP_BANDWIDTH", "0"))  # Octets par seconde (0 : illimité)
+
+# Rapport d'exécution
+RUN_REPORT_FILE = OUTPUT_FOLDER / "run_report.json"
+
+# Instrumentation (durées et volumes des étapes coûteuses, ajoutés au rapport d'exécution)
+METRICS_ENABLED = True
+METRICS_PREFIX = "avidsen_"
+METRICS_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRICS_PROM_FILE = OUTPUT_FOLDER / "avidsen_metrics.prom"  # Fichier texte pour le collecteur textfile de node_exporter
+
+# Profilage à la demande (--profile) : cProfile + tracemalloc par produit et par extraction PDF
+PROFILE_FOLDER = OUTPUT_FOLDER / "profiles"
+PROFILE_TOP_N = 5  # Appels conservés : les N plus lents et les N plus gourmands en mémoire
+PROFILE_TOP_ALLOCATIONS = 15  # Lignes d'allocation affichées par appel
+PROFILE_TRACEMALLOC_FRAMES = 1  # Profondeur de pile enregistrée par tracemalloc (1 suffit pour grouper par ligne)
+
+
+_config_cache = {"stamp": None, "values": {}}
+_config_cache_lock = threading.Lock()
+
+
+def _file_stamp(stat_result):
+    # L'inode change à chaque remplacement atomique, même si le mtime est identique
+    return stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino
+
+
+def _read_config_file():
+    """
+    Lit config.txt, sans surcharge d'environnement.
+    Le résultat est mis en cache tant que le fichier n'a pas changé.
+
+    Returns:
+        Copie du dictionnaire des clés, ou None si le fichier n'existe pas
+    """
+    try:
+        stamp = _file_stamp(os.stat(CONFIG_FILE))
+    except FileNotFoundError:
+        return None
+    with _config_cache_lock:
+        if _config_cache["stamp"] == stamp:
+            return dict(_config_cache["values"])
 
-def load_config():
-    """Charge la configuration depuis config.txt"""
     config = {}
     try:
         with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            # Le stamp est pris sur le fichier effectivement lu
+            stamp = _file_stamp(os.fstat(f.fileno()))
             for line in f:
                 if '=' in line:
                     key, value = line.strip().split('=', 1)
                     config[key.strip()] = value.strip().strip('"\'')
     except FileNotFoundError:
-        print("Erreur : Le fichier config.txt est introuvable.")
-        print("Veuillez créer un fichier config.txt sur la base de config.example.txt")
-        exit(1)
+        return None
+    with _config_cache_lock:
+        _config_cache["stamp"] = stamp
+        _config_cache["values"] = config
+    return dict(config)
+
+
+def load_config():
+    """
+    Charge la configuration depuis config.txt, puis applique les variables
+    d'environnement listées dans CONFIG_ENV_OVERRIDES.
+    Le fichier n'est relu que s'il a été modifié depuis le dernier appel.
+    """
+    config = _read_config_file()
+    overrides = {key: os.environ[key] for key in CONFIG_ENV_OVERRIDES if os.environ.get(key)}
+    if config is None:
+        if not overrides:
+            print("Erreur : Le fichier config.txt est introuvable.")
+            print("Veuillez créer un fichier config.txt sur la base de config.example.txt")
+            exit(1)
+        config = {}
+    config.update(overrides)
     return config
 
 
 def save_config(config):
-    """Sauvegarde les variables dans le fichier config.txt"""
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+    """
+    Sauvegarde les variables dans le fichier config.txt.
+    L'écriture passe par un fichier temporaire renommé : un lecteur concurrent
+    voit l'ancienne ou la nouvelle version, jamais un fichier vide.
+
+    Args:
+        config: Dictionnaire des clés, tel que renvoyé par _read_config_file()
+            (les surcharges d'environnement ne doivent pas être écrites)
+    """
+    tmp_file = f"{CONFIG_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
         for key, value in config.items():
             f.write(f"{key}={value}\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, CONFIG_FILE)
+
+
+_config_lock_state = threading.local()
+_config_thread_lock = threading.RLock()
+
+
+@contextmanager
+def config_lock():
+    """
+    Verrou exclusif sur config.txt, partagé entre threads et entre processus.
+    Réentrant pour un même thread.
+    """
+    depth = getattr(_config_lock_state, "depth", 0)
+    if depth:
+        _config_lock_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            _config_lock_state.depth -= 1
+        return
+
+    with _config_thread_lock:
+        with open(f"{CONFIG_FILE}.lock", "a+b") as lock_file:
+            if os.name == "nt":
+                import msvcrt
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _config_lock_state.depth = 1
+            try:
+                yield
+            finally:
+                _config_lock_state.depth = 0
+                if os.name == "nt":
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def update_config(updates, remove=()):
+    """
+    Met à jour plusieurs clés de config.txt en une seule écriture atomique.
+
+    Les valeurs identiques à une surcharge d'environnement ne sont pas recopiées
+    dans le fichier (ex: un refresh token fourni par une variable d'environnement).
+
+    Args:
+        updates: Dictionnaire des clés à définir
+        remove: Clés à supprimer
+    """
+    with config_lock():
+        config = _read_config_file() or {}
+        config.update({
+            key: value for key, value in updates.items()
+            if value is not None and not (key in CONFIG_ENV_OVERRIDES and os.environ.get(key) == str(value))
+        })
+        for key in remove:
+            config.pop(key, None)
+        save_config(config)
 
 
 def get_zoho_config():
@@ -54,8 +281,10 @@ def get_zoho_config():
     access_token = config.get("ZOHO_ACCESS_TOKEN")
     org_id = config.get("ZOHO_ORG_ID")
     product_category_id = config.get("ZOHO_PRODUCT_CATEGORY_ID")
+    # Un refresh token ou un granted code suffit : le token d'accès est obtenu à la demande
+    can_get_token = access_token or config.get("ZOHO_REFRESH_TOKEN") or config.get("GRANTED_CODE")
     
-    if not all([access_token, org_id]):
+    if not all([can_get_token, org_id]):
         print("Erreur: Des variables de configuration Zoho (Token/OrgID) sont manquantes dans config.txt")
         exit(1)
     
@@ -0,0 +1,3 @@
+"""
+Outils de développement : données synthétiques pour les benchmarks et les essais hors ligne.
+"""
@@ -0,0 +1,338 @@
+"""
+Serveur Zoho Desk local, pour tester la publication sans toucher à la production.
+
+Implémente ce qu'utilise le publieur :
+    POST  /oauth/v2/token            jetons (authorization_code, refresh_token)
+    GET   /api/v1/articles           liste paginée par catégorie (categoryId, from, limit)
+    GET   /api/v1/articles/{id}      lecture d'un article
+    POST  /api/v1/articles           création (422 si le permalink existe déjà)
+    PATCH /api/v1/articles/{id}      mise à jour (404 si l'article n'existe pas)
+    GET   /__stats                   compteurs du serveur (JSON)
+
+et permet d'injecter une latence, une limite de débit (429 + Retry-After),
+l'expiration des tokens (401) et des erreurs 5xx transitoires.
+
+    python -m src.devtools.mock_zoho --port 8800 --latency 0.05 --rate-limit 10 --error-rate 0.02 --token-ttl 120
+
+puis, dans un autre terminal :
+
+    AVIDSEN_ZOHO_API_BASE=http://127.0.0.1:8800/api/v1 \\
+    AVIDSEN_ZOHO_ACCOUNTS_BASE=http://127.0.0.1:8800 \\
+    AVIDSEN_CONFIG_FILE=config.mock.txt \\
+    python -m src.cli publish
+"""
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class MockZohoState:
+    """
+    Articles, tokens et défaillances simulées du serveur (partagés entre threads).
+
+    Args:
+        latency: Délai moyen ajouté à chaque réponse (secondes)
+        jitter: Variation aléatoire de ce délai (fraction, ex: 0.5 pour ±50 %)
+        rate_limit: Requêtes API par seconde avant 429 (0 : illimité)
+        burst: Requêtes pouvant partir d'un coup
+        error_rate: Probabilité d'une erreur 5xx sur une requête API
+        token_ttl: Durée de validité des access tokens (secondes)
+        seed: Graine des tirages aléatoires (latence, erreurs)
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: float = 0.0, burst: int = 5,
+                 error_rate: float = 0.0, token_ttl: int = 3600, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.ids = itertools.count(603196000100000001)
+        self.articles: Dict[str, Dict] = {}
+        self.permalinks: Dict[str, str] = {}
+        self.tokens: Dict[str, float] = {}  # access token -> expiration
+        self.refresh_tokens = set()
+        self.stats: Dict[str, int] = {}
+        self._bucket_tokens = float(burst)
+        self._bucket_updated = time.monotonic()
+
+    def count(self, name: str):
+        with self.lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def delay(self) -> float:
+        if not self.latency:
+            return 0.0
+        with self.lock:
+            factor = 1 + self.jitter * (2 * self.random.random() - 1)
+        return max(0.0, self.latency * factor)
+
+    def take_rate_token(self) -> float:
+        """
+        Seau à jetons comme celui du client (src/zoho/rate_limit.py), mais sans attente :
+        retourne 0 si la requête passe, sinon le délai à annoncer dans le 429.
+        """
+        if not self.rate_limit:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self._bucket_tokens = min(self.burst, self._bucket_tokens + (now - self._bucket_updated) * self.rate_limit)
+            self._bucket_updated = now
+            if self._bucket_tokens >= 1:
+                self._bucket_tokens -= 1
+                return 0.0
+            return (1 - self._bucket_tokens) / self.rate_limit
+
+    def transient_error(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def issue_token(self, refresh_token: str = None) -> Dict:
+        with self.lock:
+            access_token = f"mock.{next(self.ids)}"
+            self.tokens[access_token] = time.time() + self.token_ttl
+            token = {"access_token": access_token, "expires_in": self.token_ttl, "token_type": "Bearer",
+                     "api_domain": "mock"}
+            if refresh_token is None:
+                refresh_token = f"mock.refresh.{next(self.ids)}"
+                token["refresh_token"] = refresh_token
+            self.refresh_tokens.add(refresh_token)
+        return token
+
+    def token_is_valid(self, access_token: str) -> bool:
+        with self.lock:
+            return self.tokens.get(access_token, 0) > time.time()
+
+    def snapshot(self) -> Dict:
+        """Compteurs du serveur (articles, tokens émis, requêtes par route et par code HTTP)."""
+        with self.lock:
+            return {"articles": len(self.articles), "tokens_issued": len(self.tokens),
+                    "requests": dict(sorted(self.stats.items()))}
+
+
+class MockZohoHandler(BaseHTTPRequestHandler):
+    """Requêtes HTTP du serveur ; l'état est porté par server.state."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "MockZohoDesk/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> MockZohoState:
+        return self.server.state
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b"".join(chunks)
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _reply(self, status: int, payload=None, headers: Dict[str, str] = None):
+        self.state.count(f"status_{status}")
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if body:
+            self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self, method: str):
+        url = urlsplit(self.path)
+        body = self._read_body() if method in ("POST", "PATCH") else b""
+        route = "/api/v1/articles/{id}" if url.path.startswith("/api/v1/articles/") else url.path
+        self.state.count(f"{method} {route}")
+        time.sleep(self.state.delay())
+
+        if url.path == "/__stats":
+            return self._reply(200, self.state.snapshot())
+        if url.path == "/oauth/v2/token" and method == "POST":
+            return self._token(parse_qs(body.decode("utf-8")))
+        if not url.path.startswith("/api/v1/articles"):
+            return self._reply(404, {"errorCode": "URL_NOT_FOUND"})
+
+        wait = self.state.take_rate_token()
+        if wait:
+            return self._reply(429, {"errorCode": "TOO_MANY_REQUESTS"}, {"Retry-After": str(max(1, round(wait)))})
+        authorization = self.headers.get("Authorization", "")
+        if not self.state.token_is_valid(authorization.replace("Zoho-oauthtoken ", "", 1)):
+            return self._reply(401, {"errorCode": "INVALID_OAUTH"})
+        if self.state.transient_error():
+            return self._reply(self.state.random.choice((500, 502, 503)), {"errorCode": "INTERNAL_SERVER_ERROR"})
+
+        article_id = url.path[len("/api/v1/articles/"):] if url.path.startswith("/api/v1/articles/") else None
+        if method == "GET" and article_id is None:
+            return self._list(parse_qs(url.query))
+        if method == "GET":
+            return self._get(article_id)
+        if method == "POST" and article_id is None:
+            return self._create(body)
+        if method == "PATCH" and article_id:
+            return self._update(article_id, body)
+        return self._reply(405, {"errorCode": "METHOD_NOT_ALLOWED"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PATCH(self):
+        self._route("PATCH")
+
+    # --- Points d'entrée ---
+
+    def _token(self, form: Dict):
+        grant_type = form.get("grant_type", [""])[0]
+        if grant_type == "authorization_code" and form.get("code", [""])[0]:
+            return self._reply(200, self.state.issue_token())
+        if grant_type == "refresh_token" and form.get("refresh_token", [""])[0]:
+            # Tout refresh token non vide est accepté : config.txt peut contenir celui de la production
+            return self._reply(200, self.state.issue_token(form["refresh_token"][0]))
+        return self._reply(400, {"error": "invalid_code"})
+
+    def _list(self, query: Dict):
+        category_id = query.get("categoryId", [None])[0]
+        start = int(query.get("from", ["1"])[0])
+        limit = min(int(query.get("limit", ["50"])[0]), 50)
+        with self.state.lock:
+            articles = [article for article in self.state.articles.values()
+                        if category_id is None or article["categoryId"] == category_id]
+        page = articles[start - 1:start - 1 + limit]
+        if not page:
+            return self._reply(204)
+        # Comme l'API réelle, la liste ne renvoie pas le contenu des articles
+        return self._reply(200, {"data": [{k: v for k, v in article.items() if k != "answer"} for article in page]})
+
+    def _get(self, article_id: str):
+        with self.state.lock:
+            article = self.state.articles.get(article_id)
+        if article is None:
+            return self._reply(404, {"errorCode": "RESOURCE_NOT_FOUND"})
+        return self._reply(200, article)
+
+    def _parse(self, body: bytes) -> Tuple[Dict, bool]:
+        try:
+            return json.loads(body), True
+        except ValueError:
+            self._reply(422, {"errorCode": "INVALID_DATA"})
+            return {}, False
+
+    def _create(self, body: bytes):
+        data, ok = self._parse(body)
+        if not ok:
+            return
+        if not data.get("title") or not data.get("categoryId"):
+            return self._reply(422, {"errorCode": "INVALID_DATA", "message": "title et categoryId obligatoires"})
+        now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        with self.state.lock:
+            permalink = data.get("permalink") or f"article-{len(self.state.articles) + 1}"
+            if permalink in self.state.permalinks:
+                duplicate = True
+            else:
+                duplicate = False
+                article_id = str(next(self.state.ids))
+                article = {**data, "id": article_id, "permalink": permalink, "createdTime": now, "modifiedTime": now}
+                self.state.articles[article_id] = article
+                self.state.permalinks[permalink] = article_id
+        if duplicate:
+            return self._reply(422, {"errorCode": "DUPLICATE_VALUE", "message": f"permalink {permalink} déjà utilisé"})
+        return self._reply(200, article)
+
+    def _update(self, article_id: str, body: bytes):
+        data, ok = self._parse(body)
+        if not ok:
+            return
+        with self.state.lock:
+            article = self.state.articles.get(article_id)
+            if article is not None:
+                old_permalink = article["permalink"]
+                article.update({k: v for k, v in data.items() if k != "id"})
+                article["modifiedTime"] = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+                if article["permalink"] != old_permalink:
+                    self.state.permalinks.pop(old_permalink, None)
+                    self.state.permalinks[article["permalink"]] = article_id
+                article = dict(article)
+        if article is None:
+            return self._reply(404, {"errorCode": "RESOURCE_NOT_FOUND"})
+        return self._reply(200, article)
+
+
+def _build_server(host: str, port: int, **options) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), MockZohoHandler)
+    server.daemon_threads = True
+    server.state = MockZohoState(**options)
+    return server
+
+
+def start_mock_zoho(host: str = "127.0.0.1", port: int = 0, **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Démarre le serveur dans un thread (tests, benchmarks).
+
+    Args:
+        host: Adresse d'écoute
+        port: Port (0 : port libre choisi par le système)
+        **options: Paramètres de MockZohoState (latency, rate_limit, error_rate, token_ttl...)
+
+    Returns:
+        Tuple (serveur, URL de base) ; arrêter avec server.shutdown()
+    """
+    server = _build_server(host, port, **options)
+    threading.Thread(target=server.serve_forever, name="mock-zoho", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur Zoho Desk local (publication et tokens)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai moyen par réponse, en secondes")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation du délai (fraction, ex: 0.5)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requêtes API par seconde avant 429 (0 : illimité)")
+    parser.add_argument("--burst", type=int, default=5, help="Requêtes pouvant partir d'un coup")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probabilité d'une erreur 5xx")
+    parser.add_argument("--token-ttl", type=int, default=3600, help="Validité des access tokens, en secondes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = _build_server(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                           rate_limit=args.rate_limit, burst=args.burst, error_rate=args.error_rate,
+                           token_ttl=args.token_ttl, seed=args.seed)
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Zoho Desk local sur {base_url}")
+    print(f"  AVIDSEN_ZOHO_API_BASE={base_url}/api/v1")
+    print(f"  AVIDSEN_ZOHO_ACCOUNTS_BASE={base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.state.snapshot(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
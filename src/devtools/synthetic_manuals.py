@@ -0,0 +1,244 @@
+"""
+Génération de notices PDF synthétiques avec PyMuPDF.
+
+Les notices reproduisent ce qui coûte cher à l'extraction sur les vraies
+notices Avidsen : pages de sommaire, en-têtes et pieds de page répétés, logo
+répété sur chaque page, tableaux de caractéristiques sur plusieurs colonnes
+et grandes images. Le contenu ne dépend que de la graine : deux générations
+avec les mêmes paramètres donnent la même extraction.
+
+    python -m src.devtools.synthetic_manuals notice.pdf --pages 40 --tables 2 --images 1
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import Dict
+
+import fitz  # PyMuPDF
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 50
+HEADER_Y = 40
+FOOTER_Y = PAGE_HEIGHT - 30
+BODY_TOP = PAGE_HEIGHT * 0.2  # Sous la zone des en-têtes (18 % du haut de page)
+BODY_BOTTOM = PAGE_HEIGHT * 0.83  # Au-dessus de la zone des pieds de page (15 % du bas)
+
+_WORDS = (
+    "appuyez bouton caméra sonnette alarme détecteur installation batterie câble support "
+    "réglage voyant application réseau wifi portée mouvement enregistrement carte mémoire "
+    "alimentation fixation mur vis cheville produit garantie utilisation nettoyage sécurité "
+    "télécommande récepteur émetteur code appairage sirène zone accès porte portail"
+).split()
+_SECTION_TITLES = (
+    "CONSIGNES DE SÉCURITÉ", "CONTENU DU KIT", "DESCRIPTION DU PRODUIT", "INSTALLATION",
+    "MISE EN SERVICE", "APPAIRAGE", "UTILISATION", "ENTRETIEN", "CARACTÉRISTIQUES TECHNIQUES",
+    "DÉPANNAGE", "GARANTIE", "DÉCLARATION DE CONFORMITÉ",
+)
+_SPEC_LABELS = (
+    "Alimentation", "Consommation", "Fréquence", "Portée", "Indice IP", "Température",
+    "Dimensions", "Poids", "Résolution", "Angle de vision", "Stockage", "Autonomie",
+)
+
+
+def default_spec(**overrides) -> Dict:
+    """
+    Paramètres d'une notice synthétique.
+
+    Args:
+        **overrides: Valeurs remplaçant les paramètres par défaut :
+            pages (nombre de pages de contenu), toc_pages, sections_per_page,
+            paragraphs_per_section, tables (tableaux de caractéristiques par page),
+            table_columns, table_rows, images (grandes images par page), image_size
+            (côté en pixels), logo (logo répété sur chaque page), seed
+
+    Returns:
+        Dictionnaire des paramètres
+    """
+    spec = {
+        "pages": 20,
+        "toc_pages": 1,
+        "sections_per_page": 2,
+        "paragraphs_per_section": 2,
+        "tables": 1,
+        "table_columns": 3,
+        "table_rows": 8,
+        "images": 0,
+        "image_size": 800,
+        "logo": True,
+        "seed": 0,
+    }
+    unknown = set(overrides) - set(spec)
+    if unknown:
+        raise ValueError(f"Paramètres inconnus : {', '.join(sorted(unknown))}")
+    spec.update(overrides)
+    return spec
+
+
+def _noise_png(rng: random.Random, width: int, height: int) -> bytes:
+    """Image PNG de bruit (incompressible, comme une photo) de la taille demandée."""
+    pixmap = fitz.Pixmap(fitz.csRGB, width, height, rng.randbytes(width * height * 3), 0)
+    return pixmap.tobytes("png")
+
+
+def _logo_png(size: int = 64) -> bytes:
+    """Petit logo uni, identique sur toutes les pages."""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), 0)
+    pixmap.set_rect(pixmap.irect, (200, 30, 40))
+    return pixmap.tobytes("png")
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng, rng.randint(6, 14)) for _ in range(rng.randint(2, 4)))
+
+
+class _PageWriter:
+    """Place les éléments de haut en bas et passe à une nouvelle page quand la page est pleine."""
+
+    def __init__(self, doc: fitz.Document, title: str, logo: bytes):
+        self.doc = doc
+        self.title = title
+        self.logo = logo
+        self.logo_xref = 0
+        self.page = None
+        self.y = BODY_BOTTOM
+        self.page_count = 0
+
+    def new_page(self):
+        self.page = self.doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        self.page_count += 1
+        # En-tête et pied de page répétés, logo réutilisé (même xref) sur chaque page
+        self.page.insert_text((MARGIN, HEADER_Y), self.title, fontsize=9)
+        self.page.insert_text((MARGIN, FOOTER_Y), f"Avidsen - www.avidsen.com - page {self.page_count}", fontsize=8)
+        if self.logo:
+            rect = fitz.Rect(PAGE_WIDTH - MARGIN - 40, HEADER_Y - 25, PAGE_WIDTH - MARGIN, HEADER_Y + 15)
+            self.logo_xref = self.page.insert_image(rect, stream=self.logo if not self.logo_xref else None,
+                                                    xref=self.logo_xref)
+        self.y = BODY_TOP
+
+    def reserve(self, height: float) -> float:
+        """Retourne l'ordonnée où placer un élément de cette hauteur."""
+        if self.page is None or self.y + height > BODY_BOTTOM:
+            self.new_page()
+        top = self.y
+        self.y += height
+        return top
+
+
+def _write_toc(doc: fitz.Document, spec: Dict):
+    for _ in range(spec["toc_pages"]):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((MARGIN, BODY_TOP), "SOMMAIRE", fontsize=16)
+        y = BODY_TOP + 30
+        for number, title in enumerate(_SECTION_TITLES, 1):
+            page.insert_text((MARGIN, y), f"{number}. {title.title()} .......... {number + spec['toc_pages']}",
+                             fontsize=10)
+            y += 18
+
+
+def _write_table(writer: _PageWriter, rng: random.Random, spec: Dict):
+    """Tableau de caractéristiques : une ligne par caractéristique, une colonne par modèle."""
+    columns = spec["table_columns"]
+    line_height = 12
+    top = writer.reserve(line_height * (spec["table_rows"] + 2))
+    rows = [["Caractéristique"] + [f"Modèle {chr(65 + i)}" for i in range(columns - 1)]]
+    for row in range(spec["table_rows"]):
+        rows.append([_SPEC_LABELS[row % len(_SPEC_LABELS)]]
+                    + [f"{rng.randint(1, 999)} {rng.choice(('V', 'mA', 'm', 'g', 'mm', '°C'))}"
+                       for _ in range(columns - 1)])
+    # Cellules de largeur fixe en police à chasse fixe, colonnes alternant gras et normal :
+    # chaque ligne du tableau forme une ligne PDF avec un span par cellule, comme dans
+    # les notices générées par les logiciels de PAO
+    fonts = (fitz.Font("cobo"), fitz.Font("cour"))
+    writer_text = fitz.TextWriter(writer.page.rect)
+    for index, row in enumerate(rows):
+        x = MARGIN
+        for column, cell in enumerate(row):
+            width = 16 if column == 0 else 10
+            writer_text.append((x, top + (index + 1) * line_height), cell.ljust(width),
+                               font=fonts[column % 2], fontsize=8)
+            x += fonts[0].text_length("x" * width, fontsize=8)
+    writer_text.write_text(writer.page)
+
+
+def _write_image(writer: _PageWriter, rng: random.Random, spec: Dict):
+    size = spec["image_size"]
+    display = (PAGE_WIDTH - 2 * MARGIN) * 0.35
+    top = writer.reserve(display + 10)
+    rect = fitz.Rect(MARGIN, top, MARGIN + display, top + display)
+    writer.page.insert_image(rect, stream=_noise_png(rng, size, size))
+
+
+def generate_manual(path: Path, spec: Dict = None) -> Dict:
+    """
+    Écrit une notice synthétique.
+
+    Args:
+        path: Fichier PDF de sortie
+        spec: Paramètres (voir default_spec) ; valeurs par défaut si absent
+
+    Returns:
+        Résumé { "path", "pages", "bytes" }
+    """
+    spec = spec or default_spec()
+    rng = random.Random(spec["seed"])
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    doc = fitz.open()
+    title = f"Notice {rng.randint(100000, 199999)} - Produit synthétique"
+    _write_toc(doc, spec)
+    writer = _PageWriter(doc, title, _logo_png() if spec["logo"] else None)
+    section_number = 0
+    while writer.page_count < spec["pages"]:
+        writer.new_page()
+        for index in range(spec["sections_per_page"]):
+            section_title = _SECTION_TITLES[section_number % len(_SECTION_TITLES)]
+            if section_number >= len(_SECTION_TITLES):
+                section_title += f" ({section_number // len(_SECTION_TITLES) + 1})"
+            section_number += 1
+            top = writer.reserve(28)  # Peut ouvrir une nouvelle page : writer.page est lu ensuite
+            writer.page.insert_text((MARGIN, top + 18), section_title, fontsize=14)
+            if index == 0:
+                # Images sous le premier titre de la page, pour qu'elles soient rattachées à sa section
+                for _ in range(spec["images"]):
+                    _write_image(writer, rng, spec)
+            for _ in range(spec["paragraphs_per_section"]):
+                text = _paragraph(rng)
+                height = 12 * (len(text) // 95 + 2)
+                top = writer.reserve(height)
+                writer.page.insert_textbox(fitz.Rect(MARGIN, top, PAGE_WIDTH - MARGIN, top + height), text,
+                                           fontsize=9)
+        for _ in range(spec["tables"]):
+            _write_table(writer, rng, spec)
+
+    doc.save(str(path), garbage=3, deflate=True)
+    pages = doc.page_count
+    doc.close()
+    return {"path": str(path), "pages": pages, "bytes": path.stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une notice PDF synthétique")
+    parser.add_argument("output", help="Fichier PDF de sortie")
+    defaults = default_spec()
+    for name, value in defaults.items():
+        if isinstance(value, bool):
+            parser.add_argument(f"--no-{name.replace('_', '-')}", dest=name, action="store_false",
+                                help=f"Désactiver : {name}")
+        else:
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value,
+                                help=f"défaut : {value}")
+    args = vars(parser.parse_args())
+    output = args.pop("output")
+    summary = generate_manual(Path(output), default_spec(**args))
+    print(f"[OK] {summary['path']} : {summary['pages']} page(s), {summary['bytes']} octets")
+
+
+if __name__ == "__main__":
+    main()
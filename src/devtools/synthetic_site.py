@@ -0,0 +1,436 @@
+"""
+Site Avidsen synthétique servi en local, pour mesurer le crawl à grande échelle.
+
+Reproduit la structure WordPress lue par le crawler, pour un catalogue de N
+produits généré à partir d'une graine :
+    GET  /fr/produit/page/{n}                          listes de produits (article.post, h2.entry-title)
+    GET  /fr/produit/{slug}-{ref}/                     pages produit (a#cta-pdf-technical-sheet)
+    GET  /wp-content/uploads/notices/notice-{ref}.pdf  notices PDF (src/devtools/synthetic_manuals.py)
+    GET  /wp-content/uploads/produits/{ref}.png        images principales
+    GET  /fr/assistance/tutoriel-sav                   catégories de tutoriels
+    GET  /fr/assistance/tutoriel-sav/{cat}             produits ayant des tutoriels dans la catégorie
+    GET  /fr/assistance/tutoriel-sav/{cat}/ref/{ref}   tutoriels d'un produit
+    GET  /fr/assistance/tutoriel-sav/tuto/{slug}       pages tutoriel
+    GET  /__stats                                      compteurs du serveur (JSON)
+
+Les pages sont calculées à la demande (rien n'est stocké par produit) ; les
+notices sont générées une fois par variante puis servies depuis le disque :
+les produits d'une même variante partagent leur notice, comme les gammes de
+produits réelles, et passent par la déduplication des notices.
+
+    python -m src.devtools.synthetic_site --products 20000 --port 8900
+
+puis, dans un autre terminal :
+
+    export AVIDSEN_SITE_BASE_URL=http://127.0.0.1:8900
+    python -m src.cli discover
+    python -m src.cli fetch
+    python -m src.cli extract
+"""
+
+import argparse
+import json
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import fitz  # PyMuPDF
+
+from src.devtools.synthetic_manuals import default_spec, generate_manual
+
+CATEGORIES = ("motorisation", "visiophone", "solaire", "alarme", "domotique")
+FIRST_REF = 100000  # Référence du premier produit (6 chiffres, comme les références Avidsen)
+FAMILY_SIZE = 3  # Produits consécutifs d'une même gamme : même catégorie, mêmes tutoriels
+
+_PRODUCT_KINDS = {
+    "motorisation": ("Motorisation de portail battant", "Motorisation de portail coulissant", "Télécommande"),
+    "visiophone": ("Visiophone", "Interphone", "Platine de rue"),
+    "solaire": ("Projecteur solaire", "Applique solaire", "Caméra solaire"),
+    "alarme": ("Kit alarme", "Détecteur de mouvement", "Sirène extérieure"),
+    "domotique": ("Caméra intérieure", "Prise connectée", "Sonnette connectée"),
+}
+_ADJECTIVES = ("sans fil", "connecté", "Wi-Fi", "extérieur", "compact", "4G", "HD", "autonome")
+_TUTORIAL_SUBJECTS = (
+    "Installer", "Appairer", "Réinitialiser", "Mettre à jour", "Régler", "Remplacer la batterie de",
+    "Connecter à l'application", "Dépanner",
+)
+_WORDS = (
+    "appuyez maintenez bouton voyant clignote application réseau wifi appareil installation câble "
+    "batterie code télécommande récepteur mémoire réglage portée fixation support menu écran"
+).split()
+
+
+def _slugify(text: str) -> str:
+    text = text.lower()
+    for accented, plain in (("éèêë", "e"), ("àâ", "a"), ("îï", "i"), ("ôö", "o"), ("ûüù", "u"), ("ç", "c")):
+        text = re.sub(f"[{accented}]", plain, text)
+    return re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+
+
+def _sentence(rng: random.Random) -> str:
+    text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 16)))
+    return text[0].upper() + text[1:] + "."
+
+
+class SyntheticCatalog:
+    """
+    Catalogue déterministe : chaque produit est recalculé à partir de son index.
+
+    Args:
+        products: Nombre de produits
+        per_page: Produits par page de liste
+        pdf_ratio: Fraction des produits ayant une notice PDF
+        pdf_variants: Nombre de notices distinctes (0 : une notice par produit)
+        manual_pages: Pages de contenu des notices générées
+        tutorial_ratio: Fraction des gammes de produits ayant des tutoriels
+        seed: Graine du catalogue
+        cache_folder: Dossier des notices générées (dossier temporaire si absent)
+    """
+
+    def __init__(self, products: int = 1000, per_page: int = 12, pdf_ratio: float = 0.9, pdf_variants: int = 200,
+                 manual_pages: int = 6, tutorial_ratio: float = 0.3, seed: int = 0, cache_folder: Path = None):
+        self.products = products
+        self.per_page = per_page
+        self.pdf_ratio = pdf_ratio
+        self.pdf_variants = pdf_variants or products
+        self.manual_pages = manual_pages
+        self.tutorial_ratio = tutorial_ratio
+        self.seed = seed
+        self.cache_folder = Path(cache_folder or tempfile.mkdtemp(prefix="synthetic_site_"))
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+        self._manual_locks: Dict[int, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def pages(self) -> int:
+        return -(-self.products // self.per_page)
+
+    def family(self, family_index: int) -> Dict:
+        """Gamme de produits : catégorie, type de produit et tutoriels communs."""
+        rng = random.Random(f"{self.seed}:family:{family_index}")
+        category = CATEGORIES[family_index % len(CATEGORIES)]
+        kind = rng.choice(_PRODUCT_KINDS[category])
+        tutorials = []
+        if rng.random() < self.tutorial_ratio:
+            for number in range(rng.randint(1, 3)):
+                subject = _TUTORIAL_SUBJECTS[(family_index + number) % len(_TUTORIAL_SUBJECTS)]
+                title = f"{subject} votre {kind.lower()} (gamme {family_index})"
+                tutorials.append({"slug": f"{_slugify(title)}-{family_index}-{number}", "title": title})
+        return {"index": family_index, "category": category, "kind": kind, "tutorials": tutorials}
+
+    def product(self, index: int) -> Optional[Dict]:
+        """Produit d'index donné (None hors du catalogue)."""
+        if not 0 <= index < self.products:
+            return None
+        rng = random.Random(f"{self.seed}:product:{index}")
+        family = self.family(index // FAMILY_SIZE)
+        ref = str(FIRST_REF + index)
+        name = f"{family['kind']} {rng.choice(_ADJECTIVES)} {rng.randint(100, 999)}"
+        return {
+            "index": index,
+            "ref": ref,
+            "name": name,
+            "slug": f"{_slugify(name)}-{ref}",
+            "category": family["category"],
+            "tutorials": family["tutorials"],
+            "has_pdf": rng.random() < self.pdf_ratio,
+            "variant": rng.randrange(self.pdf_variants),
+        }
+
+    def product_by_ref(self, ref: str) -> Optional[Dict]:
+        return self.product(int(ref) - FIRST_REF) if ref.isdigit() else None
+
+    def products_with_tutorials(self, category: str) -> List[Dict]:
+        families = range(CATEGORIES.index(category), -(-self.products // FAMILY_SIZE), len(CATEGORIES))
+        refs = []
+        for family_index in families:
+            if self.family(family_index)["tutorials"]:
+                first = family_index * FAMILY_SIZE
+                refs.extend(self.product(i) for i in range(first, min(first + FAMILY_SIZE, self.products)))
+        return refs
+
+    def tutorial(self, slug: str) -> Optional[Dict]:
+        """Tutoriel d'après son slug ("...-{gamme}-{numéro}"), None s'il n'existe pas."""
+        match = re.fullmatch(r"[a-z0-9-]+-(\d+)-(\d+)", slug)
+        if not match or int(match.group(1)) * FAMILY_SIZE >= self.products:
+            return None
+        family = self.family(int(match.group(1)))
+        tutorials = {tutorial["slug"]: tutorial for tutorial in family["tutorials"]}
+        return {**tutorials[slug], "category": family["category"]} if slug in tutorials else None
+
+    def manual_path(self, variant: int) -> Path:
+        """Notice PDF d'une variante, générée au premier appel."""
+        path = self.cache_folder / f"notice_{self.seed}_{variant}_{self.manual_pages}.pdf"
+        with self._locks_lock:
+            lock = self._manual_locks.setdefault(variant, threading.Lock())
+        with lock:
+            if not path.exists():
+                rng = random.Random(f"{self.seed}:manual:{variant}")
+                spec = default_spec(pages=max(1, self.manual_pages + rng.randint(-2, 2)),
+                                    tables=rng.randint(0, 2), images=1 if rng.random() < 0.2 else 0,
+                                    image_size=400, seed=self.seed * 1_000_003 + variant)
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                generate_manual(tmp_path, spec)
+                tmp_path.replace(path)
+        return path
+
+    def prepare(self, workers: int = 4):
+        """Génère d'avance toutes les notices (le premier crawl ne mesure pas leur génération)."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self.manual_path, range(self.pdf_variants)))
+
+
+def _page(title: str, content: str) -> str:
+    """Gabarit commun : navigation, en-tête et pied de page comme sur le site réel."""
+    return (
+        "<!DOCTYPE html><html lang='fr'><head><meta charset='utf-8'>"
+        f"<title>{escape(title)} - Avidsen</title><style>body{{font-family:sans-serif}}</style>"
+        "<script>window.dataLayer=window.dataLayer||[];</script></head><body>"
+        "<header><div class='menu-principal'><a href='/fr/'>Accueil</a> <a href='/fr/produit/page/1'>Produits</a> "
+        "<a href='/fr/assistance/tutoriel-sav'>Assistance</a></div></header>"
+        "<nav class='breadcrumb'><a href='/fr/'>Accueil</a> &gt; " + escape(title) + "</nav>"
+        f"<main id='main'>{content}</main>"
+        "<footer><div class='newsletter'><p>Inscrivez-vous à la newsletter</p></div>"
+        "<p>© Avidsen - site synthétique</p></footer></body></html>"
+    )
+
+
+class SyntheticSiteHandler(BaseHTTPRequestHandler):
+    """Requêtes HTTP du site ; le catalogue est porté par server.catalog."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "SyntheticAvidsen/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def catalog(self) -> SyntheticCatalog:
+        return self.server.catalog
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.headers.get('Host') or '%s:%d' % self.server.server_address[:2]}"
+
+    def _count(self, route: str, status: int):
+        with self.server.stats_lock:
+            self.server.stats[route] += 1
+            self.server.stats[f"status_{status}"] += 1
+
+    def _reply(self, route: str, status: int, body: bytes, content_type: str):
+        self._count(route, status)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _html(self, route: str, html: str, status: int = 200):
+        self._reply(route, status, html.encode("utf-8"), "text/html; charset=UTF-8")
+
+    def _not_found(self, route: str):
+        self._html(route, _page("Page introuvable", "<h1>Page introuvable</h1>"), 404)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if path == "/__stats":
+            with self.server.stats_lock:
+                stats = dict(self.server.stats)
+            body = json.dumps(stats, ensure_ascii=False).encode("utf-8")
+            return self._reply("stats", 200, body, "application/json")
+
+        routes = (
+            (r"/fr/produit/page/(\d+)/?", self._listing),
+            (r"/fr/produit/[a-z0-9-]+-(\d+)/?", self._product),
+            (r"/wp-content/uploads/notices/notice-(\d+)\.pdf", self._manual),
+            (r"/wp-content/uploads/produits/(\d+)\.png", self._image),
+            (r"/fr/assistance/tutoriel-sav/?", self._tutorial_categories),
+            (r"/fr/assistance/tutoriel-sav/tuto/([a-z0-9-]+)/?", self._tutorial),
+            (r"/fr/assistance/tutoriel-sav/([a-z0-9-]+)/ref/(\d+)/?", self._product_tutorials),
+            (r"/fr/assistance/tutoriel-sav/([a-z0-9-]+)/?", self._tutorial_category),
+        )
+        for pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match:
+                return handler(*match.groups())
+        self._not_found("other")
+
+    def _listing(self, page: str):
+        page = int(page)
+        if not 1 <= page <= self.catalog.pages:
+            return self._not_found("listing")
+        first = (page - 1) * self.catalog.per_page
+        articles = []
+        for index in range(first, min(first + self.catalog.per_page, self.catalog.products)):
+            product = self.catalog.product(index)
+            title = f"Notice à télécharger – {product['ref']} – {product['name']} – Avidsen – {product['ref']}"
+            articles.append(
+                f"<article class='post type-post'><a href='{self.base_url}/fr/produit/{product['slug']}/'>"
+                f"<img class='attachment-large size-large wp-post-image entered lazyloaded' "
+                f"src='{self.base_url}/wp-content/uploads/produits/{product['ref']}.png' alt=''></a>"
+                f"<h2 class='entry-title'><a href='{self.base_url}/fr/produit/{product['slug']}/'>"
+                f"{escape(title)}</a></h2></article>"
+            )
+        pagination = f"<a class='next page-numbers' href='/fr/produit/page/{page + 1}'>Suivant</a>" \
+            if page < self.catalog.pages else ""
+        self._html("listing", _page(f"Produits - page {page}", "".join(articles) + pagination))
+
+    def _product(self, ref: str):
+        product = self.catalog.product_by_ref(ref)
+        if product is None:
+            return self._not_found("product")
+        rng = random.Random(f"{self.catalog.seed}:page:{ref}")
+        description = "".join(f"<p>{_sentence(rng)}</p>" for _ in range(rng.randint(3, 6)))
+        cta = (f"<a id='cta-pdf-technical-sheet' class='button' href='{self.base_url}/wp-content/uploads/"
+               f"notices/notice-{ref}.pdf'>Télécharger la notice</a>") if product["has_pdf"] else ""
+        self._html("product", _page(product["name"], f"<h1>{escape(product['name'])}</h1>{description}{cta}"))
+
+    def _manual(self, ref: str):
+        product = self.catalog.product_by_ref(ref)
+        if product is None or not product["has_pdf"]:
+            return self._not_found("manual")
+        path = self.catalog.manual_path(product["variant"])
+        self._count("manual", 200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def _image(self, ref: str):
+        if self.catalog.product_by_ref(ref) is None:
+            return self._not_found("image")
+        self._reply("image", 200, self.server.image, "image/png")
+
+    def _tutorial_categories(self):
+        links = "".join(f"<li><a href='/fr/assistance/tutoriel-sav/{category}'>{category.title()}</a></li>"
+                        for category in CATEGORIES)
+        self._html("tutorial_categories", _page("Tutoriels SAV", f"<h1>Tutoriels SAV</h1><ul>{links}</ul>"))
+
+    def _tutorial_category(self, category: str):
+        if category not in CATEGORIES:
+            return self._not_found("tutorial_category")
+        links = "".join(f"<li><a href='/fr/assistance/tutoriel-sav/{category}/ref/{product['ref']}'>"
+                        f"{escape(product['name'])}</a></li>"
+                        for product in self.catalog.products_with_tutorials(category))
+        self._html("tutorial_category", _page(category.title(), f"<h1>{category.title()}</h1><ul>{links}</ul>"))
+
+    def _product_tutorials(self, category: str, ref: str):
+        product = self.catalog.product_by_ref(ref)
+        if product is None or product["category"] != category or not product["tutorials"]:
+            return self._not_found("product_tutorials")
+        links = "".join(f"<li><a href='/fr/assistance/tutoriel-sav/tuto/{tutorial['slug']}'>"
+                        f"{escape(tutorial['title'])}</a></li>" for tutorial in product["tutorials"])
+        self._html("product_tutorials", _page(product["name"], f"<h1>{escape(product['name'])}</h1><ul>{links}</ul>"))
+
+    def _tutorial(self, slug: str):
+        tutorial = self.catalog.tutorial(slug)
+        if tutorial is None:
+            return self._not_found("tutorial")
+        rng = random.Random(f"{self.catalog.seed}:tutorial:{slug}")
+        steps = []
+        for number in range(1, rng.randint(3, 8) + 1):
+            paragraphs = "".join(f"<p>{_sentence(rng)}</p>" for _ in range(rng.randint(1, 3)))
+            image = (f"<img src='data:image/gif;base64,R0lGODlhAQABAAAAACw=' "
+                     f"data-lazy-src='/wp-content/uploads/produits/{FIRST_REF}.png' alt='étape {number}'>"
+                     if rng.random() < 0.5 else "")
+            steps.append(f"<h3>Étape {number}</h3>{paragraphs}{image}")
+        related = "".join(f"<a href='/fr/assistance/tutoriel-sav/{category}'>{category}</a> " for category in CATEGORIES)
+        content = (f"<article class='tutoriel'><h1>{escape(tutorial['title'])}</h1>{''.join(steps)}</article>"
+                   f"<aside class='related'><p>Autres catégories :</p>{related}</aside>")
+        self._html("tutorial", _page(tutorial["title"], content))
+
+
+def _image_png(size: int = 120) -> bytes:
+    """Image principale partagée par tous les produits (les noms de fichiers restent distincts)."""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, size, size), 0)
+    pixmap.set_rect(pixmap.irect, (230, 230, 235))
+    return pixmap.tobytes("png")
+
+
+def _build_server(host: str, port: int, latency: float = 0.0, **options) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), SyntheticSiteHandler)
+    server.daemon_threads = True
+    server.catalog = SyntheticCatalog(**options)
+    server.latency = latency
+    server.image = _image_png()
+    server.stats = Counter()
+    server.stats_lock = threading.Lock()
+    return server
+
+
+def start_synthetic_site(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                         **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Démarre le site dans un thread (tests, benchmarks).
+
+    Args:
+        host: Adresse d'écoute
+        port: Port (0 : port libre choisi par le système)
+        latency: Délai ajouté à chaque réponse (secondes)
+        **options: Paramètres de SyntheticCatalog (products, per_page, pdf_variants...)
+
+    Returns:
+        Tuple (serveur, URL de base à placer dans AVIDSEN_SITE_BASE_URL) ; arrêter avec server.shutdown()
+    """
+    server = _build_server(host, port, latency, **options)
+    threading.Thread(target=server.serve_forever, name="synthetic-site", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Site Avidsen synthétique (catalogue, notices, tutoriels)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--products", type=int, default=1000, help="Nombre de produits (défaut : 1000)")
+    parser.add_argument("--per-page", type=int, default=12, help="Produits par page de liste (défaut : 12)")
+    parser.add_argument("--pdf-ratio", type=float, default=0.9, help="Fraction des produits avec notice (défaut : 0.9)")
+    parser.add_argument("--pdf-variants", type=int, default=200,
+                        help="Notices distinctes, partagées entre produits (0 : une par produit ; défaut : 200)")
+    parser.add_argument("--manual-pages", type=int, default=6, help="Pages de contenu par notice (défaut : 6)")
+    parser.add_argument("--tutorial-ratio", type=float, default=0.3,
+                        help="Fraction des gammes avec tutoriels (défaut : 0.3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache-dir", help="Dossier des notices générées (réutilisable d'un lancement à l'autre)")
+    parser.add_argument("--prepare", action="store_true", help="Générer toutes les notices avant de servir")
+    parser.add_argument("--latency", type=float, default=0.0, help="Délai par réponse, en secondes")
+    args = parser.parse_args()
+
+    server = _build_server(args.host, args.port, args.latency, products=args.products, per_page=args.per_page,
+                           pdf_ratio=args.pdf_ratio, pdf_variants=args.pdf_variants,
+                           manual_pages=args.manual_pages, tutorial_ratio=args.tutorial_ratio, seed=args.seed,
+                           cache_folder=args.cache_dir)
+    catalog = server.catalog
+    if args.prepare:
+        start = time.perf_counter()
+        catalog.prepare()
+        print(f"[OK] {catalog.pdf_variants} notice(s) générée(s) en {time.perf_counter() - start:.1f} s "
+              f"dans {catalog.cache_folder}")
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"Site synthétique sur {base_url} : {catalog.products} produits, {catalog.pages} pages de liste")
+    print(f"  AVIDSEN_SITE_BASE_URL={base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(dict(server.stats), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Détection des notices quasi-identiques par signatures MinHash et index LSH.
+
+Les variantes d'un même produit (kit / complément, coloris...) publient souvent
+la même notice sous des URLs différentes. Chaque notice reçoit une signature
+MinHash calculée sur son texte ; l'index LSH (bandes de la signature) permet de
+retrouver les candidats similaires sans comparer la notice à tout le catalogue.
+"""
+
+import json
+import os
+import random
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config.settings import (
+    DEDUP_SIMILARITY_THRESHOLD,
+    DEDUP_NUM_PERM,
+    DEDUP_BANDS,
+    DEDUP_SHINGLE_SIZE,
+    MANUAL_INDEX_FILE,
+    SECTIONS_CACHE_FOLDER,
+)
+
+# Nombre premier de Mersenne utilisé pour les permutations universelles
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_SEED = 1
+
+
+def text_shingles(text: str, size: int = DEDUP_SHINGLE_SIZE) -> set:
+    """
+    Découpe un texte en shingles de `size` mots consécutifs.
+
+    Args:
+        text: Texte brut de la notice
+        size: Nombre de mots par shingle
+
+    Returns:
+        Ensemble des hachages 32 bits des shingles
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {
+        zlib.crc32(" ".join(words[i:i + size]).encode("utf-8"))
+        for i in range(len(words) - size + 1)
+    }
+
+
+class ManualIndex:
+    """Index local des notices déjà traitées, persisté entre les exécutions."""
+
+    def __init__(self, path: Path = MANUAL_INDEX_FILE, threshold: float = DEDUP_SIMILARITY_THRESHOLD,
+                 num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS,
+                 shingle_size: int = DEDUP_SHINGLE_SIZE):
+        if num_perm % bands:
+            raise ValueError("DEDUP_NUM_PERM doit être divisible par DEDUP_BANDS")
+        self.path = Path(path)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        rng = random.Random(_SEED)
+        self._perms = [
+            (rng.randint(1, _MERSENNE_PRIME - 1), rng.randint(0, _MERSENNE_PRIME - 1))
+            for _ in range(num_perm)
+        ]
+
+        self.manuals: Dict[str, Dict] = {}
+        self._buckets: Dict[Tuple[int, tuple], List[str]] = {}
+        self._dirty = False
+        self.load()
+
+    # --- Persistance ---
+
+    def _params(self) -> Dict:
+        return {"num_perm": self.num_perm, "shingle_size": self.shingle_size, "seed": _SEED}
+
+    def load(self):
+        """Charge l'index depuis le disque (les signatures incompatibles sont ignorées)."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Index des notices illisible ({e}), reconstruction.")
+            return
+        if data.get("params") != self._params():
+            print("Paramètres MinHash modifiés, l'index des notices est reconstruit.")
+            return
+        self.manuals = data.get("manuals", {})
+        for key, entry in self.manuals.items():
+            if not entry.get("duplicate_of"):
+                self._index_signature(key, entry["signature"])
+
+    def save(self):
+        """
+        Enregistre l'index sur le disque s'il a changé (écriture atomique).
+        Appelé une fois en fin de crawl ou d'étape, et non à chaque notice.
+        """
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"params": self._params(), "manuals": self.manuals}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    # --- Signatures ---
+
+    def signature(self, text: str) -> Optional[List[int]]:
+        """
+        Calcule la signature MinHash d'un texte.
+
+        Returns:
+            Liste de `num_perm` entiers, ou None si le texte est vide
+        """
+        shingles = text_shingles(text, self.shingle_size)
+        if not shingles:
+            return None
+        signature = []
+        for a, b in self._perms:
+            signature.append(min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles))
+        return signature
+
+    def _band_keys(self, signature: List[int]):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start:start + self.rows])
+
+    def _index_signature(self, key: str, signature: List[int]):
+        for band_key in self._band_keys(signature):
+            self._buckets.setdefault(band_key, []).append(key)
+
+    def _unindex(self, key: str):
+        previous = self.manuals.get(key)
+        if not previous or previous.get("duplicate_of"):
+            return
+        for band_key in self._band_keys(previous["signature"]):
+            bucket = self._buckets.get(band_key, [])
+            if key in bucket:
+                bucket.remove(key)
+
+    @staticmethod
+    def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+        """Estime la similarité de Jaccard entre deux signatures."""
+        same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return same / len(sig_a)
+
+    # --- Requêtes ---
+
+    def find_duplicate(self, signature: List[int], exclude_key: str = None) -> Optional[Tuple[str, float]]:
+        """
+        Cherche une notice déjà indexée quasi-identique à la signature donnée.
+
+        Args:
+            signature: Signature MinHash de la notice
+            exclude_key: Clé à ignorer (la notice elle-même lors d'une ré-exécution)
+
+        Returns:
+            Tuple (clé de la notice canonique, similarité) ou None
+        """
+        candidates = set()
+        for band_key in self._band_keys(signature):
+            candidates.update(self._buckets.get(band_key, ()))
+        candidates.discard(exclude_key)
+
+        best = None
+        for key in candidates:
+            score = self.similarity(signature, self.manuals[key]["signature"])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def find_extracted(self, key: str, sha256: str) -> Optional[str]:
+        """
+        Cherche une notice déjà traitée avec le même contenu (même URL et même empreinte).
+
+        Args:
+            key: Identifiant de la notice (URL du PDF)
+            sha256: Empreinte du PDF
+
+        Returns:
+            Clé de la notice canonique dont les sections sont en cache, ou None
+        """
+        entry = self.manuals.get(key)
+        if not sha256 or not entry or entry.get("sha256") != sha256:
+            return None
+        canonical_key = entry.get("duplicate_of") or key
+        return canonical_key if self.has_sections(canonical_key) else None
+
+    def add_manual(self, key: str, signature: List[int], title: str, sections, permalink: str = "",
+                   sha256: str = None):
+        """
+        Enregistre une notice canonique et le résultat de son extraction.
+
+        Args:
+            key: Identifiant de la notice (URL du PDF)
+            signature: Signature MinHash
+            title: Titre de l'article publié
+            sections: Sections extraites, réutilisées pour les doublons
+            permalink: Permalink de l'article Zoho correspondant
+            sha256: Empreinte du PDF (une notice inchangée n'est pas extraite à nouveau)
+        """
+        SECTIONS_CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
+        sections_file = SECTIONS_CACHE_FOLDER / f"{zlib.crc32(key.encode('utf-8')):08x}.json"
+        with open(sections_file, "w", encoding="utf-8") as f:
+            json.dump(sections, f, ensure_ascii=False)
+
+        self._unindex(key)
+        self.manuals[key] = {
+            "title": title,
+            "permalink": permalink,
+            "signature": signature,
+            "sections_file": str(sections_file.as_posix()),
+            "duplicate_of": None,
+            "sha256": sha256,
+        }
+        self._index_signature(key, signature)
+        self._dirty = True
+
+    def add_duplicate(self, key: str, signature: List[int], title: str, canonical_key: str, similarity: float,
+                      sha256: str = None):
+        """Enregistre une notice détectée comme doublon d'une notice canonique."""
+        self._unindex(key)
+        self.manuals[key] = {
+            "title": title,
+            "signature": signature,
+            "duplicate_of": canonical_key,
+            "similarity": round(similarity, 3),
+            "sha256": sha256,
+        }
+        self._dirty = True
+
+    def has_sections(self, key: str) -> bool:
+        """Indique si les sections extraites d'une notice sont disponibles en cache."""
+        sections_file = (self.manuals.get(key) or {}).get("sections_file")
+        return bool(sections_file) and Path(sections_file).exists()
+
+    def load_sections(self, key: str):
+        """
+        Relit les sections extraites d'une notice canonique.
+
+        Returns:
+            Liste de sections, ou None si le cache est absent
+        """
+        if not self.has_sections(key):
+            return None
+        with open(self.manuals[key]["sections_file"], "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def duplicate_clusters(self) -> List[Dict]:
+        """
+        Regroupe les doublons autour de leur notice canonique.
+
+        Returns:
+            Liste de clusters { "canonical", "title", "permalink", "duplicates": [...] }
+        """
+        clusters = {}
+        for key, entry in self.manuals.items():
+            canonical = entry.get("duplicate_of")
+            if not canonical or canonical not in self.manuals:
+                continue
+            if canonical not in clusters:
+                canonical_entry = self.manuals[canonical]
+                clusters[canonical] = {
+                    "canonical": canonical,
+                    "title": canonical_entry.get("title", ""),
+                    "permalink": canonical_entry.get("permalink", ""),
+                    "duplicates": [],
+                }
+            clusters[canonical]["duplicates"].append({
+                "pdf_url": key,
+                "title": entry.get("title", ""),
+                "similarity": entry.get("similarity"),
+            })
+        return list(clusters.values())
+
+    def print_duplicate_report(self):
+        """Affiche les groupes de notices quasi-identiques détectés."""
+        clusters = self.duplicate_clusters()
+        if not clusters:
+            print("Aucune notice quasi-identique détectée.")
+            return
+        print(f"\n{len(clusters)} groupe(s) de notices quasi-identiques (seuil {self.threshold}) :")
+        for cluster in clusters:
+            print(f"- {cluster['title']} ({cluster['canonical']})")
+            for dup in cluster["duplicates"]:
+                print(f"    ≈ {dup['title']} ({dup['pdf_url']}) similarité {dup['similarity']}")
+
+
+_manual_index = None
+
+
+def get_manual_index() -> ManualIndex:
+    """Retourne l'index des notices partagé par le processus."""
+    global _manual_index
+    if _manual_index is None:
+        _manual_index = ManualIndex()
+    return _manual_index
@@ -1,15 +1,57 @@
 """
 Extraction de structure et de contenu depuis les PDFs.
+
+PyMuPDF (fitz) n'est importé qu'à l'ouverture d'un PDF : les commandes qui
+n'en lisent pas (publication, tokens, tutoriels) démarrent sans le charger.
 """
 
 import re
 import os
 import base64
 from pathlib import Path
-import fitz  # PyMuPDF
 
 from src.config.settings import FOOTER_BOTTOM_FRAC, Y_TOLERANCE, X_GAP_TOLERANCE
 from src.pdf.table_detector import is_toc_block
+from src.utils.metrics import add, timed, timed_loop
+from src.utils.profiling import profiled
+
+
+def open_pdf(pdf_source):
+    """
+    Ouvre un PDF depuis un chemin ou depuis un contenu déjà en mémoire.
+
+    Args:
+        pdf_source: Chemin, contenu (bytes / memoryview) ou document fitz déjà ouvert
+
+    Returns:
+        Document fitz
+    """
+    import fitz  # PyMuPDF
+
+    if isinstance(pdf_source, fitz.Document):
+        return pdf_source
+    if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=pdf_source, filetype="pdf")
+    return fitz.open(str(pdf_source))
+
+
+@timed("image_data_uri_seconds")
+def bytes_to_data_uri(image_data: bytes, ext: str) -> str:
+    """Convertit le contenu d'une image en data URI pour l'intégration dans HTML."""
+    # Déterminer le type MIME
+    mime_type = {
+        '.jpg': 'image/jpeg',
+        '.jpeg': 'image/jpeg',
+        '.png': 'image/png',
+        '.gif': 'image/gif',
+        '.bmp': 'image/bmp'
+    }.get(ext.lower(), 'image/png')
+    
+    # Encoder en base64
+    base64_data = base64.b64encode(image_data).decode('utf-8')
+    add("image_data_uri_bytes_total", len(image_data))
+    
+    return f"data:{mime_type};base64,{base64_data}"
 
 
 def image_to_data_uri(image_path: str) -> str:
@@ -18,35 +60,27 @@ def image_to_data_uri(image_path: str) -> str:
         with open(image_path, "rb") as img_file:
             image_data = img_file.read()
         
-        # Déterminer le type MIME
-        ext = os.path.splitext(image_path)[1].lower()
-        mime_type = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.gif': 'image/gif',
-            '.bmp': 'image/bmp'
-        }.get(ext, 'image/png')
-        
-        # Encoder en base64
-        base64_data = base64.b64encode(image_data).decode('utf-8')
-        
-        return f"data:{mime_type};base64,{base64_data}"
+        return bytes_to_data_uri(image_data, os.path.splitext(image_path)[1])
     except Exception as e:
         print(f"Erreur lors de la conversion de l'image {image_path}: {e}")
         return ""
 
 
-def extract_images_from_pdf(pdf_path: str, output_dir: str):
+@timed("pdf_extract_images_seconds")
+def extract_images_from_pdf(pdf_path, output_dir: str = None):
     """Extrait les images du PDF avec leurs positions exactes et les enregistre dans le dossier de sortie.
     
+    Sans dossier de sortie, les images restent en mémoire (clé 'bytes') au lieu d'être écrites sur disque.
+    
     Returns:
         Liste de dictionnaires contenant les informations sur les images extraites avec leurs positions
     """
     # Créer le dossier de sortie s'il n'existe pas
-    os.makedirs(output_dir, exist_ok=True)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
     
-    doc = fitz.open(pdf_path)
+    doc = open_pdf(pdf_path)
+    owns_doc = doc is not pdf_path
     extracted_images = []
     
     for page_num, page in enumerate(doc, 1):
@@ -70,10 +104,11 @@ def extract_images_from_pdf(pdf_path: str, output_dir: str):
             
             # Enregistrer l'image
             image_filename = f"page_{page_num}_img_{img_index}.{image_ext}"
-            image_path = os.path.join(output_dir, image_filename)
-            
-            with open(image_path, "wb") as img_file:
-                img_file.write(image_bytes)
+            image_path = None
+            if output_dir:
+                image_path = os.path.join(output_dir, image_filename)
+                with open(image_path, "wb") as img_file:
+                    img_file.write(image_bytes)
             
             # Obtenir la position de l'image dans la page
             # Chercher le rectangle de l'image
@@ -98,6 +133,7 @@ def extract_images_from_pdf(pdf_path: str, output_dir: str):
                     'width': base_image.get('width', 0),
                     'height': base_image.get('height', 0),
                     'size': len(image_bytes),
+                    'bytes': None if output_dir else image_bytes,
                     'position': {
                         'x0': img_rect.x0,
                         'y0': img_rect.y0,
@@ -121,10 +157,12 @@ def extract_images_from_pdf(pdf_path: str, output_dir: str):
                     'width': base_image.get('width', 0),
                     'height': base_image.get('height', 0),
                     'size': len(image_bytes),
+                    'bytes': None if output_dir else image_bytes,
                     'position': None
                 })
     
-    doc.close()
+    if owns_doc:
+        doc.close()
     
     # Trier les images par position (d'abord par page, puis par position Y)
     extracted_images.sort(key=lambda x: (x['page'], x['position']['y0'] if x['position'] else 0))
@@ -132,7 +170,81 @@ def extract_images_from_pdf(pdf_path: str, output_dir: str):
     return extracted_images
 
 
-def extract_pdf_structure_keep_tables(pdf_path: Path):
+def image_to_html(img_data: dict) -> str:
+    """
+    Construit le bloc HTML d'une image extraite, intégrée en data URI.
+
+    Args:
+        img_data: Informations de l'image renvoyées par extract_images_from_pdf
+
+    Returns:
+        HTML de l'image, ou chaîne vide si l'image n'a pas pu être lue
+    """
+    if img_data.get('bytes') is not None:
+        data_uri = bytes_to_data_uri(img_data['bytes'], os.path.splitext(img_data['filename'])[1])
+    else:
+        data_uri = image_to_data_uri(img_data['path'])
+    if not data_uri:
+        return ""
+
+    # Calculer la largeur relative pour l'affichage
+    if img_data['position']:
+        img_width_percent = img_data['position']['x1_percent'] - img_data['position']['x0_percent']
+    else:
+        img_width_percent = 100
+    max_width = min(img_width_percent, 80)  # Limiter à 80% de la largeur
+
+    image_html = f"<div style='margin: 10px 0; text-align: center;'>\n"
+    image_html += f"<img src='{data_uri}' alt='Image page {img_data['page']}' style='max-width: {max_width}%; height: auto; border: 1px solid #ddd; padding: 5px;' />\n"
+    image_html += f"</div>\n"
+    return image_html
+
+
+def _images_output_dir(pdf_path):
+    """Dossier d'extraction des images : à côté du PDF, ou aucun (en mémoire) pour un PDF sans chemin."""
+    if isinstance(pdf_path, (str, Path)):
+        return os.path.join(os.path.dirname(str(pdf_path)), "extracted_images")
+    return None
+
+
+def extract_pdf_images_only(pdf_path):
+    """
+    Traitement réduit des PDF scannés : reprend uniquement les images, page par page.
+
+    Args:
+        pdf_path: Chemin vers le fichier PDF, ou son contenu en mémoire
+
+    Returns:
+        Liste de dictionnaires { "title": str, "content": str }
+    """
+    extracted_images = extract_images_from_pdf(pdf_path, _images_output_dir(pdf_path))
+
+    content = "".join(image_to_html(img) for img in extracted_images)
+    if not content:
+        return []
+    return [{"title": "Notice", "content": content}]
+
+
+def extract_pdf_text(pdf_path) -> str:
+    """
+    Extrait rapidement le texte brut d'un PDF, sans images ni tableaux.
+    Sert au calcul des signatures de détection des doublons.
+
+    Args:
+        pdf_path: Chemin vers le fichier PDF, ou son contenu en mémoire
+
+    Returns:
+        Texte de toutes les pages
+    """
+    doc = open_pdf(pdf_path)
+    try:
+        return "\n".join(page.get_text("text") for page in doc)
+    finally:
+        doc.close()
+
+
+@profiled("pdf_extraction", label_kwarg="pdf_path")
+def extract_pdf_structure_keep_tables(pdf_path):
     """
     Extrait les sections (titre -> contenu) et les tableaux d'un PDF avec une meilleure précision.
     
@@ -143,12 +255,14 @@ def extract_pdf_structure_keep_tables(pdf_path: Path):
     - Supprime les en-têtes répétés apparaissant sur plusieurs pages
     
     Args:
-        pdf_path: Chemin vers le fichier PDF
+        pdf_path: Chemin vers le fichier PDF, ou son contenu en mémoire (bytes / memoryview)
         
     Returns:
         Liste de dictionnaires { "title": str, "content": str }
     """
-    doc = fitz.open(str(pdf_path))
+    import fitz  # PyMuPDF
+
+    doc = open_pdf(pdf_path)
     sections = []
 
     # For header duplicate detection: store normalized header strings and occurrence counts
@@ -160,10 +274,9 @@ def extract_pdf_structure_keep_tables(pdf_path: Path):
         return s2[:120]  # truncate to a stable length
 
     # Extraire les images du PDF d'abord
-    output_dir = os.path.join(os.path.dirname(str(pdf_path)), "extracted_images")
-    extracted_images = extract_images_from_pdf(str(pdf_path), output_dir)
+    extracted_images = extract_images_from_pdf(doc, _images_output_dir(pdf_path))
 
-    for page_index, page in enumerate(doc, start=1):
+    for page_index, page in timed_loop(enumerate(doc, start=1), "pdf_page_seconds"):
         page_height = page.rect.height
         page_width = page.rect.width
         blocks = page.get_text("dict", flags=fitz.TEXT_PRESERVE_IMAGES)["blocks"]
@@ -351,18 +464,9 @@ def extract_pdf_structure_keep_tables(pdf_path: Path):
         for element in all_elements:
             if element['type'] == 'image':
                 # Convertir l'image en data URI
-                img_data = element['data']
-                data_uri = image_to_data_uri(img_data['path'])
+                image_html = image_to_html(element['data'])
                 
-                if data_uri:
-                    # Calculer la largeur relative pour l'affichage
-                    img_width_percent = ((img_data['position']['x1_percent'] - img_data['position']['x0_percent']))
-                    max_width = min(img_width_percent, 80)  # Limiter à 80% de la largeur
-                    
-                    image_html = f"<div style='margin: 10px 0; text-align: center;'>\n"
-                    image_html += f"<img src='{data_uri}' alt='Image page {img_data['page']}' style='max-width: {max_width}%; height: auto; border: 1px solid #ddd; padding: 5px;' />\n"
-                    image_html += f"</div>\n"
-                    
+                if image_html:
                     if current_section:
                         current_section['content'] += image_html
                     else:
@@ -0,0 +1,117 @@
+"""
+Pré-contrôle rapide des PDF avant l'extraction complète.
+
+Lit uniquement la taille, le nombre de pages, le chiffrement et la présence
+d'une couche texte sur quelques pages, puis oriente le document vers :
+- "full" : extraction complète (texte, tableaux, images)
+- "images_only" : PDF scanné, seules les images des pages sont reprises
+- "reject" : fichier vide, chiffré, illisible ou hors limites (avec la raison)
+"""
+
+import os
+
+from src.config.settings import (
+    PRESCREEN_MAX_FILE_SIZE,
+    PRESCREEN_MAX_PAGES,
+    PRESCREEN_SAMPLE_PAGES,
+    PRESCREEN_MIN_TEXT_CHARS,
+)
+from src.pdf.pdf_parser import open_pdf
+
+ROUTE_FULL = "full"
+ROUTE_IMAGES_ONLY = "images_only"
+ROUTE_REJECT = "reject"
+
+
+def _sample_page_indexes(page_count: int, sample_size: int):
+    """Retourne des indices de pages répartis sur tout le document."""
+    if page_count <= sample_size:
+        return list(range(page_count))
+    step = page_count / sample_size
+    return sorted({int(i * step) for i in range(sample_size)})
+
+
+def prescreen_pdf(pdf_path) -> dict:
+    """
+    Analyse sommairement un PDF pour choisir son mode de traitement.
+
+    Args:
+        pdf_path: Chemin vers le fichier PDF, ou son contenu en mémoire (bytes / memoryview)
+
+    Returns:
+        Dictionnaire { "file", "size", "pages", "encrypted", "text_chars",
+        "has_images", "route", "reason" }
+    """
+    in_memory = isinstance(pdf_path, (bytes, bytearray, memoryview))
+    result = {
+        "file": "<memory>" if in_memory else str(pdf_path),
+        "size": 0,
+        "pages": 0,
+        "encrypted": False,
+        "text_chars": 0,
+        "has_images": False,
+        "route": ROUTE_REJECT,
+        "reason": "",
+    }
+
+    try:
+        if in_memory:
+            result["size"] = len(pdf_path)
+            header = bytes(pdf_path[:1024])
+        else:
+            result["size"] = os.path.getsize(pdf_path)
+            with open(pdf_path, "rb") as f:
+                header = f.read(1024)
+    except OSError as e:
+        result["reason"] = f"fichier inaccessible : {e}"
+        return result
+
+    if result["size"] == 0:
+        result["reason"] = "fichier vide"
+        return result
+    if result["size"] > PRESCREEN_MAX_FILE_SIZE:
+        result["reason"] = f"fichier trop volumineux ({result['size']} octets)"
+        return result
+    if b"%PDF-" not in header:
+        result["reason"] = "le fichier n'est pas un PDF"
+        return result
+
+    try:
+        doc = open_pdf(pdf_path)
+    except Exception as e:
+        result["reason"] = f"PDF illisible : {e}"
+        return result
+
+    try:
+        result["encrypted"] = bool(doc.is_encrypted)
+        if doc.needs_pass:
+            result["reason"] = "PDF protégé par mot de passe"
+            return result
+
+        result["pages"] = doc.page_count
+        if doc.page_count == 0:
+            result["reason"] = "PDF sans page"
+            return result
+        if doc.page_count > PRESCREEN_MAX_PAGES:
+            result["reason"] = f"trop de pages ({doc.page_count})"
+            return result
+
+        for index in _sample_page_indexes(doc.page_count, PRESCREEN_SAMPLE_PAGES):
+            page = doc[index]
+            result["text_chars"] += len(page.get_text("text").strip())
+            if not result["has_images"] and page.get_images():
+                result["has_images"] = True
+    except Exception as e:
+        result["reason"] = f"PDF corrompu : {e}"
+        return result
+    finally:
+        doc.close()
+
+    if result["text_chars"] >= PRESCREEN_MIN_TEXT_CHARS:
+        result["route"] = ROUTE_FULL
+    elif result["has_images"]:
+        result["route"] = ROUTE_IMAGES_ONLY
+        result["reason"] = "aucune couche texte (PDF scanné)"
+    else:
+        result["reason"] = "ni texte ni image exploitable"
+    return result
@@ -0,0 +1,4 @@
+"""
+Module pipeline pour l'application Avidsen.
+Découpe le traitement en étapes relançables séparément (voir src/cli.py).
+"""
@@ -0,0 +1,85 @@
+"""
+Artefacts intermédiaires du pipeline.
+
+Chaque étape écrit un fichier JSONL (une ligne par produit, indexée par l'URL
+de la page produit). Les lignes sont ajoutées au fil de l'eau : la dernière
+ligne d'une URL l'emporte, et une étape interrompue garde ce qu'elle a déjà
+produit.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable
+
+_append_lock = threading.Lock()
+
+
+def read_records(path: Path) -> Dict[str, Dict]:
+    """
+    Relit un artefact.
+
+    Args:
+        path: Fichier JSONL
+
+    Returns:
+        Dictionnaire { url: dernier enregistrement }, dans l'ordre de première apparition
+    """
+    records = {}
+    path = Path(path)
+    if not path.exists():
+        return records
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Ligne incomplète (arrêt brutal pendant l'écriture)
+            records[record["url"]] = record
+    return records
+
+
+def append_record(path: Path, record: Dict):
+    """Ajoute (ou remplace) l'enregistrement d'un produit."""
+    path = Path(path)
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _append_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def write_records(path: Path, records: Iterable[Dict]) -> int:
+    """
+    Remplace un artefact (écriture atomique).
+
+    Returns:
+        Nombre d'enregistrements écrits
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def write_json(path: Path, data):
+    """Écrit un fichier JSON de manière atomique."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_json(path: Path):
+    """Relit un fichier JSON."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,308 @@
+"""
+Étapes du traitement des notices produits, relançables séparément.
+
+    discover -> products.jsonl     liste des produits du site
+    fetch    -> fetched.jsonl      PDF et image de chaque produit (OUTPUT_FOLDER)
+    extract  -> extracted.jsonl    sections extraites de chaque PDF (dossier sections/)
+    render   -> bundle             articles rendus (format du mode staging)
+    publish  <- bundle             publication sur Zoho Desk via l'outbox
+
+Chaque étape lit l'artefact de la précédente : après une modification de
+l'extraction, seules extract, render et publish sont à relancer. Les produits
+déjà traités sont ignorés (sauf force=True), et les filtres (références,
+texte du titre, nombre maximal) limitent une étape à quelques produits.
+"""
+
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from src.config.settings import (
+    OUTPUT_FOLDER,
+    PIPELINE_EXTRACTED_FILE,
+    PIPELINE_FETCHED_FILE,
+    PIPELINE_FETCH_WORKERS,
+    PIPELINE_PRODUCTS_FILE,
+    PIPELINE_SECTIONS_FOLDER,
+    STAGING_BUNDLE_FILE,
+    TUTORIAL_STORE_FILE,
+)
+from src.pdf.dedup import get_manual_index
+from src.pipeline.artifacts import append_record, read_json, read_records, write_json, write_records
+from src.scraper.product_parser import download_main_image, extract_sections, fetch_pdf_url, find_product_tutorials
+from src.scraper.web_scraper import iter_listing_products
+from src.utils.file_utils import download_file_sha256
+from src.utils.text_utils import extract_product_ref, normalize_product_ref
+from src.zoho.api import create_zoho_article
+from src.zoho.bundle import close_staging, enable_staging, replay_bundle
+
+
+def select_products(products: Iterable[Dict], refs: Sequence[str] = None, match: str = None,
+                    limit: int = None) -> List[Dict]:
+    """
+    Filtre les produits d'un artefact.
+
+    Args:
+        products: Enregistrements (avec "title" et "ref")
+        refs: Références produit à garder (toutes si vide)
+        match: Texte devant apparaître dans le titre (insensible à la casse)
+        limit: Nombre maximal de produits
+
+    Returns:
+        Produits retenus, dans l'ordre de l'artefact
+    """
+    wanted_refs = {normalize_product_ref(ref) for ref in refs or ()}
+    selected = []
+    for product in products:
+        if wanted_refs and product.get("ref") not in wanted_refs:
+            continue
+        if match and match.lower() not in product.get("title", "").lower():
+            continue
+        selected.append(product)
+        if limit and len(selected) >= limit:
+            break
+    return selected
+
+
+def _read_stage_input(path: Path, previous_stage: str) -> Dict[str, Dict]:
+    records = read_records(path)
+    if not records:
+        print(f"[ERROR] {path} est vide ou absent : lancer d'abord l'étape '{previous_stage}'")
+    return records
+
+
+def discover(max_pages: int = None, limit: int = None) -> Dict[str, int]:
+    """
+    Parcourt la liste des produits du site et remplace products.jsonl.
+
+    Args:
+        max_pages: Nombre maximal de pages de la liste
+        limit: Nombre maximal de produits
+
+    Returns:
+        Résumé { "products" }
+    """
+    def _products():
+        for number, product in enumerate(iter_listing_products(max_pages), 1):
+            yield {**product, "ref": extract_product_ref(product["title"])}
+            if limit and number >= limit:
+                break
+
+    count = write_records(PIPELINE_PRODUCTS_FILE, _products())
+    print(f"\n[OK] {count} produit(s) enregistré(s) dans {PIPELINE_PRODUCTS_FILE}")
+    return {"products": count}
+
+
+def _is_fetched(record: Optional[Dict]) -> bool:
+    return bool(record) and (not record.get("pdf_path") or Path(record["pdf_path"]).exists())
+
+
+def _pdf_path(pdf_url: str) -> Path:
+    """Fichier local d'un PDF : le nom d'origine préfixé par l'empreinte de l'URL
+    (deux notices /uploads/AAAA/MM/notice.pdf ne s'écrasent pas)."""
+    name = Path(pdf_url.split("?")[0]).name or "notice.pdf"
+    return OUTPUT_FOLDER / f"{zlib.crc32(pdf_url.encode('utf-8')):08x}-{name}"
+
+
+class _PdfDownloads:
+    """Télécharge chaque URL de PDF une seule fois par exécution, même depuis plusieurs threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._done: Dict[str, Dict] = {}
+
+    def get(self, pdf_url: str) -> Dict:
+        """
+        Returns:
+            { "pdf_path", "pdf_sha256" } du PDF téléchargé
+        """
+        with self._lock:
+            url_lock = self._url_locks.setdefault(pdf_url, threading.Lock())
+        with url_lock:
+            if pdf_url not in self._done:
+                pdf_path = _pdf_path(pdf_url)
+                sha256 = download_file_sha256(pdf_url, pdf_path)
+                self._done[pdf_url] = {"pdf_path": str(pdf_path.as_posix()), "pdf_sha256": sha256}
+            return self._done[pdf_url]
+
+
+def _fetch_product(product: Dict, downloads: _PdfDownloads) -> Dict:
+    """Télécharge le PDF et l'image d'un produit (le PDF est toujours écrit sur disque)."""
+    pdf_url = fetch_pdf_url(product["url"])
+    record = {**product, "pdf_url": pdf_url, "pdf_path": None, "pdf_sha256": None}
+    if pdf_url:
+        record.update(downloads.get(pdf_url))
+    record["image"] = download_main_image(product.get("img_url"))
+    return record
+
+
+def fetch(workers: int = PIPELINE_FETCH_WORKERS, refs: Sequence[str] = None, match: str = None,
+          limit: int = None, force: bool = False) -> Dict[str, int]:
+    """
+    Télécharge la page, le PDF et l'image des produits de products.jsonl.
+
+    Args:
+        workers: Téléchargements simultanés
+        refs, match, limit: Filtres (voir select_products)
+        force: Télécharger à nouveau les produits déjà traités
+
+    Returns:
+        Résumé { "fetched", "skipped", "failed" }
+    """
+    from tqdm import tqdm
+
+    products = _read_stage_input(PIPELINE_PRODUCTS_FILE, "discover")
+    fetched = read_records(PIPELINE_FETCHED_FILE)
+    selected = select_products(products.values(), refs, match, limit)
+    todo = [product for product in selected if force or not _is_fetched(fetched.get(product["url"]))]
+
+    failed = 0
+    downloads = _PdfDownloads()  # Les URL de PDF ne sont connues qu'après lecture de la page produit
+    with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="fetch") as executor, \
+            tqdm(total=len(todo), desc="Fetch", unit="produit") as progress:
+        futures = {executor.submit(_fetch_product, product, downloads): product for product in todo}
+        for future in as_completed(futures):
+            try:
+                append_record(PIPELINE_FETCHED_FILE, future.result())
+            except Exception as e:
+                failed += 1
+                progress.write(f"[ERROR] {futures[future]['url']} : {e}")
+            progress.update(1)
+
+    summary = {"fetched": len(todo) - failed, "skipped": len(selected) - len(todo), "failed": failed}
+    print(f"\n[SUMMARY] fetch : {summary}")
+    return summary
+
+
+def _sections_file(product_url: str) -> Path:
+    return PIPELINE_SECTIONS_FOLDER / f"{zlib.crc32(product_url.encode('utf-8')):08x}.json"
+
+
+def _is_extracted(record: Optional[Dict], fetched: Dict) -> bool:
+    if not record or record.get("pdf_sha256") != fetched.get("pdf_sha256"):
+        return False
+    return bool(record.get("sections_file")) and Path(record["sections_file"]).exists()
+
+
+def extract(refs: Sequence[str] = None, match: str = None, limit: int = None,
+            force: bool = False) -> Dict[str, int]:
+    """
+    Extrait les sections des PDF téléchargés (pré-contrôle et détection des doublons compris).
+    Les sections des notices indexées (voir ManualIndex) ne sont écrites qu'une fois, dans le
+    cache de l'index : le résultat d'un produit pointe vers ce fichier, celui de la notice
+    canonique pour un doublon.
+    Un produit n'est extrait à nouveau que si son PDF a changé, ou avec force=True.
+
+    Args:
+        refs, match, limit: Filtres (voir select_products)
+        force: Extraire à nouveau les PDF déjà traités
+
+    Returns:
+        Résumé { "extracted", "duplicates", "skipped", "failed", "selected" }, "selected"
+        comptant les produits retenus par les filtres (avec ou sans PDF)
+    """
+    from tqdm import tqdm
+
+    fetched = _read_stage_input(PIPELINE_FETCHED_FILE, "fetch")
+    extracted = read_records(PIPELINE_EXTRACTED_FILE)
+    candidates = select_products(fetched.values(), refs, match, limit)
+    selected = [record for record in candidates if record.get("pdf_path")]
+    todo = [record for record in selected if force or not _is_extracted(extracted.get(record["url"]), record)]
+
+    summary = {"extracted": 0, "duplicates": 0, "skipped": len(selected) - len(todo), "failed": 0,
+               "selected": len(candidates)}
+    manual_index = get_manual_index()
+    forced = set()  # Avec force=True, un PDF partagé par plusieurs produits n'est extrait qu'une fois
+    try:
+        for record in tqdm(todo, desc="Extract", unit="notice"):
+            try:
+                sections, canonical_key = extract_sections(Path(record["pdf_path"]), record["pdf_url"],
+                                                           record["title"], record["pdf_sha256"],
+                                                           force=force and record["pdf_url"] not in forced)
+                forced.add(record["pdf_url"])
+            except Exception as e:
+                summary["failed"] += 1
+                tqdm.write(f"[ERROR] Extraction {record['pdf_path']} : {e}")
+                continue
+            result = {"url": record["url"], "pdf_url": record["pdf_url"], "pdf_sha256": record["pdf_sha256"],
+                      "sections": len(sections)}
+            if canonical_key:
+                result["sections_file"] = manual_index.manuals[canonical_key]["sections_file"]
+                if canonical_key != record["pdf_url"]:
+                    result["duplicate"] = True
+                    result["duplicate_of"] = canonical_key
+                    summary["duplicates"] += 1
+                else:
+                    summary["extracted"] += 1
+            else:
+                # Notice hors index (déduplication désactivée, PDF scanné ou illisible)
+                sections_file = _sections_file(record["url"])
+                write_json(sections_file, sections)
+                result["sections_file"] = str(sections_file.as_posix())
+                summary["extracted"] += 1
+            append_record(PIPELINE_EXTRACTED_FILE, result)
+    finally:
+        manual_index.save()
+
+    print(f"\n[SUMMARY] extract : {summary}")
+    return summary
+
+
+def render(bundle_path: Path = STAGING_BUNDLE_FILE, refs: Sequence[str] = None, match: str = None,
+           limit: int = None, append: bool = False, tutorial_store: Path = TUTORIAL_STORE_FILE) -> Dict[str, int]:
+    """
+    Construit les articles des notices extraites dans un bundle (sans appel à Zoho).
+    Les tutoriels stockés sont ajoutés selon la référence produit.
+
+    Args:
+        bundle_path: Bundle de sortie, publié ensuite par l'étape publish
+        refs, match, limit: Filtres (voir select_products)
+        append: Ajouter au bundle existant au lieu de le remplacer
+        tutorial_store: Fichier des tutoriels extraits (étape tutorials)
+
+    Returns:
+        Résumé { "rendered", "skipped" }
+    """
+    fetched = _read_stage_input(PIPELINE_FETCHED_FILE, "fetch")
+    extracted = read_records(PIPELINE_EXTRACTED_FILE)
+    bundle_path = Path(bundle_path)
+    if not append and bundle_path.exists():
+        bundle_path.unlink()
+
+    summary = {"rendered": 0, "skipped": 0}
+    enable_staging(bundle_path)
+    try:
+        for record in select_products(fetched.values(), refs, match, limit):
+            result = extracted.get(record["url"])
+            if not _is_extracted(result, record):
+                # Pas de PDF, ou extraction absente / périmée
+                summary["skipped"] += 1
+                continue
+            create_zoho_article(record["title"], record.get("image") or record.get("img_url"),
+                                read_json(result["sections_file"]), record["pdf_url"],
+                                tutorials=find_product_tutorials(record["title"], tutorial_store))
+            summary["rendered"] += 1
+    finally:
+        close_staging()
+
+    print(f"\n[SUMMARY] render : {summary}")
+    return summary
+
+
+def publish(bundle_path: Path = STAGING_BUNDLE_FILE) -> Dict[str, int]:
+    """
+    Publie les articles d'un bundle sur Zoho Desk.
+
+    Returns:
+        Résultat de la publication { "created", "updated", "skipped", "failed", "pending" }
+    """
+    if not Path(bundle_path).exists():
+        print(f"[ERROR] Bundle {bundle_path} absent : lancer d'abord l'étape 'render'")
+        return {}
+    results = replay_bundle(bundle_path)
+    print(f"\n[SUMMARY] publish : {results}")
+    return results
+
@@ -0,0 +1,234 @@
+"""
+Étapes du traitement des tutoriels : découverte, extraction et publication.
+Utilisées par scrape_tutorials.py et par la sous-commande "tutorials" de la CLI.
+"""
+
+import re
+
+from src.config.settings import (
+    HEADERS,
+    TUTORIAL_BASE_URL,
+    TUTORIAL_FETCH_WORKERS,
+    TUTORIAL_PARSE_WORKERS,
+    get_zoho_tutorial_category_id,
+)
+from src.scraper.tutorial_scraper import (
+    extract_tutorials,
+    get_product_tutorials,
+    get_tutorial_categories,
+)
+from src.scraper.tutorial_formatter import format_tutorials_section
+from src.scraper.tutorial_store import TutorialStore
+from src.utils import http
+from src.utils.text_utils import normalize_product_ref, sanitize_permalink
+from src.zoho.api import render_html_for_report
+from src.zoho.bundle import KIND_TUTORIAL, get_staging_bundle
+from src.zoho.outbox import get_outbox
+from src.zoho.publisher import get_publisher
+
+
+def discover_all_tutorials():
+    """
+    Découvre tous les tutoriels disponibles sur le site Avidsen.
+    Utilise les fonctions du module tutorial_scraper pour éviter la redondance.
+    
+    Returns:
+        Liste de tous les tutoriels trouvés
+    """
+    from bs4 import BeautifulSoup
+
+    print("=" * 60)
+    print("DÉCOUVERTE DE TOUS LES TUTORIELS")
+    print("=" * 60)
+    
+    all_tutorials = {}  # url -> tutoriel (un tutoriel peut concerner plusieurs produits)
+    categories = get_tutorial_categories()
+    
+    print(f"\n[INFO] {len(categories)} catégories à explorer")
+    
+    for category in categories:
+        print(f"\n[CATEGORY] Exploration de '{category}'...")
+        category_url = f"{TUTORIAL_BASE_URL}/{category}"
+        
+        try:
+            # Récupérer la page de catégorie
+            response = http.get(category_url, headers=HEADERS, timeout=20)
+            if response.status_code != 200:
+                print(f"[WARNING] Impossible d'accéder à {category}")
+                continue
+            
+            soup = BeautifulSoup(response.text, 'html.parser')
+            
+            # Trouver tous les liens vers les produits (/ref/)
+            product_links = soup.find_all('a', href=re.compile(r'/tutoriel-sav/' + re.escape(category) + r'/ref/[^/]+$'))
+            
+            print(f"[INFO] {len(product_links)} produit(s) trouvé(s) dans {category}")
+            
+            # Pour chaque produit, extraire la référence et trouver ses tutoriels
+            for product_link in product_links:
+                product_url = product_link.get('href', '')
+                product_name = product_link.get_text(strip=True)
+                
+                # Extraire la référence du produit depuis l'URL
+                ref_match = re.search(r'/ref/([^/]+)$', product_url)
+                if not ref_match:
+                    continue
+                
+                product_ref = ref_match.group(1)
+                
+                try:
+                    product_tutorials = get_product_tutorials(product_ref, [category])
+                    
+                    for tutorial in product_tutorials:
+                        # Dédoublonner par URL en gardant toutes les références produit concernées
+                        tutorial = all_tutorials.setdefault(tutorial['url'], {**tutorial, 'product': product_name})
+                        refs = tutorial.setdefault('product_refs', [])
+                        ref = normalize_product_ref(product_ref)
+                        if ref and ref not in refs:
+                            refs.append(ref)
+                    
+                    if product_tutorials:
+                        print(f"  [OK] {len(product_tutorials)} tutoriel(s) pour {product_name[:50]}...")
+                    
+                except Exception as e:
+                    print(f"  [WARNING] Erreur pour produit {product_ref}: {e}")
+            
+        except Exception as e:
+            print(f"[ERROR] Erreur pour {category}: {e}")
+    
+    print(f"\n[SUMMARY] Total : {len(all_tutorials)} tutoriels uniques découverts")
+    return list(all_tutorials.values())
+
+
+def scrape_all_tutorials_content(tutorial_list, store: TutorialStore = None, resume: bool = True,
+                                 fetch_workers: int = TUTORIAL_FETCH_WORKERS,
+                                 parse_workers: int = TUTORIAL_PARSE_WORKERS):
+    """
+    Extrait le contenu complet de tous les tutoriels, en parallèle.
+    Chaque tutoriel est enregistré dans le store dès son extraction ; avec
+    resume=True, les URL déjà présentes dans le store ne sont pas re-extraites.
+    
+    Args:
+        tutorial_list: Liste des tutoriels à extraire
+        store: Stockage des tutoriels extraits
+        resume: Reprendre les tutoriels déjà stockés au lieu de les extraire à nouveau
+        fetch_workers: Téléchargements simultanés
+        parse_workers: Processus de nettoyage HTML (0 : nettoyage dans les threads de téléchargement)
+        
+    Returns:
+        Liste des tutoriels avec leur contenu complet, dans l'ordre de tutorial_list
+    """
+    from tqdm import tqdm
+
+    print("\n" + "=" * 60)
+    print("EXTRACTION DU CONTENU DES TUTORIELS")
+    print("=" * 60)
+    
+    if store is None:  # Un store vide est faux (len 0) : ne pas le remplacer par celui par défaut
+        store = TutorialStore()
+    results = [None] * len(tutorial_list)
+    total = len(tutorial_list)
+    
+    # Une seule lecture du store pour tous les tutoriels déjà extraits
+    stored = {}
+    if resume:
+        wanted = {tutorial_info['url'] for tutorial_info in tutorial_list if tutorial_info['url'] in store}
+        stored = {tutorial['url']: tutorial for tutorial in store if tutorial['url'] in wanted}
+    resumed = len(stored)
+    
+    to_extract = []
+    for i, tutorial_info in enumerate(tutorial_list):
+        product_refs = tutorial_info.get('product_refs', [])
+        if tutorial_info['url'] in stored:
+            tutorial_content = stored[tutorial_info['url']]
+            if product_refs and tutorial_content.get('product_refs') != product_refs:
+                # Nouvelles références produit : la version à jour remplace l'ancienne dans le store
+                tutorial_content['product_refs'] = product_refs
+                store.append(tutorial_content)
+            results[i] = tutorial_content
+        else:
+            to_extract.append(i)
+    
+    failures = 0
+    with tqdm(total=len(to_extract), desc="Extraction", unit="tuto") as progress:
+        urls = [tutorial_list[i]['url'] for i in to_extract]
+        for index, tutorial_content, message in extract_tutorials(urls, fetch_workers, parse_workers):
+            if message:
+                progress.write(message)
+            tutorial_info = tutorial_list[to_extract[index]]
+            if tutorial_content:
+                # Ajouter la catégorie et les produits concernés
+                tutorial_content['category'] = tutorial_info.get('category')
+                tutorial_content['product_refs'] = tutorial_info.get('product_refs', [])
+                store.append(tutorial_content)
+                results[to_extract[index]] = tutorial_content
+            else:
+                failures += 1
+            progress.update(1)
+    
+    store.close()
+    full_tutorials = [tutorial for tutorial in results if tutorial]
+    if resumed:
+        print(f"\n[INFO] {resumed} tutoriel(s) repris depuis {store.path}")
+    if failures:
+        print(f"[WARNING] {failures} tutoriel(s) en échec")
+    print(f"\n[SUMMARY] {len(full_tutorials)}/{total} tutoriels extraits avec succès")
+    return full_tutorials
+
+
+def create_zoho_tutorial_articles(tutorials):
+    """
+    Crée des articles Zoho pour chaque tutoriel dans la catégorie Tutoriels.
+    En mode staging, les articles sont écrits dans le bundle (catégorie choisie au rejeu).
+    
+    Args:
+        tutorials: Liste des tutoriels à publier
+    """
+    print("\n" + "=" * 60)
+    print("CRÉATION DES ARTICLES ZOHO")
+    print("=" * 60)
+    
+    bundle = get_staging_bundle()
+    if bundle is None:
+        outbox = get_outbox()
+        tutorial_category_id = get_zoho_tutorial_category_id()
+        print(f"\n[INFO] Catégorie cible : {tutorial_category_id}")
+    
+    total = len(tutorials)
+    
+    for i, tutorial in enumerate(tutorials, 1):
+        title = tutorial.get('title', 'Tutoriel')
+        print(f"\n[{i}/{total}] Création article : {title[:60]}...")
+        
+        # Formater le tutoriel en HTML
+        html = format_tutorials_section([tutorial])
+        html = "\n".join(render_html_for_report([html], title))
+        
+        if bundle is not None:
+            bundle.add(KIND_TUTORIAL, {
+                "title": title,
+                "permalink": sanitize_permalink(title),
+                "status": "Published"
+            }, [html], label=title)
+            continue
+        
+        # Préparer le payload Zoho avec la catégorie Tutoriels
+        zoho_body = {
+            "title": title,
+            "permalink": sanitize_permalink(title),
+            "answer": html,
+            "categoryId": tutorial_category_id,  # Catégorie Tutoriels
+            "status": "Published"
+        }
+        
+        outbox.enqueue(zoho_body, label=title)
+    
+    if bundle is not None:
+        print(f"\n[SUMMARY] {total} articles écrits dans le bundle {bundle.path}")
+        return
+    
+    # Publier le contenu de l'outbox (les échecs transitoires sont replanifiés)
+    results = get_publisher().wait()
+    
+    print(f"\n[SUMMARY] {total} articles envoyés dans l'outbox, résultat de la publication : {results}")
+    print(f"[INFO] Articles créés dans la catégorie : {tutorial_category_id}")
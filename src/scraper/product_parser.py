@@ -4,16 +4,162 @@ Gère le téléchargement et le traitement des informations produit.
 """
 
 import os
-import requests
-from bs4 import BeautifulSoup
+from pathlib import Path
 
-from src.config.settings import HEADERS, OUTPUT_FOLDER
-from src.utils.file_utils import download_file
-from src.pdf.pdf_parser import extract_pdf_structure_keep_tables
+from src.config.settings import (
+    HEADERS,
+    OUTPUT_FOLDER,
+    DEDUP_ENABLED,
+    PDF_DOWNLOAD_IN_MEMORY,
+    PDF_CACHE_ENABLED,
+    ATTACH_TUTORIALS_TO_PRODUCTS,
+    TUTORIAL_STORE_FILE,
+)
+from src.utils import http
+from src.utils.file_utils import download_file, download_file_sha256, download_to_buffer
+from src.utils.text_utils import clean_title, extract_product_ref, sanitize_permalink
+from src.utils.profiling import profiled
+from src.utils.run_report import record
+from src.pdf.pdf_parser import extract_pdf_structure_keep_tables, extract_pdf_images_only, extract_pdf_text
+from src.pdf.prescreen import prescreen_pdf, ROUTE_FULL, ROUTE_IMAGES_ONLY
+from src.pdf.dedup import get_manual_index
+from src.scraper.tutorial_store import get_tutorials_for_product
 from src.zoho.api import create_zoho_article
 
 
-def scrape_product_page(product_url: str, title_text: str, img_url: str):
+def extract_sections(pdf_source, pdf_url: str, title_text: str, pdf_sha256: str = None, force: bool = False):
+    """
+    Pré-contrôle, détection des doublons et extraction du contenu d'une notice.
+
+    Args:
+        pdf_source: Chemin du PDF téléchargé ou son contenu en mémoire (None si absent)
+        pdf_url: URL du PDF original
+        title_text: Titre du produit
+        pdf_sha256: Empreinte du PDF si elle a été calculée au téléchargement
+        force: Extraire à nouveau une notice déjà présente dans l'index des notices
+
+    Returns:
+        Tuple (sections, clé de la notice canonique) ; la clé désigne l'entrée de l'index
+        des notices dont le fichier de sections contient le résultat (pdf_url lui-même pour
+        une notice canonique, une autre notice pour un doublon), ou None hors index
+    """
+    if pdf_source is None:
+        return [], None
+
+    # same PDF (URL and content) already processed, e.g. shared by several products
+    if DEDUP_ENABLED and not force:
+        manual_index = get_manual_index()
+        canonical_key = manual_index.find_extracted(pdf_url, pdf_sha256)
+        if canonical_key:
+            return manual_index.load_sections(canonical_key), canonical_key
+
+    # cheap pre-screen: scanned PDFs skip text parsing, broken ones are not parsed at all
+    screen = prescreen_pdf(pdf_source)
+    record("prescreen", {"product": title_text, "pdf_url": pdf_url, "sha256": pdf_sha256, **screen})
+    route = screen["route"]
+    if route != ROUTE_FULL:
+        print(f"PDF pre-screen: {route} ({screen['reason']})")
+
+    # near-duplicate manuals reuse the extraction of their canonical manual (the product keeps its own article)
+    signature = None
+    if DEDUP_ENABLED and route == ROUTE_FULL:
+        manual_index = get_manual_index()
+        signature = manual_index.signature(extract_pdf_text(pdf_source))
+        if signature:
+            # an unchanged manual was returned above: if it is indexed here, it is being re-extracted
+            # (--force or new PDF content) and must not match its own previous entry
+            exclude_key = pdf_url if force or pdf_url in manual_index.manuals else None
+            match = manual_index.find_duplicate(signature, exclude_key=exclude_key)
+            sections = manual_index.load_sections(match[0]) if match else None
+            if sections is not None:
+                canonical_key, similarity = match
+                manual_index.add_duplicate(pdf_url, signature, clean_title(title_text), canonical_key, similarity,
+                                           pdf_sha256)
+                canonical = manual_index.manuals[canonical_key]
+                print(f"Near-duplicate manual ({similarity:.2f}) of '{canonical['title']}', reusing its sections")
+                return sections, canonical_key
+
+    # extract pdf structure (text + tables + images)
+    sections = []
+    if route == ROUTE_FULL:
+        sections = extract_pdf_structure_keep_tables(pdf_source)
+    elif route == ROUTE_IMAGES_ONLY:
+        sections = extract_pdf_images_only(pdf_source)
+
+    if signature:
+        title = clean_title(title_text)
+        get_manual_index().add_manual(pdf_url, signature, title, sections, sanitize_permalink(title), pdf_sha256)
+        return sections, pdf_url
+    return sections, None
+
+
+def fetch_pdf_url(product_url: str):
+    """
+    Cherche le lien de la notice PDF sur une page produit.
+
+    Args:
+        product_url: URL de la page produit
+
+    Returns:
+        URL du PDF, ou None si la page n'en propose pas
+
+    Raises:
+        requests.RequestException: si la page ne peut pas être téléchargée
+    """
+    from bs4 import BeautifulSoup
+
+    r = http.get(product_url, headers=HEADERS, timeout=20)
+    r.raise_for_status()
+    soup = BeautifulSoup(r.text, "html.parser")
+    pdf_tag = soup.find("a", id="cta-pdf-technical-sheet")
+    if pdf_tag and pdf_tag.get("href"):
+        return pdf_tag["href"]
+    return None
+
+
+def download_main_image(img_url: str) -> str:
+    """
+    Télécharge l'image principale du produit dans OUTPUT_FOLDER (une seule fois).
+
+    Returns:
+        Chemin local de l'image, l'URL d'origine si le téléchargement échoue, "" sans image
+    """
+    if not img_url:
+        return ""
+    try:
+        img_name = os.path.basename(img_url.split("?")[0])
+        local_img_path = OUTPUT_FOLDER / img_name
+        if not local_img_path.exists():
+            download_file(img_url, local_img_path)
+        return str(local_img_path.as_posix())
+    except Exception as e:
+        print(f"Failed to download image {img_url}: {e}")
+        return img_url  # fallback to URL
+
+
+def find_product_tutorials(title_text: str, tutorial_store: Path = TUTORIAL_STORE_FILE):
+    """
+    Tutoriels déjà extraits pour la référence du produit (aucune requête réseau).
+
+    Args:
+        title_text: Titre du produit
+        tutorial_store: Fichier des tutoriels extraits
+
+    Returns:
+        Liste de tutoriels, ou None si aucun (ou si ATTACH_TUTORIALS_TO_PRODUCTS est désactivé)
+    """
+    if not ATTACH_TUTORIALS_TO_PRODUCTS:
+        return None
+    product_ref = extract_product_ref(title_text)
+    tutorials = get_tutorials_for_product(product_ref, tutorial_store) if product_ref else None
+    if tutorials:
+        print(f"{len(tutorials)} tutorial(s) attached for ref {product_ref}")
+    return tutorials or None
+
+
+@profiled("product", label_arg=1, label_kwarg="title_text")
+def scrape_product_page(product_url: str, title_text: str, img_url: str,
+                        tutorial_store: Path = TUTORIAL_STORE_FILE):
     """
     Télécharge le PDF et l'image du produit, extrait le contenu et publie sur Zoho.
     
@@ -21,47 +167,44 @@ def scrape_product_page(product_url: str, title_text: str, img_url: str):
         product_url: URL de la page produit
         title_text: Titre du produit
         img_url: URL de l'image du produit
+        tutorial_store: Fichier des tutoriels extraits, ajoutés à l'article
     """
     try:
-        r = requests.get(product_url, headers=HEADERS, timeout=20)
-        r.raise_for_status()
+        pdf_url = fetch_pdf_url(product_url)
     except Exception as e:
         print(f"Error fetching product page {product_url}: {e}")
         return
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    # find PDF link
-    pdf_tag = soup.find("a", id="cta-pdf-technical-sheet")
-    pdf_url = None
-    pdf_filename = None
-    if pdf_tag and pdf_tag.get("href"):
-        pdf_url = pdf_tag["href"]
+    pdf_source = None
+    pdf_buffer = None
+    pdf_sha256 = None
+    if pdf_url:
         pdf_filename = OUTPUT_FOLDER / os.path.basename(pdf_url)
         try:
-            download_file(pdf_url, pdf_filename)
+            if PDF_DOWNLOAD_IN_MEMORY:
+                # parse straight from memory; the disk copy is only a cache
+                pdf_buffer = download_to_buffer(pdf_url)
+                pdf_source = pdf_buffer.data
+                pdf_sha256 = pdf_buffer.sha256
+                if PDF_CACHE_ENABLED:
+                    pdf_buffer.save(pdf_filename)
+            else:
+                pdf_sha256 = download_file_sha256(pdf_url, pdf_filename)
+                pdf_source = pdf_filename
         except Exception as e:
             print(f"Failed to download PDF {pdf_url}: {e}")
-            pdf_filename = None
 
     # download main image into notice/
-    main_image_local = ""
-    if img_url:
-        try:
-            img_name = os.path.basename(img_url.split("?")[0])
-            local_img_path = OUTPUT_FOLDER / img_name
-            if not local_img_path.exists():
-                download_file(img_url, local_img_path)
-            main_image_local = str(local_img_path.as_posix())
-        except Exception as e:
-            print(f"Failed to download image {img_url}: {e}")
-            main_image_local = img_url  # fallback to URL
+    main_image_local = download_main_image(img_url)
 
-    # extract pdf structure (text + tables), ignoring images
-    sections = []
-    if pdf_filename and pdf_filename.exists():
-        sections = extract_pdf_structure_keep_tables(pdf_filename)
-    else:
-        sections = []
+    try:
+        sections, _ = extract_sections(pdf_source, pdf_url, title_text, pdf_sha256)
+    finally:
+        if pdf_buffer is not None:
+            pdf_buffer.close()
+
+    # tutorials come from the local tutorial store (no extra request during the crawl)
+    tutorials = find_product_tutorials(title_text, tutorial_store)
 
     # publish to Zoho (we pass local image path or remote URL)
-    create_zoho_article(title_text, main_image_local or img_url, sections, pdf_url)
+    create_zoho_article(title_text, main_image_local or img_url, sections, pdf_url, tutorials=tutorials)
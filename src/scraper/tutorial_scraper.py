@@ -3,16 +3,25 @@ Module de scraping des tutoriels Avidsen.
 Extrait les tutoriels et les lie aux produits.
 """
 
-import requests
-from bs4 import BeautifulSoup
+import multiprocessing
 import re
-from typing import List, Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List, Dict, Iterator, Optional, Sequence, Tuple
+from urllib.parse import urljoin
 
-from src.config.settings import HEADERS
+from src.config.settings import (
+    HEADERS,
+    TUTORIAL_BASE_URL,
+    TUTORIAL_FETCH_WORKERS,
+    TUTORIAL_MAIN_CONTENT_ONLY,
+    TUTORIAL_PARSE_WORKERS,
+)
+from src.utils import http
+from src.utils.html_utils import collapse_whitespace, find_main_content, minify_html
+from src.utils.run_report import increment, record
 
 
-# URL de base pour les tutoriels
-TUTORIAL_BASE_URL = "https://www.avidsen.com/fr/assistance/tutoriel-sav"
+# Page principale des tutoriels (TUTORIAL_BASE_URL : AVIDSEN_TUTORIAL_BASE_URL ou AVIDSEN_SITE_BASE_URL)
 TUTORIAL_CATEGORIES_URL = f"{TUTORIAL_BASE_URL}"
 
 
@@ -23,8 +32,10 @@ def get_tutorial_categories() -> List[str]:
     Returns:
         Liste des catégories (ex: ['motorisation', 'visiophone', 'solaire'])
     """
+    from bs4 import BeautifulSoup
+
     try:
-        response = requests.get(TUTORIAL_CATEGORIES_URL, headers=HEADERS, timeout=20)
+        response = http.get(TUTORIAL_CATEGORIES_URL, headers=HEADERS, timeout=20)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -62,6 +73,8 @@ def get_product_tutorials(product_ref: str, categories: List[str] = None) -> Lis
     Returns:
         Liste de dictionnaires contenant les informations des tutoriels
     """
+    from bs4 import BeautifulSoup
+
     if categories is None:
         categories = get_tutorial_categories()
     
@@ -72,7 +85,7 @@ def get_product_tutorials(product_ref: str, categories: List[str] = None) -> Lis
         url = f"{TUTORIAL_BASE_URL}/{category}/ref/{product_ref}"
         
         try:
-            response = requests.get(url, headers=HEADERS, timeout=20)
+            response = http.get(url, headers=HEADERS, timeout=20)
             
             # Si la page existe (status 200)
             if response.status_code == 200:
@@ -85,7 +98,7 @@ def get_product_tutorials(product_ref: str, categories: List[str] = None) -> Lis
                 for link in tutorial_links:
                     tutorial_url = link.get('href', '')
                     if tutorial_url.startswith('/'):
-                        tutorial_url = f"https://www.avidsen.com{tutorial_url}"
+                        tutorial_url = urljoin(url, tutorial_url)
                     
                     tutorial_title = link.get_text(strip=True)
                     
@@ -107,10 +120,169 @@ def get_product_tutorials(product_ref: str, categories: List[str] = None) -> Lis
     return tutorials
 
 
+def fetch_tutorial_page(tutorial_url: str) -> str:
+    """
+    Télécharge la page d'un tutoriel.
+    
+    Args:
+        tutorial_url: URL du tutoriel
+        
+    Returns:
+        HTML de la page
+    """
+    response = http.get(tutorial_url, headers=HEADERS, timeout=20)
+    response.raise_for_status()
+    return response.text
+
+
+def clean_tutorial_page(tutorial_url: str, page_html: str) -> Tuple[Dict, Dict]:
+    """
+    Extrait le contenu d'une page tutoriel déjà téléchargée.
+    Le body est nettoyé de la navigation et stylé, puis réduit à la zone de
+    contenu principale (densité de texte / de liens) et minifié.
+    
+    Sans réseau ni état partagé : peut tourner dans un processus séparé.
+    
+    Args:
+        tutorial_url: URL du tutoriel (pour rendre les liens absolus et l'identifier)
+        page_html: HTML de la page
+        
+    Returns:
+        (tutoriel, statistiques { "bytes_before", "bytes_after", "main_content" })
+    
+    Raises:
+        ValueError: si la page n'a pas de body
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page_html, 'html.parser')
+
+    # 1. Titre
+    title_elem = soup.find('h1')
+    title = title_elem.get_text(strip=True) if title_elem else "Tutoriel"
+
+    # 2. APPROCHE SIMPLE: Prendre le body entier
+    body = soup.find('body')
+    if not body:
+        raise ValueError("pas de body dans la page")
+
+    # 3. Supprimer SEULEMENT les éléments de navigation évidents
+    # (garder tout le contenu)
+    for tag in body.find_all(['nav', 'header', 'footer']):
+        tag.decompose()
+
+    for tag in body.find_all('script'):
+        tag.decompose()
+
+    for tag in body.find_all('style'):
+        tag.decompose()
+
+    # Supprimer les divs de menu/navigation par classe
+    for tag in body.find_all('div', class_=re.compile(r'menu|navigation|nav-', re.I)):
+        tag.decompose()
+
+    # Supprimer les iframes/embeds qui pourraient poser problème (optionnel, mais souvent mieux pour KB)
+    # On garde les iframes Youtube si besoin, mais ici on veut surtout nettoyer
+    # for tag in body.find_all('iframe'):
+    #     tag.decompose() 
+
+    # 4. FIX TOUTES LES IMAGES (Critique pour lazy loading)
+    for img in body.find_all('img'):
+        # Chercher l'URL réelle (lazy loading)
+        # Priorité: data-lazy-src > data-src > data-original > src
+        real_url = (img.get('data-lazy-src') or 
+                   img.get('data-src') or 
+                   img.get('data-original') or 
+                   img.get('src'))
+
+        if real_url:
+            # Rendre absolu
+            if real_url.startswith('/'):
+                real_url = urljoin(tutorial_url, real_url)
+            img['src'] = real_url
+
+        # Supprimer attributs lazy loading qui peuvent confliter
+        for attr in ['data-lazy-src', 'data-src', 'data-original', 'srcset', 'data-srcset', 'loading', 'sizes', 'data-lazy-srcset']:
+            if img.get(attr):
+                del img[attr]
+
+        # Style inline minimal pour responsive sans casser le layout original
+        # On n'écrase plus le style existant, on ajoute juste max-width
+        current_style = img.get('style', '')
+        new_style = 'max-width: 100%; height: auto;'
+
+        if current_style:
+            img['style'] = f"{current_style}; {new_style}"
+        else:
+            img['style'] = new_style
+
+    # 5. Fix liens
+    for link in body.find_all('a'):
+        href = link.get('href')
+        if href and href.startswith('/'):
+            link['href'] = urljoin(tutorial_url, href)
+        link['style'] = 'color: #2E86C1;'
+
+    # 6. Styles pour headings
+    for h3 in body.find_all('h3'):
+        h3['style'] = 'color: #2E86C1; font-size: 1.25em; margin: 1.5em 0 0.5em 0; font-weight: 600;'
+
+    for h2 in body.find_all('h2'):
+        h2['style'] = 'color: #2E86C1; font-size: 1.5em; margin: 1.5em 0 0.5em 0; font-weight: 600;'
+
+    # 7. Paragraphes
+    for p in body.find_all('p'):
+        p['style'] = 'margin: 1em 0; line-height: 1.6;'
+
+    # Taille de référence : le body complet nettoyé et stylé, tel qu'il était publié
+    # auparavant (mesuré après les styles inline pour être comparable à bytes_after)
+    bytes_before = len(str(body).encode('utf-8'))
+
+    # Ne garder que la zone de contenu (sans newsletter, carrousels, bannières...)
+    main_content = None
+    if TUTORIAL_MAIN_CONTENT_ONLY:
+        main_content = find_main_content(body)
+        if main_content is not None:
+            body = main_content
+
+    # 8. Minifier et extraire HTML
+    minify_html(body)
+    html_content = collapse_whitespace(str(body))
+    bytes_after = len(html_content.encode('utf-8'))
+    
+    tutorial_data = {
+        'url': tutorial_url,
+        'title': title,
+        'html_content': html_content,
+        'steps': []  # Compatibilité
+    }
+    stats = {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "main_content": main_content is not None or not TUTORIAL_MAIN_CONTENT_ONLY,
+    }
+    return tutorial_data, stats
+
+
+def _record_tutorial_stats(tutorial_url: str, stats: Dict) -> Optional[str]:
+    """
+    Consigne les tailles HTML d'un tutoriel dans le rapport d'exécution.
+    
+    Returns:
+        Avertissement à afficher, ou None
+    """
+    increment("tutorial_html_bytes_before", stats["bytes_before"])
+    increment("tutorial_html_bytes_after", stats["bytes_after"])
+    record("tutorial_html", {"url": tutorial_url, "bytes_before": stats["bytes_before"],
+                             "bytes_after": stats["bytes_after"]})
+    if not stats["main_content"]:
+        return f"[WARNING] Zone de contenu non détectée, body complet conservé : {tutorial_url}"
+    return None
+
+
 def scrape_tutorial_content(tutorial_url: str) -> Optional[Dict]:
     """
-    Extrait le contenu d'un tutoriel Avidsen.
-    Approche ultra-simple: prendre tout le body, nettoyer navigation.
+    Extrait le contenu d'un tutoriel Avidsen (téléchargement puis nettoyage).
     
     Args:
         tutorial_url: URL du tutoriel
@@ -119,103 +291,76 @@ def scrape_tutorial_content(tutorial_url: str) -> Optional[Dict]:
         Dictionnaire contenant le contenu du tutoriel
     """
     try:
-        response = requests.get(tutorial_url, headers=HEADERS, timeout=20)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # 1. Titre
-        title_elem = soup.find('h1')
-        title = title_elem.get_text(strip=True) if title_elem else "Tutoriel"
-        
-        # 2. APPROCHE SIMPLE: Prendre le body entier
-        body = soup.find('body')
-        if not body:
-            print(f"[ERROR] Pas de body trouvé pour {tutorial_url}")
-            return None
-        
-        # 3. Supprimer SEULEMENT les éléments de navigation évidents
-        # (garder tout le contenu)
-        for tag in body.find_all(['nav', 'header', 'footer']):
-            tag.decompose()
-        
-        for tag in body.find_all('script'):
-            tag.decompose()
-        
-        for tag in body.find_all('style'):
-            tag.decompose()
-        
-        # Supprimer les divs de menu/navigation par classe
-        for tag in body.find_all('div', class_=re.compile(r'menu|navigation|nav-', re.I)):
-            tag.decompose()
-            
-        # Supprimer les iframes/embeds qui pourraient poser problème (optionnel, mais souvent mieux pour KB)
-        # On garde les iframes Youtube si besoin, mais ici on veut surtout nettoyer
-        # for tag in body.find_all('iframe'):
-        #     tag.decompose() 
-        
-        # 4. FIX TOUTES LES IMAGES (Critique pour lazy loading)
-        for img in body.find_all('img'):
-            # Chercher l'URL réelle (lazy loading)
-            # Priorité: data-lazy-src > data-src > data-original > src
-            real_url = (img.get('data-lazy-src') or 
-                       img.get('data-src') or 
-                       img.get('data-original') or 
-                       img.get('src'))
-            
-            if real_url:
-                # Rendre absolu
-                if real_url.startswith('/'):
-                    real_url = f"https://www.avidsen.com{real_url}"
-                img['src'] = real_url
-            
-            # Supprimer attributs lazy loading qui peuvent confliter
-            for attr in ['data-lazy-src', 'data-src', 'data-original', 'srcset', 'data-srcset', 'loading', 'sizes', 'data-lazy-srcset']:
-                if img.get(attr):
-                    del img[attr]
-            
-            # Style inline minimal pour responsive sans casser le layout original
-            # On n'écrase plus le style existant, on ajoute juste max-width
-            current_style = img.get('style', '')
-            new_style = 'max-width: 100%; height: auto;'
-            
-            if current_style:
-                img['style'] = f"{current_style}; {new_style}"
-            else:
-                img['style'] = new_style
-        
-        # 5. Fix liens
-        for link in body.find_all('a'):
-            href = link.get('href')
-            if href and href.startswith('/'):
-                link['href'] = f"https://www.avidsen.com{href}"
-            link['style'] = 'color: #2E86C1;'
-        
-        # 6. Styles pour headings
-        for h3 in body.find_all('h3'):
-            h3['style'] = 'color: #2E86C1; font-size: 1.25em; margin: 1.5em 0 0.5em 0; font-weight: 600;'
-        
-        for h2 in body.find_all('h2'):
-            h2['style'] = 'color: #2E86C1; font-size: 1.5em; margin: 1.5em 0 0.5em 0; font-weight: 600;'
-        
-        # 7. Paragraphes
-        for p in body.find_all('p'):
-            p['style'] = 'margin: 1em 0; line-height: 1.6;'
-        
-        # 8. Extraire HTML
-        html_content = str(body)
-        
-        tutorial_data = {
-            'url': tutorial_url,
-            'title': title,
-            'html_content': html_content,
-            'steps': []  # Compatibilité
-        }
-        
-        print(f"[OK] Tutoriel extrait : {title} (Version Body Clean)")
-        return tutorial_data
-        
+        tutorial_data, stats = clean_tutorial_page(tutorial_url, fetch_tutorial_page(tutorial_url))
     except Exception as e:
         print(f"[ERROR] Erreur extraction {tutorial_url}: {e}")
         return None
+    
+    warning = _record_tutorial_stats(tutorial_url, stats)
+    if warning:
+        print(warning)
+    print(f"[OK] Tutoriel extrait : {tutorial_data['title']} ({stats['bytes_before']} -> {stats['bytes_after']} octets)")
+    return tutorial_data
+
+
+def _fetch_and_clean(tutorial_url: str) -> Tuple[Dict, Dict]:
+    """Téléchargement et nettoyage dans le même thread (sans pool de processus)."""
+    return clean_tutorial_page(tutorial_url, fetch_tutorial_page(tutorial_url))
 
+
+def extract_tutorials(tutorial_urls: Sequence[str], fetch_workers: int = TUTORIAL_FETCH_WORKERS,
+                      parse_workers: int = TUTORIAL_PARSE_WORKERS) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Extrait des tutoriels en parallèle : les pages sont téléchargées par un pool
+    de threads et nettoyées (BeautifulSoup) par un pool de processus.
+    
+    Le nombre de tâches en cours est borné : les pages téléchargées n'attendent
+    pas en mémoire plus vite qu'elles ne sont nettoyées.
+    
+    Args:
+        tutorial_urls: URL des tutoriels
+        fetch_workers: Téléchargements simultanés
+        parse_workers: Processus de nettoyage (0 : nettoyage dans les threads de téléchargement)
+        
+    Yields:
+        (indice dans tutorial_urls, tutoriel ou None en cas d'échec, message à afficher ou None),
+        dans l'ordre de fin d'extraction
+    """
+    fetch_workers = max(fetch_workers, 1)
+    fetchers = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="tutorial-fetch")
+    # "spawn" : pas de fork d'un processus qui a déjà des threads de téléchargement actifs
+    parsers = (ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn"))
+               if parse_workers > 0 else None)
+    max_in_flight = fetch_workers + 2 * max(parse_workers, 1)
+    
+    pending = {}  # future -> (indice, url, étape)
+    remaining = iter(enumerate(tutorial_urls))
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                item = next(remaining, None)
+                if item is None:
+                    break
+                index, url = item
+                task = fetch_tutorial_page if parsers else _fetch_and_clean
+                pending[fetchers.submit(task, url)] = (index, url, "fetch")
+            if not pending:
+                return
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, url, stage = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield index, None, f"[ERROR] Erreur extraction {url}: {e}"
+                    continue
+                if parsers and stage == "fetch":
+                    pending[parsers.submit(clean_tutorial_page, url, result)] = (index, url, "clean")
+                    continue
+                tutorial_data, stats = result
+                yield index, tutorial_data, _record_tutorial_stats(url, stats)
+    finally:
+        fetchers.shutdown(wait=True, cancel_futures=True)
+        if parsers:
+            parsers.shutdown(wait=True, cancel_futures=True)
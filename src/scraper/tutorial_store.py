@@ -0,0 +1,225 @@
+"""
+Stockage des tutoriels extraits dans un fichier JSONL en ajout seul.
+
+Chaque tutoriel est écrit dès qu'il est extrait (une ligne JSON), le fichier
+pouvant être compressé en gzip (extension .gz). Un index URL -> position est
+reconstruit à l'ouverture : une extraction interrompue reprend là où elle
+s'était arrêtée, et les tutoriels se relisent un à un sans tout charger.
+
+Le crawl des produits y retrouve les tutoriels de chaque produit par sa
+référence (get_tutorials_for_product), sans aucune requête réseau.
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.config.settings import TUTORIAL_STORE_FILE
+from src.utils.text_utils import normalize_product_ref
+
+
+class TutorialStore:
+    """
+    Fichier JSONL des tutoriels extraits, indexé par URL.
+
+    Pour un fichier non compressé, l'index contient la position en octets de
+    chaque ligne ; pour un fichier gzip, son numéro de ligne.
+    """
+
+    def __init__(self, path: Path = TUTORIAL_STORE_FILE):
+        self.path = Path(path)
+        self.compressed = self.path.suffix == ".gz"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._index: Dict[str, int] = {}
+        self._lines = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._load_index()
+
+    def _open_read(self):
+        if self.compressed:
+            return gzip.open(self.path, "rb")
+        return open(self.path, "rb")
+
+    def _load_index(self):
+        """Parcourt le fichier pour indexer les URL ; une fin de fichier corrompue (arrêt brutal) est réparée."""
+        if not self.path.exists():
+            return
+        valid_end = 0
+        corrupted = False
+        try:
+            with self._open_read() as f:
+                position = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        corrupted = True
+                        break
+                    try:
+                        url = json.loads(line).get("url")
+                    except ValueError:
+                        corrupted = True
+                        break
+                    if url:
+                        self._index[url] = self._lines if self.compressed else position
+                    self._lines += 1
+                    position += len(line)
+                    valid_end = position
+        except (EOFError, OSError, zlib.error):
+            corrupted = True
+
+        if corrupted:
+            print(f"[WARNING] Fin du fichier {self.path} incomplète, {len(self._index)} tutoriel(s) conservé(s)")
+            self._truncate(valid_end)
+
+    def _truncate(self, valid_end: int):
+        """Ne garde que les lignes complètes du fichier."""
+        if not self.compressed:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+            return
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with self._open_read() as src, gzip.open(tmp_path, "wb") as dst:
+            remaining = valid_end
+            while remaining:
+                chunk = src.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def urls(self) -> Iterable[str]:
+        """URL des tutoriels déjà stockés."""
+        return self._index.keys()
+
+    def append(self, tutorial: Dict):
+        """
+        Ajoute un tutoriel et le rend durable immédiatement.
+
+        Args:
+            tutorial: Tutoriel extrait (doit contenir "url")
+        """
+        line = (json.dumps(tutorial, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                self._file = gzip.open(self.path, "ab") if self.compressed else open(self.path, "ab")
+            position = self._file.tell() if not self.compressed else self._lines
+            self._file.write(line)
+            self._file.flush()
+            self._index[tutorial["url"]] = position
+            self._lines += 1
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Relit un tutoriel à partir de son URL."""
+        position = self._index.get(url)
+        if position is None:
+            return None
+        self._flush()
+        with self._open_read() as f:
+            if not self.compressed:
+                f.seek(position)
+                return json.loads(f.readline())
+            for number, line in enumerate(f):
+                if number == position:
+                    return json.loads(line)
+        return None
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Parcourt les tutoriels stockés (la dernière version de chaque URL), un à un."""
+        if not self.path.exists():
+            return
+        self._flush()
+        with self._open_read() as f:
+            position = 0
+            for number, line in enumerate(f):
+                tutorial = json.loads(line)
+                if self._index.get(tutorial.get("url")) == (number if self.compressed else position):
+                    yield tutorial
+                position += len(line)
+
+    def _flush(self):
+        with self._lock:
+            if self._file is not None:
+                # Ferme le membre gzip en cours pour qu'il soit relisible
+                self._file.close()
+                self._file = None
+
+    def close(self):
+        self._flush()
+
+
+_store = None
+
+
+def get_tutorial_store() -> TutorialStore:
+    """Retourne le stockage des tutoriels partagé par le processus."""
+    global _store
+    if _store is None:
+        _store = TutorialStore()
+    return _store
+
+
+def build_product_index(store: TutorialStore) -> Dict[str, List[Dict]]:
+    """
+    Indexe les tutoriels stockés par référence produit (champ "product_refs"), en une seule lecture.
+
+    Args:
+        store: Stockage des tutoriels extraits
+
+    Returns:
+        Dictionnaire { référence normalisée: [tutoriels] }, dans l'ordre du store
+    """
+    index: Dict[str, List[Dict]] = {}
+    for tutorial in store:
+        for ref in tutorial.get("product_refs") or []:
+            index.setdefault(normalize_product_ref(ref), []).append(tutorial)
+    return index
+
+
+_product_indexes: Dict[Path, Dict[str, List[Dict]]] = {}
+_product_index_lock = threading.Lock()
+
+
+def get_tutorials_for_product(product_ref: str, store_path: Path = TUTORIAL_STORE_FILE) -> List[Dict]:
+    """
+    Tutoriels déjà extraits associés à une référence produit.
+
+    L'index est construit au premier appel à partir du store (scrape_tutorials.py
+    doit avoir été lancé auparavant) ; sans store, aucun tutoriel n'est associé.
+
+    Args:
+        product_ref: Référence du produit (ex: '127100')
+        store_path: Fichier des tutoriels extraits (option --store de l'extraction)
+
+    Returns:
+        Liste des tutoriels (vide si aucun)
+    """
+    store_path = Path(store_path)
+    with _product_index_lock:
+        product_index = _product_indexes.get(store_path)
+        if product_index is None:
+            if not store_path.exists():
+                print(f"[INFO] Aucun tutoriel stocké ({store_path}), articles produits sans tutoriels")
+                product_index = {}
+            elif store_path == Path(TUTORIAL_STORE_FILE):
+                product_index = build_product_index(get_tutorial_store())
+            else:
+                store = TutorialStore(store_path)
+                try:
+                    product_index = build_product_index(store)
+                finally:
+                    store.close()
+            if product_index:
+                print(f"[INFO] Tutoriels indexés pour {len(product_index)} référence(s) produit ({store_path})")
+            _product_indexes[store_path] = product_index
+    return product_index.get(normalize_product_ref(product_ref), [])
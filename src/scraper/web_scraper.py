@@ -3,24 +3,36 @@ Module de scraping du site web Avidsen.
 Gère la pagination et la récupération des URLs produits.
 """
 
-import requests
-from bs4 import BeautifulSoup
+from pathlib import Path
 
-from src.config.settings import BASE_URL_TEMPLATE, HEADERS
+from src.config.settings import BASE_URL_TEMPLATE, HEADERS, DEDUP_ENABLED, TUTORIAL_STORE_FILE
 from src.scraper.product_parser import scrape_product_page
+from src.pdf.dedup import get_manual_index
+from src.utils import http
+from src.utils.run_report import set_value, save_run_report
+from src.zoho.bundle import get_staging_bundle
+from src.zoho.publisher import get_publisher
 
 
-def scrape_all_pages():
+def iter_listing_products(max_pages: int = None):
     """
-    Scrape toutes les pages de produits du site Avidsen.
-    Parcourt les pages de manière séquentielle jusqu'à ce qu'il n'y ait plus de produits.
+    Parcourt les pages de la liste des produits, de manière séquentielle
+    jusqu'à ce qu'il n'y ait plus de produits.
+
+    Args:
+        max_pages: Nombre maximal de pages à parcourir (toutes si None)
+
+    Yields:
+        Dictionnaires { "title", "url", "img_url" }
     """
+    from bs4 import BeautifulSoup
+
     page = 1
-    while True:
+    while max_pages is None or page <= max_pages:
         url = BASE_URL_TEMPLATE.format(page=page)
         print(f"\nScraping page {page} -> {url}")
         try:
-            r = requests.get(url, headers=HEADERS, timeout=20)
+            r = http.get(url, headers=HEADERS, timeout=20)
             if r.status_code != 200:
                 print("No more pages or network error (status)", r.status_code)
                 break
@@ -45,8 +57,39 @@ def scrape_all_pages():
             img_url = img_tag.get("src") if img_tag and img_tag.get("src") else ""
 
             if link_tag and link_tag.get("href"):
-                product_url = link_tag.get("href")
-                print(f"\nProcessing product: {title_text}")
-                scrape_product_page(product_url, title_text, img_url)
+                yield {"title": title_text, "url": link_tag.get("href"), "img_url": img_url}
 
         page += 1
+
+
+def scrape_all_pages(tutorial_store: Path = TUTORIAL_STORE_FILE):
+    """
+    Scrape toutes les pages de produits du site Avidsen.
+    Chaque produit est traité (PDF, extraction, article) dès qu'il est trouvé.
+
+    Args:
+        tutorial_store: Fichier des tutoriels extraits, ajoutés aux articles produits
+    """
+    # publish from the outbox in the background while crawling (staging mode only writes the bundle)
+    staging = get_staging_bundle() is not None
+    if not staging:
+        get_publisher().start()
+
+    try:
+        for product in iter_listing_products():
+            print(f"\nProcessing product: {product['title']}")
+            scrape_product_page(product["url"], product["title"], product["img_url"], tutorial_store)
+    finally:
+        if DEDUP_ENABLED:
+            get_manual_index().save()
+
+    # drain the outbox (failed items are retried, the rest is kept for the next run)
+    if not staging:
+        get_publisher().wait()
+
+    if DEDUP_ENABLED:
+        manual_index = get_manual_index()
+        manual_index.print_duplicate_report()
+        set_value("duplicate_clusters", manual_index.duplicate_clusters())
+
+    save_run_report()
@@ -0,0 +1,202 @@
+"""
+Cassettes HTTP : enregistrement et rejeu des réponses du crawl.
+
+En mode "record", chaque réponse GET reçue du site est enregistrée ; en mode
+"replay", elle est resservie localement, sans réseau, avec une latence et un
+débit simulés. Un crawl rejoué sur une cassette fixe permet de comparer des
+changements de concurrence ou d'analyse HTML d'une exécution à l'autre.
+
+Une cassette est un dossier :
+    cassette.jsonl    une ligne par URL (code HTTP, en-têtes, empreinte du corps) ;
+                      la dernière ligne d'une URL l'emporte
+    bodies/<sha>.gz   corps des réponses compressés, partagés entre URL identiques
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from src.config.settings import HTTP_CASSETTE_FOLDER, HTTP_MODE, HTTP_REPLAY_BANDWIDTH, HTTP_REPLAY_LATENCY
+
+# En-têtes non enregistrés : le corps est stocké décompressé, sans cookies
+_SKIPPED_HEADERS = {"content-encoding", "transfer-encoding", "set-cookie", "connection", "keep-alive"}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """URL absente de la cassette en mode replay."""
+
+
+class _ThrottledBody(io.RawIOBase):
+    """Corps de réponse lu au débit simulé (pour les réponses en stream)."""
+
+    def __init__(self, body: bytes, bandwidth: float):
+        self._body = io.BytesIO(body)
+        self._bandwidth = bandwidth
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._body.read(size)
+        if chunk and self._bandwidth:
+            time.sleep(len(chunk) / self._bandwidth)
+        return chunk
+
+
+class Cassette:
+    """
+    Dossier de réponses HTTP enregistrées, indexé par URL.
+
+    Args:
+        folder: Dossier de la cassette (créé à l'enregistrement)
+        latency: Délai simulé avant chaque réponse rejouée (secondes)
+        bandwidth: Débit simulé des corps rejoués (octets par seconde, 0 : illimité)
+    """
+
+    def __init__(self, folder: Path, latency: float = 0.0, bandwidth: float = 0.0):
+        self.folder = Path(folder)
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._index_file = self.folder / "cassette.jsonl"
+        self._bodies = self.folder / "bodies"
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict] = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not self._index_file.exists():
+            return
+        with open(self._index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # Ligne incomplète (arrêt brutal pendant l'enregistrement)
+                self._index[entry["url"]] = entry
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def record(self, url: str, response: requests.Response):
+        """
+        Enregistre une réponse (corps lu entièrement).
+
+        Args:
+            url: URL demandée (clé de la cassette)
+            response: Réponse reçue, sans stream
+        """
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _SKIPPED_HEADERS}
+        headers["Content-Length"] = str(len(body))
+        entry = {"url": url, "final_url": response.url, "status": response.status_code,
+                 "headers": headers, "body": digest, "size": len(body)}
+
+        body_file = self._bodies / f"{digest}.gz"
+        with self._lock:
+            self._bodies.mkdir(parents=True, exist_ok=True)
+            if not body_file.exists():
+                tmp_file = body_file.with_name(f"{body_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp_file, "wb") as f:
+                    f.write(gzip.compress(body, compresslevel=6))
+                os.replace(tmp_file, body_file)
+            with open(self._index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index[url] = entry
+
+    def replay(self, url: str, stream: bool = False) -> requests.Response:
+        """
+        Reconstruit la réponse enregistrée pour une URL.
+
+        Args:
+            url: URL demandée
+            stream: Corps lu au fil de l'eau par l'appelant (iter_content)
+
+        Returns:
+            Réponse requests
+
+        Raises:
+            CassetteMiss: si l'URL n'a pas été enregistrée
+        """
+        entry = self._index.get(url)
+        if entry is None:
+            raise CassetteMiss(f"{url} absente de la cassette {self.folder}")
+        with open(self._bodies / f"{entry['body']}.gz", "rb") as f:
+            body = gzip.decompress(f.read())
+
+        if self.latency:
+            time.sleep(self.latency)
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = entry.get("final_url") or url
+        response.reason = "Replayed"
+        if stream:
+            response.raw = _ThrottledBody(body, self.bandwidth)
+        else:
+            if self.bandwidth:
+                time.sleep(len(body) / self.bandwidth)
+            response._content = body
+        return response
+
+
+_cassette: Optional[Cassette] = None
+_mode: Optional[str] = None
+_configure_lock = threading.Lock()
+_default_lock = threading.Lock()
+
+
+def configure_cassette(mode: str, folder: Path = HTTP_CASSETTE_FOLDER, latency: float = HTTP_REPLAY_LATENCY,
+                       bandwidth: float = HTTP_REPLAY_BANDWIDTH):
+    """
+    Choisit le mode des requêtes GET du crawl.
+
+    Args:
+        mode: "live" (réseau), "record" (réseau + enregistrement) ou "replay" (cassette seule)
+        folder: Dossier de la cassette (modes record et replay)
+        latency: Latence simulée en replay (secondes par requête)
+        bandwidth: Débit simulé en replay (octets par seconde, 0 : illimité)
+    """
+    global _cassette, _mode
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Mode HTTP inconnu : {mode} (live, record ou replay)")
+    with _configure_lock:
+        _cassette = None if mode == "live" else Cassette(folder, latency, bandwidth)
+        _mode = mode
+    if mode == "replay":
+        rate = f"{bandwidth / 1e6:g} Mo/s" if bandwidth else "illimité"
+        print(f"📼 Rejeu HTTP depuis {folder} ({len(_cassette)} réponse(s), latence {latency:g} s, débit {rate})")
+    elif mode == "record":
+        print(f"📼 Enregistrement HTTP dans {folder}")
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Retourne la cassette active (None en mode live).
+    Sans configure_cassette, le mode est lu dans HTTP_MODE (variable AVIDSEN_HTTP_MODE).
+    """
+    if _mode is None:
+        with _default_lock:
+            if _mode is None:
+                configure_cassette(HTTP_MODE)
+    return _cassette
+
+
+def get_cassette_mode() -> str:
+    """Mode courant : "live", "record" ou "replay"."""
+    get_cassette()
+    return _mode
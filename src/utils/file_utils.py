@@ -2,8 +2,17 @@
 Utilitaires pour la gestion des fichiers.
 """
 
-import requests
-from src.config.settings import HEADERS
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.config.settings import HEADERS, PDF_MMAP_THRESHOLD
+from src.utils import http
+from src.utils.metrics import add, observe, span
 
 
 def download_file(url, filename):
@@ -17,11 +26,138 @@ def download_file(url, filename):
     Returns:
         Le chemin du fichier téléchargé
     """
-    r = requests.get(url, stream=True, headers=HEADERS, timeout=60)
-    r.raise_for_status()
-    with open(filename, "wb") as f:
-        for chunk in r.iter_content(8192):
-            if chunk:
-                f.write(chunk)
-    print(f"Downloaded: {filename}")
+    download_file_sha256(url, filename)
     return filename
+
+
+def download_file_sha256(url, filename) -> str:
+    """
+    Télécharge un fichier vers un chemin local et calcule son empreinte pendant le transfert.
+
+    Le contenu est écrit dans un fichier temporaire puis renommé (os.replace) :
+    un lecteur ne voit jamais de fichier partiel, même avec des téléchargements simultanés.
+
+    Args:
+        url: URL du fichier à télécharger
+        filename: Chemin local où sauvegarder le fichier
+
+    Returns:
+        Empreinte SHA-256 du fichier
+    """
+    path = Path(filename)
+    digest = hashlib.sha256()
+    size = 0
+    with span("download_seconds", mode="file"):
+        r = http.get(url, stream=True, headers=HEADERS, timeout=60)
+        r.raise_for_status()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(8192):
+                    if chunk:
+                        f.write(chunk)
+                        digest.update(chunk)
+                        size += len(chunk)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
+            raise
+    add("download_bytes_total", size, mode="file")
+    print(f"Downloaded: {filename}")
+    return digest.hexdigest()
+
+
+def file_sha256(filename) -> str:
+    """Empreinte SHA-256 d'un fichier local, lu par blocs."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadedBuffer:
+    """
+    Contenu d'un téléchargement conservé en mémoire (ou dans un fichier temporaire mappé).
+
+    `data` est une memoryview utilisable directement par fitz.open(stream=...).
+    """
+
+    def __init__(self, data, sha256: str, size: int, tmp_file=None, mapping=None):
+        self.data = data
+        self.sha256 = sha256
+        self.size = size
+        self._tmp_file = tmp_file
+        self._mapping = mapping
+
+    def save(self, filename):
+        """Écrit le contenu dans un fichier local (cache persistant)."""
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        with open(filename, "wb") as f:
+            f.write(self.data)
+        return filename
+
+    def close(self):
+        """Libère la mémoire ou le fichier temporaire associés."""
+        self.data.release()
+        if self._mapping is not None:
+            self._mapping.close()
+        if self._tmp_file is not None:
+            self._tmp_file.close()
+
+
+def download_to_buffer(url, mmap_threshold=PDF_MMAP_THRESHOLD) -> DownloadedBuffer:
+    """
+    Télécharge un fichier en mémoire, en calculant son empreinte SHA-256 au fil de l'eau.
+    Au-delà de `mmap_threshold` octets, le contenu est écrit dans un fichier temporaire
+    mappé en mémoire plutôt que dans un tampon.
+
+    Args:
+        url: URL du fichier à télécharger
+        mmap_threshold: Taille à partir de laquelle le fichier temporaire est utilisé
+
+    Returns:
+        DownloadedBuffer à fermer avec close() après usage
+    """
+    started = time.perf_counter()
+    r = http.get(url, stream=True, headers=HEADERS, timeout=60)
+    r.raise_for_status()
+
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    tmp_file = None
+    expected = int(r.headers.get("Content-Length") or 0)
+    if expected > mmap_threshold:
+        tmp_file = tempfile.TemporaryFile()
+
+    for chunk in r.iter_content(65536):
+        if not chunk:
+            continue
+        hasher.update(chunk)
+        size += len(chunk)
+        if tmp_file is not None:
+            tmp_file.write(chunk)
+            continue
+        buffer += chunk
+        if len(buffer) > mmap_threshold:
+            tmp_file = tempfile.TemporaryFile()
+            tmp_file.write(buffer)
+            buffer = bytearray()
+
+    observe("download_seconds", time.perf_counter() - started, mode="memory")
+    add("download_bytes_total", size, mode="memory")
+    print(f"Downloaded: {url} ({size} bytes, in memory)")
+    if tmp_file is None:
+        return DownloadedBuffer(memoryview(buffer), hasher.hexdigest(), size)
+
+    tmp_file.flush()
+    if size == 0:
+        tmp_file.close()
+        return DownloadedBuffer(memoryview(b""), hasher.hexdigest(), size)
+    mapping = mmap.mmap(tmp_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return DownloadedBuffer(memoryview(mapping), hasher.hexdigest(), size, tmp_file, mapping)
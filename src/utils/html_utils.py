@@ -0,0 +1,239 @@
+"""
+Utilitaires de réduction du HTML des articles.
+
+Le HTML généré répète les mêmes attributs style='...' sur chaque cellule,
+paragraphe ou bloc. Le mode « classes » les remplace par des classes courtes
+définies une seule fois dans un bloc <style> en tête d'article ; le mode
+« compact » supprime en plus les retours à la ligne et l'indentation.
+
+Pour les pages tutoriels, find_main_content() isole la zone de contenu
+(densité de texte et de liens) et minify_html() retire ce qui reste inutile ;
+BeautifulSoup n'est importé que par ces deux fonctions (le rendu des articles
+n'en a pas besoin).
+"""
+
+import re
+import zlib
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from src.config.settings import ARTICLE_CSS_CLASSES, ARTICLE_COMPACT_HTML
+
+if TYPE_CHECKING:
+    from bs4 import Tag
+
+# Balise ouvrante portant un attribut style
+_STYLED_TAG_RE = re.compile(r"<[a-zA-Z][^<>]*?\sstyle\s*=\s*(['\"])(.*?)\1[^<>]*>", re.DOTALL)
+_STYLE_ATTR_RE = re.compile(r"\sstyle\s*=\s*(['\"])(.*?)\1", re.DOTALL)
+_CLASS_ATTR_RE = re.compile(r"(\sclass\s*=\s*)(['\"])(.*?)\2", re.DOTALL)
+_WHITESPACE_RE = re.compile(r"\s*\n\s*|[ \t]{2,}")
+
+CLASS_PREFIX = "z"
+MIN_STYLE_OCCURRENCES = 2  # En dessous, le style reste en ligne (une règle CSS coûterait plus cher)
+
+
+def normalize_style(style: str) -> str:
+    """Normalise une déclaration CSS en ligne : 'a: 1px ;b:2' -> 'a:1px;b:2'."""
+    declarations = []
+    for declaration in style.split(";"):
+        if ":" in declaration:
+            prop, value = declaration.split(":", 1)
+            declarations.append(f"{prop.strip().lower()}:{' '.join(value.split())}")
+    return ";".join(declarations)
+
+
+def style_class_name(style: str) -> str:
+    """Nom de classe court et stable (indépendant de l'ordre d'apparition) pour un style normalisé."""
+    value = zlib.crc32(style.encode("utf-8"))
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    name = ""
+    while True:
+        value, rest = divmod(value, 36)
+        name = digits[rest] + name
+        if not value:
+            return CLASS_PREFIX + name
+
+
+def styles_to_classes(html_parts: List[str]) -> List[str]:
+    """
+    Remplace les styles en ligne répétés par des classes et ajoute le bloc <style>.
+
+    Args:
+        html_parts: Morceaux HTML de l'article
+
+    Returns:
+        Morceaux HTML, précédés du bloc <style> s'il y a au moins une classe
+    """
+    counts = Counter(
+        normalize_style(match.group(2))
+        for part in html_parts
+        for match in _STYLE_ATTR_RE.finditer(part)
+    )
+    classes: Dict[str, str] = {
+        style: style_class_name(style)
+        for style, count in counts.items()
+        if style and count >= MIN_STYLE_OCCURRENCES
+    }
+    if not classes:
+        return list(html_parts)
+
+    def _replace_tag(match):
+        tag = match.group(0)
+        style_match = _STYLE_ATTR_RE.search(tag)
+        class_name = classes.get(normalize_style(style_match.group(2)))
+        if not class_name:
+            return tag
+        tag = tag[:style_match.start()] + tag[style_match.end():]
+        class_match = _CLASS_ATTR_RE.search(tag)
+        if class_match:
+            prefix, quote, existing = class_match.groups()
+            return (tag[:class_match.start()] + f"{prefix}{quote}{existing} {class_name}{quote}"
+                    + tag[class_match.end():])
+        end = -2 if tag.endswith("/>") else -1
+        return f"{tag[:end].rstrip()} class='{class_name}'{tag[end:]}"
+
+    rules = "".join(f".{name}{{{style}}}" for style, name in sorted(classes.items(), key=lambda item: item[1]))
+    return [f"<style>{rules}</style>"] + [_STYLED_TAG_RE.sub(_replace_tag, part) for part in html_parts]
+
+
+def collapse_whitespace(html: str) -> str:
+    """
+    Supprime les retours à la ligne et l'indentation du HTML généré.
+    Les blocs <pre> et <textarea> sont laissés intacts.
+    """
+    if "<pre" in html or "<textarea" in html:
+        return html
+    return _WHITESPACE_RE.sub(" ", html).strip()
+
+
+def render_article_html(html_parts: List[str], css_classes: bool = ARTICLE_CSS_CLASSES,
+                        compact: bool = ARTICLE_COMPACT_HTML) -> List[str]:
+    """
+    Applique les modes de rendu configurés au HTML d'un article.
+
+    Args:
+        html_parts: Morceaux HTML de l'article
+        css_classes: Remplacer les styles en ligne répétés par des classes
+        compact: Supprimer retours à la ligne et indentation
+
+    Returns:
+        Morceaux HTML à publier
+    """
+    if css_classes:
+        html_parts = styles_to_classes(html_parts)
+    if compact:
+        html_parts = [compact_part for compact_part in map(collapse_whitespace, html_parts) if compact_part]
+    return html_parts
+
+
+# --- Zone de contenu principale et minification (pages tutoriels) ---
+
+CONTENT_BLOCK_TAGS = ("p", "li", "td", "pre", "blockquote", "h2", "h3", "h4", "figcaption")
+CONTENT_CONTAINER_TAGS = ("div", "section", "article", "main", "td")
+MIN_BLOCK_TEXT = 25  # Blocs plus courts ignorés pour le score (libellés, boutons...)
+MIN_MAIN_TEXT_SHARE = 0.25  # Part minimale du texte de la page que doit contenir la zone retenue
+
+# Éléments conservés même sans texte
+VOID_OR_MEDIA_TAGS = {"img", "br", "hr", "iframe", "video", "audio", "source", "embed", "object", "picture",
+                      "svg", "input", "td", "th"}
+# Attributs conservés par la minification (les autres — id, class, data-*, aria-*... — sont inutiles dans Zoho)
+KEPT_ATTRIBUTES = {"href", "src", "alt", "title", "style", "target", "colspan", "rowspan", "width", "height",
+                   "allow", "allowfullscreen", "frameborder", "controls", "type"}
+
+
+def _text_length(element: "Tag") -> int:
+    return len(" ".join(element.get_text(" ", strip=True).split()))
+
+
+def link_density(element: "Tag") -> float:
+    """Part du texte d'un élément située dans des liens."""
+    text_length = _text_length(element)
+    if not text_length:
+        return 0.0
+    link_length = sum(_text_length(a) for a in element.find_all("a"))
+    return min(1.0, link_length / text_length)
+
+
+def find_main_content(body: "Tag") -> Optional["Tag"]:
+    """
+    Trouve l'élément qui contient le contenu principal d'une page.
+
+    Chaque bloc de texte (paragraphe, item de liste...) donne un score à son
+    parent et la moitié à son grand-parent ; le score d'un conteneur est
+    ensuite pondéré par (1 - densité de liens), ce qui écarte menus,
+    carrousels de produits et blocs newsletter.
+
+    Args:
+        body: Élément <body> (ou racine) déjà débarrassé des scripts et de la navigation
+
+    Returns:
+        Élément retenu, ou None si aucun ne contient assez de texte de la page
+    """
+    from bs4 import Tag
+
+    scores: Dict[int, float] = {}
+    candidates: Dict[int, "Tag"] = {}
+    for block in body.find_all(CONTENT_BLOCK_TAGS):
+        text = " ".join(block.get_text(" ", strip=True).split())
+        if len(text) < MIN_BLOCK_TEXT:
+            continue
+        score = 1 + text.count(",") + min(len(text) / 100, 3)
+        for ancestor, weight in ((block.parent, 1.0), (block.parent.parent if block.parent else None, 0.5)):
+            if isinstance(ancestor, Tag) and ancestor.name in CONTENT_CONTAINER_TAGS + ("body",):
+                candidates[id(ancestor)] = ancestor
+                scores[id(ancestor)] = scores.get(id(ancestor), 0.0) + score * weight
+
+    if not candidates:
+        return None
+    best = max(candidates.values(), key=lambda element: scores[id(element)] * (1 - link_density(element)))
+
+    # Les étapes d'un tutoriel sont souvent des blocs frères : on remonte tant que
+    # le parent apporte beaucoup de texte sans être dominé par les liens
+    page_text = _text_length(body) or 1
+    while best.parent is not None and best.parent is not body and best.parent.name != "[document]":
+        parent = best.parent
+        if _text_length(best) >= 0.8 * _text_length(parent) or link_density(parent) > 0.3:
+            break
+        if _text_length(parent) > 0.9 * page_text:
+            break
+        best = parent
+
+    if _text_length(best) < MIN_MAIN_TEXT_SHARE * page_text:
+        return None
+    return best
+
+
+def minify_html(root: "Tag") -> "Tag":
+    """
+    Minifie un fragment HTML sur place : commentaires, éléments vides et
+    attributs inutiles supprimés, espaces consécutifs réduits.
+
+    Args:
+        root: Élément à minifier
+
+    Returns:
+        Le même élément
+    """
+    from bs4 import Comment, NavigableString
+
+    for comment in root.find_all(string=lambda node: isinstance(node, Comment)):
+        comment.extract()
+
+    # Du plus profond au moins profond : un parent vidé par ses enfants est supprimé à son tour
+    for element in reversed(root.find_all(True)):
+        if element.name in VOID_OR_MEDIA_TAGS:
+            continue
+        if not element.get_text(strip=True) and not element.find(VOID_OR_MEDIA_TAGS):
+            element.decompose()
+
+    for element in [root] + root.find_all(True):
+        for attr in list(element.attrs):
+            if attr not in KEPT_ATTRIBUTES:
+                del element[attr]
+
+    for text in root.find_all(string=True):
+        if isinstance(text, NavigableString) and text.parent.name not in ("pre", "textarea"):
+            collapsed = re.sub(r"\s+", " ", text)
+            if collapsed != text:
+                text.replace_with(collapsed)
+    return root
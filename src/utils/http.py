@@ -0,0 +1,59 @@
+"""
+Requêtes HTTP du crawl (pages du site Avidsen, PDF, images).
+Chaque requête est mesurée par hôte : durée, octets reçus et code HTTP.
+
+Selon le mode (src/utils/cassette.py), les réponses sont aussi enregistrées
+dans une cassette, ou rejouées depuis celle-ci sans accès réseau.
+
+requests et la cassette ne sont importés qu'à la première requête.
+"""
+
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from src.utils.metrics import add, span
+
+if TYPE_CHECKING:
+    import requests
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    """
+    Requête GET mesurée, avec les mêmes arguments que requests.get.
+
+    Avec stream=True, seule l'attente des en-têtes est mesurée : les octets du
+    corps sont comptés par l'appelant au fil de la lecture. En mode replay, une
+    URL absente de la cassette lève CassetteMiss (une requests.ConnectionError).
+
+    Args:
+        url: URL demandée
+        **kwargs: Arguments de requests.get (headers, timeout, stream...)
+
+    Returns:
+        Réponse requests
+    """
+    import requests
+
+    from src.utils.cassette import get_cassette, get_cassette_mode
+
+    host = urlsplit(url).netloc
+    mode = get_cassette_mode()
+    if kwargs.get("params"):
+        url = requests.Request("GET", url, params=kwargs.pop("params")).prepare().url
+    try:
+        with span("http_get_seconds", host=host):
+            if mode == "replay":
+                response = get_cassette().replay(url, stream=kwargs.get("stream", False))
+            elif mode == "record":
+                # Corps lu entièrement pour l'enregistrer ; iter_content reste utilisable par l'appelant
+                response = requests.get(url, **{**kwargs, "stream": False})
+                get_cassette().record(url, response)
+            else:
+                response = requests.get(url, **kwargs)
+    except requests.RequestException:
+        add("http_requests_total", host=host, status="error")
+        raise
+    add("http_requests_total", host=host, status=response.status_code)
+    if not kwargs.get("stream"):
+        add("http_response_bytes_total", len(response.content), host=host)
+    return response
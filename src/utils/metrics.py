@@ -0,0 +1,241 @@
+"""
+Instrumentation légère des étapes coûteuses : durées et volumes.
+
+Les durées alimentent des histogrammes (seaux fixes, comme Prometheus) et les
+volumes des compteurs, avec des étiquettes (hôte HTTP, méthode...). En fin
+d'exécution, les mesures sont ajoutées au rapport JSON et écrites dans un
+fichier texte Prometheus (collecteur « textfile » de node_exporter), pour
+suivre les régressions d'une nuit à l'autre.
+"""
+
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Tuple
+
+from src.config.settings import METRICS_ENABLED, METRICS_PREFIX, METRICS_SECONDS_BUCKETS
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_histograms: Dict[str, Dict[LabelKey, Dict]] = {}
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+_help: Dict[str, str] = {}
+
+
+def _label_key(labels: Dict) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def describe(name: str, help_text: str):
+    """Associe une description à une mesure (ligne # HELP du fichier Prometheus)."""
+    _help[name] = help_text
+
+
+def observe(name: str, value: float, **labels):
+    """
+    Ajoute une valeur à un histogramme.
+
+    Args:
+        name: Nom de la mesure (ex: "http_get_seconds")
+        value: Valeur observée (secondes pour les durées)
+        **labels: Étiquettes (ex: host="www.avidsen.com")
+    """
+    if not METRICS_ENABLED:
+        return
+    key = _label_key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = {"buckets": [0] * (len(METRICS_SECONDS_BUCKETS) + 1),
+                                       "count": 0, "sum": 0.0, "max": 0.0}
+        histogram["buckets"][bisect.bisect_left(METRICS_SECONDS_BUCKETS, value)] += 1
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["max"] = max(histogram["max"], value)
+
+
+def add(name: str, amount: float = 1, **labels):
+    """Incrémente un compteur (octets, requêtes...)."""
+    if not METRICS_ENABLED:
+        return
+    key = _label_key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+@contextmanager
+def span(name: str, **labels):
+    """
+    Mesure la durée d'un bloc dans l'histogramme `name`.
+
+    Exemple :
+        with span("download_seconds"):
+            ...
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timed(name: str, **labels):
+    """Décorateur : mesure la durée de chaque appel de la fonction dans l'histogramme `name`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_loop(iterable: Iterable, name: str, **labels) -> Iterator:
+    """
+    Parcourt `iterable` en mesurant la durée du corps de boucle de chaque itération.
+    Évite de ré-indenter une longue boucle dans un bloc `with span(...)`.
+    """
+    if not METRICS_ENABLED:
+        yield from iterable
+        return
+    for item in iterable:
+        start = time.perf_counter()
+        yield item
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def _quantile(histogram: Dict, q: float) -> float:
+    """Estimation d'un quantile : borne supérieure du seau qui le contient."""
+    rank = q * histogram["count"]
+    seen = 0
+    for bound, count in zip(METRICS_SECONDS_BUCKETS, histogram["buckets"]):
+        seen += count
+        if seen >= rank:
+            return min(bound, histogram["max"])
+    return histogram["max"]
+
+
+def metrics_snapshot() -> Dict:
+    """
+    Mesures collectées, pour le rapport JSON.
+
+    Returns:
+        { "histograms": {nom: [ {labels, count, sum, mean, p50, p95, max} ]},
+          "counters": {nom: [ {labels, value} ]} }
+    """
+    with _lock:
+        histograms = {
+            name: [{
+                "labels": dict(key),
+                "count": h["count"],
+                "sum": round(h["sum"], 6),
+                "mean": round(h["sum"] / h["count"], 6) if h["count"] else 0.0,
+                "p50": _quantile(h, 0.5),
+                "p95": _quantile(h, 0.95),
+                "max": round(h["max"], 6),
+            } for key, h in sorted(series.items())]
+            for name, series in sorted(_histograms.items())
+        }
+        counters = {
+            name: [{"labels": dict(key), "value": value} for key, value in sorted(series.items())]
+            for name, series in sorted(_counters.items())
+        }
+    return {"histograms": histograms, "counters": counters}
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    labels = key + extra
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def prometheus_text(run_counters: Dict[str, float] = None) -> str:
+    """
+    Mesures au format texte Prometheus.
+
+    Args:
+        run_counters: Compteurs du rapport d'exécution, exportés comme jauges avidsen_run_counter
+    """
+    lines = []
+    with _lock:
+        for name, series in sorted(_histograms.items()):
+            metric = METRICS_PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {metric} {_help[name]}")
+            lines.append(f"# TYPE {metric} histogram")
+            for key, h in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(list(METRICS_SECONDS_BUCKETS) + [float("inf")], h["buckets"]):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{metric}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+                lines.append(f"{metric}_sum{_format_labels(key)} {h['sum']:.6f}")
+                lines.append(f"{metric}_count{_format_labels(key)} {h['count']}")
+        for name, series in sorted(_counters.items()):
+            metric = METRICS_PREFIX + name
+            if name in _help:
+                lines.append(f"# HELP {metric} {_help[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{_format_labels(key)} {_format_value(value)}")
+
+    if run_counters:
+        metric = METRICS_PREFIX + "run_counter"
+        lines.append(f"# HELP {metric} Compteurs du rapport d'exécution")
+        lines.append(f"# TYPE {metric} gauge")
+        for counter, value in sorted(run_counters.items()):
+            lines.append(f"{metric}{_format_labels((('counter', counter),))} {_format_value(value)}")
+    metric = METRICS_PREFIX + "run_finished_timestamp_seconds"
+    lines.append(f"# TYPE {metric} gauge")
+    lines.append(f"{metric} {time.time():.0f}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus_textfile(path: Path, run_counters: Dict[str, float] = None):
+    """
+    Écrit les mesures au format Prometheus (écriture atomique, comme l'exige
+    le collecteur textfile de node_exporter).
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(run_counters))
+    os.replace(tmp_path, path)
+
+
+def reset():
+    """Oublie les mesures collectées (nouvelle exécution dans le même processus)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+describe("http_get_seconds", "Durée des requêtes GET du crawl, par hôte")
+describe("http_response_bytes_total", "Octets reçus par les requêtes GET du crawl, par hôte")
+describe("http_requests_total", "Requêtes GET du crawl, par hôte et code HTTP")
+describe("download_seconds", "Durée des téléchargements de fichiers (PDF, images)")
+describe("download_bytes_total", "Octets téléchargés par download_file / download_to_buffer")
+describe("pdf_extract_images_seconds", "Durée de l'extraction des images d'un PDF")
+describe("pdf_page_seconds", "Durée d'extraction texte / tableaux d'une page PDF")
+describe("image_data_uri_seconds", "Durée d'encodage d'une image en data URI")
+describe("image_data_uri_bytes_total", "Octets d'images encodés en data URI")
+describe("html_render_seconds", "Durée du rendu HTML d'un article")
+describe("zoho_request_seconds", "Durée des requêtes vers l'API Zoho Desk, par méthode")
+describe("zoho_request_bytes_total", "Octets envoyés à l'API Zoho Desk, par méthode")
@@ -0,0 +1,214 @@
+"""
+Profilage à la demande (--profile) des produits et de l'extraction PDF.
+
+Chaque appel profilé (scrape_product_page, extract_pdf_structure_keep_tables)
+est mesuré avec cProfile (temps CPU par fonction) et tracemalloc (pic mémoire
+et allocations restantes par ligne). Seuls les N appels les plus lents et les
+N plus gourmands en mémoire sont conservés ; en fin d'exécution, leurs pstats
+et un résumé lisible sont écrits dans le dossier de profils.
+
+Désactivé, un appel profilé ne coûte qu'un test de booléen.
+"""
+
+import cProfile
+import functools
+import io
+import json
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config.settings import PROFILE_FOLDER, PROFILE_TOP_ALLOCATIONS, PROFILE_TOP_N, PROFILE_TRACEMALLOC_FRAMES
+
+
+class _Call:
+    """Un appel profilé en cours ou terminé."""
+
+    def __init__(self, kind: str, label: str, parent: Optional["_Call"]):
+        self.kind = kind
+        self.label = label
+        self.parent = parent
+        self.profile = cProfile.Profile()
+        self.children: List[cProfile.Profile] = []
+        self.seconds = 0.0
+        self.peak_bytes = 0
+        self.top_allocations: List[str] = []
+        self._start_snapshot = None
+        self._base_memory = 0
+        self._peak_before_children = 0
+
+    def summary(self) -> Dict:
+        return {"kind": self.kind, "label": self.label, "seconds": round(self.seconds, 3),
+                "peak_bytes": self.peak_bytes}
+
+
+_enabled = False
+_folder = PROFILE_FOLDER
+_top_n = PROFILE_TOP_N
+_lock = threading.Lock()
+_local = threading.local()
+_calls: List[Dict] = []  # Résumé de tous les appels profilés
+_kept: Dict[str, List[_Call]] = {"slowest": [], "memory": []}
+
+
+def enable_profiling(folder: Path = PROFILE_FOLDER, top_n: int = PROFILE_TOP_N):
+    """
+    Active le profilage des appels décorés par @profiled.
+
+    Args:
+        folder: Dossier où écrire les profils
+        top_n: Nombre d'appels conservés (les plus lents, les plus gourmands en mémoire)
+    """
+    global _enabled, _folder, _top_n
+    _folder = Path(folder)
+    _top_n = top_n
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+    _enabled = True
+    print(f"🔬 Profilage activé : {top_n} appel(s) les plus lents / gourmands conservés dans {_folder}")
+
+
+def is_profiling() -> bool:
+    """Indique si le profilage est actif."""
+    return _enabled
+
+
+def _keep(call: _Call):
+    """Conserve l'appel s'il fait partie des N plus lents ou des N plus gourmands."""
+    with _lock:
+        _calls.append(call.summary())
+        for ranking, key in (("slowest", lambda c: c.seconds), ("memory", lambda c: c.peak_bytes)):
+            kept = _kept[ranking]
+            kept.append(call)
+            kept.sort(key=key, reverse=True)
+            del kept[_top_n:]
+
+
+@contextmanager
+def profile_section(kind: str, label: str = None):
+    """
+    Profile un bloc (cProfile + tracemalloc).
+
+    Les sections imbricables : la section englobante est suspendue pendant la
+    section interne, dont les statistiques lui sont ensuite ajoutées.
+
+    Args:
+        kind: Type d'appel (ex: "product", "pdf_extraction")
+        label: Libellé (titre du produit...) ; par défaut celui de la section englobante
+    """
+    if not _enabled:
+        yield
+        return
+
+    parent = getattr(_local, "current", None)
+    call = _Call(kind, label or (parent.label if parent else kind), parent)
+    if parent is not None:
+        parent.profile.disable()
+        parent._peak_before_children = max(parent._peak_before_children, tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    call._base_memory = tracemalloc.get_traced_memory()[0]
+    call._start_snapshot = tracemalloc.take_snapshot()
+    _local.current = call
+    start = time.perf_counter()
+    call.profile.enable()
+    try:
+        yield
+    finally:
+        call.profile.disable()
+        call.seconds = time.perf_counter() - start
+        peak = max(call._peak_before_children, tracemalloc.get_traced_memory()[1])
+        call.peak_bytes = max(0, peak - call._base_memory)
+        stats = tracemalloc.take_snapshot().compare_to(call._start_snapshot, "lineno")
+        call.top_allocations = [str(stat) for stat in stats[:PROFILE_TOP_ALLOCATIONS] if stat.size_diff > 0]
+        call._start_snapshot = None
+        _local.current = parent
+        if parent is not None:
+            parent.children.append(call.profile)
+            parent.children.extend(call.children)
+            parent.profile.enable()
+        _keep(call)
+
+
+def profiled(kind: str, label_arg: int = 0, label_kwarg: str = None):
+    """
+    Décorateur : profile chaque appel de la fonction quand --profile est actif.
+
+    Args:
+        kind: Type d'appel
+        label_arg: Position de l'argument servant de libellé
+        label_kwarg: Nom de cet argument s'il est passé par mot-clé
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            value = kwargs.get(label_kwarg) if label_kwarg in kwargs else (
+                args[label_arg] if len(args) > label_arg else None)
+            # Un contenu en mémoire n'est pas un libellé : on garde celui de l'appel englobant
+            label = str(value) if isinstance(value, (str, Path)) else None
+            with profile_section(kind, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^0-9A-Za-z]+", "-", text).strip("-")[:60] or "appel"
+
+
+def _write_call(call: _Call, ranking: str, rank: int) -> Dict:
+    """Écrit les pstats et le résumé texte d'un appel conservé."""
+    import pstats  # Coûteux à importer, inutile sans --profile
+
+    name = f"{ranking}_{rank:02d}_{call.kind}_{_slug(Path(call.label).name)}"
+    stats = pstats.Stats(call.profile)
+    for child in call.children:
+        stats.add(child)
+    stats_file = _folder / f"{name}.pstats"
+    stats.dump_stats(str(stats_file))
+
+    text = io.StringIO()
+    pstats.Stats(str(stats_file), stream=text).sort_stats("cumulative").print_stats(40)
+    summary_file = _folder / f"{name}.txt"
+    with open(summary_file, "w", encoding="utf-8") as f:
+        f.write(f"{call.kind} : {call.label}\n")
+        f.write(f"Durée : {call.seconds:.3f} s - pic mémoire : {call.peak_bytes / 1024 / 1024:.1f} Mio\n\n")
+        f.write("Allocations restantes en fin d'appel (par ligne) :\n")
+        f.writelines(f"  {line}\n" for line in call.top_allocations)
+        f.write("\n")
+        f.write(text.getvalue())
+    return {**call.summary(), "pstats": str(stats_file.as_posix()), "summary": str(summary_file.as_posix())}
+
+
+def write_profile_report() -> Optional[Path]:
+    """
+    Écrit les profils conservés et un index JSON (profile_report.json) dans le dossier de profils.
+
+    Returns:
+        Chemin de l'index, ou None si le profilage n'est pas actif
+    """
+    if not _enabled:
+        return None
+    _folder.mkdir(parents=True, exist_ok=True)
+    with _lock:
+        kept = {ranking: list(calls) for ranking, calls in _kept.items()}
+        calls = list(_calls)
+    written: Dict[int, Dict] = {}  # Un appel présent dans les deux classements n'est écrit qu'une fois
+    report = {}
+    for ranking, ranked in kept.items():
+        report[ranking] = []
+        for rank, call in enumerate(ranked, 1):
+            if id(call) not in written:
+                written[id(call)] = _write_call(call, ranking, rank)
+            report[ranking].append(written[id(call)])
+    report["calls"] = sorted(calls, key=lambda c: c["seconds"], reverse=True)
+    report_file = _folder / "profile_report.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"🔬 Profils écrits dans {_folder} ({len(calls)} appel(s) profilé(s))")
+    return report_file
@@ -0,0 +1,87 @@
+"""
+Rapport d'exécution partagé par les différentes étapes du traitement.
+Les étapes y consignent leurs résultats, sauvegardés en JSON en fin d'exécution.
+Le rapport peut être alimenté depuis plusieurs threads (publication, téléchargements).
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+
+from src.config.settings import METRICS_ENABLED, METRICS_PROM_FILE, RUN_REPORT_FILE
+from src.utils.metrics import metrics_snapshot, write_prometheus_textfile
+from src.utils.profiling import write_profile_report
+
+
+_report = {
+    "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "counters": {},
+}
+_lock = threading.Lock()
+
+
+def record(section: str, entry: dict):
+    """
+    Ajoute une entrée à une section (liste) du rapport.
+
+    Args:
+        section: Nom de la section (ex: "prescreen")
+        entry: Données à consigner
+    """
+    with _lock:
+        _report.setdefault(section, []).append(entry)
+
+
+def set_value(key: str, value):
+    """Définit une valeur de premier niveau du rapport."""
+    with _lock:
+        _report[key] = value
+
+
+def increment(counter: str, amount: int = 1):
+    """Incrémente un compteur du rapport."""
+    with _lock:
+        counters = _report["counters"]
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+def get_run_report() -> dict:
+    """Retourne le rapport en cours."""
+    return _report
+
+
+def print_counters():
+    """Affiche les compteurs du rapport (articles créés, mis à jour, ignorés...)."""
+    with _lock:
+        counters = sorted(_report["counters"].items())
+    for counter, value in counters:
+        print(f"   - {counter} : {value}")
+
+
+def save_run_report(path: Path = RUN_REPORT_FILE, metrics_path: Path = METRICS_PROM_FILE):
+    """
+    Sauvegarde le rapport d'exécution en JSON, avec les mesures de durée et de
+    volume, et écrit ces mesures au format Prometheus (ainsi que les profils
+    en mode --profile).
+
+    Args:
+        path: Fichier de destination
+        metrics_path: Fichier texte Prometheus (None pour ne pas l'écrire)
+    """
+    set_value("finished_at", time.strftime("%Y-%m-%dT%H:%M:%S"))
+    if METRICS_ENABLED:
+        set_value("metrics", metrics_snapshot())
+        if metrics_path:
+            with _lock:
+                counters = dict(_report["counters"])
+            write_prometheus_textfile(metrics_path, counters)
+    profile_report = write_profile_report()
+    if profile_report:
+        set_value("profile_report", str(profile_report.as_posix()))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, open(path, "w", encoding="utf-8") as f:
+        json.dump(_report, f, ensure_ascii=False, indent=2)
+    print(f"Rapport d'exécution sauvegardé dans {path}")
+    print_counters()
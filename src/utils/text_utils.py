@@ -4,6 +4,19 @@ Utilitaires pour la manipulation de texte.
 
 import re
 import unicodedata
+from typing import List, Optional, Tuple
+
+
+def _split_title(raw_title: str) -> Tuple[List[str], Optional[str]]:
+    """
+    Découpe un titre brut sur "–" et repère le code produit (première partie numérique).
+
+    Returns:
+        Tuple (parties du titre, code produit ou None)
+    """
+    parts = [p.strip() for p in raw_title.split("–")]
+    code = next((p for p in parts if re.fullmatch(r"\d{3,}", p)), None)
+    return parts, code
 
 
 def clean_title(raw_title: str) -> str:
@@ -21,17 +34,12 @@ def clean_title(raw_title: str) -> str:
     Returns:
         Titre nettoyé
     """
-    parts = [p.strip() for p in raw_title.split("–")]
+    parts, code = _split_title(raw_title)
     # heuristic: often parts: ["Notice à télécharger", "107253", "Station ...", "Avidsen", "107253"]
     if len(parts) >= 3:
         # prefer the long human readable part (choose part containing letters beyond code)
         # Try to find the part that is not purely numeric and not company name
-        code = None
         main_text = None
-        for p in parts:
-            if re.fullmatch(r"\d{3,}", p):
-                if not code:
-                    code = p
         # pick longest non-numeric part as main_text
         non_numeric = [p for p in parts if not re.fullmatch(r"\d{1,}", p) and len(p) > 2]
         if non_numeric:
@@ -87,6 +95,33 @@ def sanitize_permalink(title: str, max_length=100) -> str:
     return title
 
 
+def normalize_product_ref(ref: str) -> str:
+    """
+    Normalise une référence produit pour la comparer entre sources
+    (ex: " 107253 " -> "107253", "ref-127100a" -> "REF127100A").
+    """
+    return re.sub(r"[^0-9A-Za-z]", "", ref or "").upper()
+
+
+def extract_product_ref(raw_title: str) -> str:
+    """
+    Extrait la référence produit d'un titre, selon le même découpage que clean_title.
+
+    "Notice à télécharger – 107253 – Station météo ... – Avidsen – 107253" -> "107253"
+    
+    Args:
+        raw_title: Titre brut (ou déjà nettoyé : "... – Notice-107253")
+        
+    Returns:
+        Référence normalisée, ou "" si aucune n'est trouvée
+    """
+    _, code = _split_title(raw_title)
+    if code:
+        return normalize_product_ref(code)
+    match = re.search(r"Notice-(\w+)", raw_title) or re.search(r"\b(\d{5,})\b", raw_title)
+    return normalize_product_ref(match.group(1)) if match else ""
+
+
 def clean_section_text(text: str) -> str:
     """
     Nettoie le texte d'une section en retirant les lignes trop courtes.
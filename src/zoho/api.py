@@ -3,18 +3,142 @@ Module d'interaction avec l'API Zoho Desk.
 Gère la création d'articles dans la base de connaissances.
 """
 
-import json
-import requests
 import re
+from functools import lru_cache
+from typing import Dict, List, Sequence
 
-from src.config.settings import get_zoho_config
+from src.config.settings import ZOHO_ARTICLE_MAX_BYTES, get_zoho_config
+from src.zoho.client import get_zoho_client, read_article_index
+from src.zoho.bundle import KIND_PRODUCT, get_staging_bundle
+from src.zoho.outbox import get_outbox
+from src.zoho.payload import answer_json_size, article_json_size, write_article_payload
+from src.zoho.splitter import (
+    PART_SUFFIX,
+    navigation_html,
+    part_parent_base,
+    part_permalink_base,
+    part_permalinks,
+    section_key,
+    split_sections,
+    table_of_contents_html,
+)
+from src.utils.html_utils import render_article_html
+from src.utils.metrics import span
+from src.utils.run_report import increment, record
 from src.utils.text_utils import clean_title, sanitize_permalink, clean_section_text
 from src.scraper.tutorial_formatter import format_tutorials_section, create_tutorial_summary
 
 
+def _render_section(sec) -> List[str]:
+    """
+    Convertit une section extraite du PDF en morceaux HTML.
+
+    Args:
+        sec: Section { "title", "content" }
+
+    Returns:
+        Liste des morceaux HTML de la section
+    """
+    html = []
+    sec_title = sec.get("title", "")
+    sec_content = sec.get("content", "")
+    if sec_title:
+        html.append(f"<h2 style='color:#2874A6;margin-top:14px;'>{sec_title}</h2>")
+    if sec_content:
+        if "<table" in sec_content:
+            parts = re.split(r"(<table.*?>.*?</table>)", sec_content, flags=re.DOTALL)
+            for p in parts:
+                if p.strip().startswith("<table"):
+                    html.append(p)
+                else:
+                    cleaned = clean_section_text(p)
+                    if cleaned:
+                        html.append(cleaned)
+        else:
+            cleaned = clean_section_text(sec_content)
+            if cleaned:
+                html.append(cleaned)
+    return html
+
+
+def _html_size(html: List[str]) -> int:
+    """Taille en octets (UTF-8) d'une liste de morceaux HTML."""
+    return sum(len(part.encode("utf-8")) for part in html)
+
+
+def _part_heading(title: str) -> str:
+    """Titre affiché en tête d'un article (ou d'une partie d'article)."""
+    return f"<h1 style='text-align:center; color:#2E86C1; margin-top:10px;'>{title}</h1>"
+
+
+@lru_cache(maxsize=None)
+def _published_parts() -> Dict[str, List[str]]:
+    """Permalinks des parties déjà publiées (index local), regroupés par article parent."""
+    parts: Dict[str, List[str]] = {}
+    for permalink in read_article_index().get("articles", {}):
+        base = part_parent_base(permalink)
+        if base:
+            parts.setdefault(base, []).append(permalink)
+    return parts
+
+
+def _record_stale_parts(permalink: str, current: Sequence[str]):
+    """
+    Consigne dans le rapport les parties publiées auparavant qui ne font plus partie
+    de l'article (notice raccourcie) : elles restent dans Zoho Desk, à supprimer.
+    """
+    stale = sorted(set(_published_parts().get(part_permalink_base(permalink), ())) - set(current))
+    if stale:
+        print(f"⚠️ {len(stale)} partie(s) obsolète(s) à supprimer dans Zoho Desk : {permalink}")
+        record("stale_article_parts", {"permalink": permalink, "parts": stale})
+
+
+def render_html_for_report(html: List[str], label: str) -> List[str]:
+    """
+    Applique le rendu configuré (classes CSS, HTML compact) et consigne la
+    taille du HTML avant et après dans le rapport d'exécution.
+
+    Args:
+        html: Morceaux HTML de l'article
+        label: Libellé de l'article dans le rapport
+
+    Returns:
+        Morceaux HTML à publier
+    """
+    before = _html_size(html)
+    with span("html_render_seconds"):
+        html = render_article_html(html)
+    after = _html_size(html)
+    increment("html_bytes_before_render", before)
+    increment("html_bytes_after_render", after)
+    record("html_render", {"title": label, "bytes_before": before, "bytes_after": after})
+    return html
+
+
+def _enqueue_article(metadata: Dict, html: List[str], label: str):
+    """
+    Écrit le payload de l'article en flux et le dépose dans l'outbox
+    (ou dans le bundle en mode staging).
+    Le HTML n'est jamais assemblé en une seule chaîne : les morceaux sont
+    encodés un à un dans le fichier JSON envoyé ensuite en flux.
+    """
+    html = render_html_for_report(html, label)
+    bundle = get_staging_bundle()
+    if bundle is not None:
+        bundle.add(KIND_PRODUCT, metadata, html, label=label)
+        return
+    payload = write_article_payload(metadata, html)
+    # --- Déposer dans l'outbox : la publication se fait en arrière-plan ---
+    get_outbox().enqueue(payload, label=label)
+
+
 def create_zoho_article(title_raw: str, main_image_path_or_url: str, sections, pdf_url: str, tutorials=None):
     """
     Crée un article dans Zoho Desk avec le contenu extrait du PDF et les tutoriels.
+
+    Si le HTML dépasse ZOHO_ARTICLE_MAX_BYTES, la notice est publiée en plusieurs
+    parties (coupées entre deux sections) et l'article principal devient un
+    sommaire pointant vers elles.
     
     Args:
         title_raw: Titre brut du produit
@@ -27,84 +151,100 @@ def create_zoho_article(title_raw: str, main_image_path_or_url: str, sections, p
         print(f"PDF manquant, l'article '{title_raw}' ne sera pas créé.")
         return
     
-    # Récupérer la configuration Zoho
-    zoho_config = get_zoho_config()
+    # Récupérer la configuration Zoho (en mode staging, la catégorie est choisie au rejeu)
+    staging = get_staging_bundle() is not None
+    zoho_config = {} if staging else get_zoho_config()
     
     title = clean_title(title_raw)
+    permalink = sanitize_permalink(title)
 
     # --- Construire le HTML ---
-    html = []
+    header = []
     if main_image_path_or_url:
         img_src = main_image_path_or_url if str(main_image_path_or_url).startswith("http") else main_image_path_or_url
-        html.append(f"<div style='text-align:center;'><img src='{img_src}' alt='{title}' style='display:block; margin:12px auto; max-width:800px; border:1px solid #ddd; padding:5px;'/></div>")
+        header.append(f"<div style='text-align:center;'><img src='{img_src}' alt='{title}' style='display:block; margin:12px auto; max-width:800px; border:1px solid #ddd; padding:5px;'/></div>")
 
-    html.append(f"<h1 style='text-align:center; color:#2E86C1; margin-top:10px;'>{title}</h1>")
+    header.append(_part_heading(title))
     
     # Add tutorial summary if tutorials exist
     if tutorials:
         tutorial_summary = create_tutorial_summary(tutorials)
         if tutorial_summary:
-            html.append(tutorial_summary)
-
-    for sec in sections:
-        sec_title = sec.get("title", "")
-        sec_content = sec.get("content", "")
-        if sec_title:
-            html.append(f"<h2 style='color:#2874A6;margin-top:14px;'>{sec_title}</h2>")
-        if sec_content:
-            if "<table" in sec_content:
-                parts = re.split(r"(<table.*?>.*?</table>)", sec_content, flags=re.DOTALL)
-                for p in parts:
-                    if p.strip().startswith("<table"):
-                        html.append(p)
-                    else:
-                        cleaned = clean_section_text(p)
-                        if cleaned:
-                            html.append(cleaned)
-            else:
-                cleaned = clean_section_text(sec_content)
-                if cleaned:
-                    html.append(cleaned)
+            header.append(tutorial_summary)
+
+    rendered_sections = [_render_section(sec) for sec in sections]
     
+    footer = []
     # Add full tutorials section
     if tutorials:
         tutorials_html = format_tutorials_section(tutorials)
         if tutorials_html:
-            html.append(tutorials_html)
+            footer.append(tutorials_html)
 
     if pdf_url:
-        html.append(f"""
+        footer.append(f"""
 <div style='text-align:center; margin:20px 0;'>
   <a href='{pdf_url}' style='background-color:#2E86C1; color:white; padding:10px 20px; text-decoration:none; border-radius:5px; display:inline-block;'>Télécharger la notice PDF</a>
 </div>
 """)
 
-    final_html = "\n".join(html)
-
     # --- Préparer payload Zoho ---
-    zoho_headers = {
-        "Authorization": f"Zoho-oauthtoken {zoho_config['access_token']}",
-        "orgId": zoho_config['org_id'],
-        "Content-Type": "application/json"
-    }
-
-    zoho_body = {
+    metadata = {
         "title": title,
-        "permalink": sanitize_permalink(title),
-        "answer": final_html,
+        "permalink": permalink,
         "categoryId": zoho_config.get('product_category_id'),
         "status": "Published"
     }
+    if staging:
+        del metadata["categoryId"]
 
-    # --- Poster sur Zoho ---
-    try:
-        r = requests.post("https://desk.zoho.com/api/v1/articles", headers=zoho_headers, data=json.dumps(zoho_body), timeout=30)
-        if r.status_code in (200, 201):
-            print(f"✅ Zoho article created: {title}")
-        else:
-            print(f"❌ Zoho error ({r.status_code}): {r.text}")
-    except Exception as e:
-        print(f"❌ Zoho request failed: {e}")
+    # Tailles mesurées telles qu'envoyées : HTML échappé dans le corps JSON de la requête
+    section_sizes = [answer_json_size(html) for html in rendered_sections]
+    if article_json_size(metadata, header + footer) + sum(section_sizes) <= ZOHO_ARTICLE_MAX_BYTES:
+        html = header + [part for html in rendered_sections for part in html] + footer
+        del rendered_sections
+        _enqueue_article(metadata, html, label=title)
+        _record_stale_parts(permalink, [])
+        return
+
+    # --- Notice trop volumineuse : une partie par groupe de sections + un sommaire ---
+    # Chaque partie ajoute un titre, deux barres de navigation et ses métadonnées : on les
+    # retire du budget en prenant le pire cas (numéro de partie le plus long)
+    last_title = f"{title} – Partie {len(sections)}"
+    part_permalink = f"{part_permalink_base(permalink)}{PART_SUFFIX}{0:08x}"
+    worst_navigation = navigation_html(permalink, title, part_permalink, part_permalink)
+    part_overhead = article_json_size(
+        {**metadata, "title": last_title, "permalink": part_permalink},
+        [_part_heading(title), worst_navigation, worst_navigation],
+    )
+    keys = [section_key(sec) for sec in sections]
+    ranges = split_sections(section_sizes, keys, ZOHO_ARTICLE_MAX_BYTES - part_overhead)
+    permalinks = part_permalinks(permalink, [keys[start] for start, _ in ranges])
+    # Le numéro n'apparaît que dans le titre (métadonnées) : le contenu d'une partie ne
+    # change pas quand une partie est ajoutée ou retirée avant elle
+    parts = [{
+        "title": f"{title} – Partie {number}",
+        "permalink": part_permalink,
+        "sections": [sec.get("title", "") for sec in sections[start:end]],
+    } for number, (part_permalink, (start, end)) in enumerate(zip(permalinks, ranges), 1)]
+    print(f"✂️ Notice volumineuse découpée en {len(parts)} parties : {title}")
+
+    for i, (part, (start, end)) in enumerate(zip(parts, ranges)):
+        navigation = navigation_html(
+            permalink, title,
+            previous_permalink=parts[i - 1]["permalink"] if i > 0 else None,
+            next_permalink=parts[i + 1]["permalink"] if i + 1 < len(parts) else None,
+        )
+        html = [_part_heading(title), navigation]
+        for j in range(start, end):
+            html.extend(rendered_sections[j])
+            rendered_sections[j] = None  # Libère la section dès qu'elle est écrite
+        html.append(navigation)
+        _enqueue_article({**metadata, "title": part["title"], "permalink": part["permalink"]}, html,
+                         label=part["title"])
+
+    _enqueue_article(metadata, header + [table_of_contents_html(parts)] + footer, label=title)
+    _record_stale_parts(permalink, permalinks)
 
 
 def create_kb_article(title: str, answer_text: str):
@@ -121,27 +261,18 @@ def create_kb_article(title: str, answer_text: str):
     """
     zoho_config = get_zoho_config()
     
-    headers = {
-        "Authorization": f"Zoho-oauthtoken {zoho_config['access_token']}",
-        "orgId": zoho_config['org_id'],
-        "Content-Type": "application/json"
-    }
-    
     body = {
         "title": title,
         "permalink": sanitize_permalink(title),
         "answer": answer_text,
-        "categoryId": zoho_config['category_id'],
+        "categoryId": zoho_config['product_category_id'],
         "status": "Published"
     }
     
     try:
-        response = requests.post(
-            "https://desk.zoho.com/api/v1/articles",
-            headers=headers,
-            data=json.dumps(body),
-            timeout=30
-        )
+        client = get_zoho_client()
+        _, response = client.upsert_article(body)
+        client.save_index()
         return response.json()
     except Exception as e:
         print(f"Erreur lors de la création de l'article : {e}")
@@ -4,9 +4,8 @@ Gère l'obtention et le rafraîchissement des tokens d'accès.
 """
 
 import time
-import requests
 
-from src.config.settings import load_config, save_config
+from src.config.settings import ZOHO_TOKEN_URL, load_config, update_config
 
 
 class ZohoAuth:
@@ -25,46 +24,57 @@ class ZohoAuth:
         self.token_timestamp = config.get("ACCESS_TOKEN_TAMESTAMP")
         self.access_token = config.get("ZOHO_ACCESS_TOKEN")
 
+    def save_tokens(self, remove_refresh_token=False):
+        """
+        Enregistre l'access_token, sa durée de validité, sa date de génération
+        et le refresh_token en une seule écriture atomique de config.txt.
+
+        Args:
+            remove_refresh_token: Supprimer ZOHO_REFRESH_TOKEN au lieu de l'enregistrer
+        """
+        updates = {
+            "ZOHO_ACCESS_TOKEN": self.access_token,
+            "ACCESS_TOKEN_EXPIRES_IN": self.expires_in,
+            "ACCESS_TOKEN_TAMESTAMP": self.token_timestamp,
+        }
+        if remove_refresh_token:
+            update_config(updates, remove=("ZOHO_REFRESH_TOKEN",))
+            self.refresh_token = None
+        else:
+            updates["ZOHO_REFRESH_TOKEN"] = self.refresh_token
+            update_config(updates)
+        print("Tokens enregistrés avec succès.")
+
     def save_access_token(self, access_token):
         """Enregistrer l'access_token dans le fichier config.txt"""
         if access_token:
-            config = load_config()
-            config["ZOHO_ACCESS_TOKEN"] = access_token
-            save_config(config)
+            update_config({"ZOHO_ACCESS_TOKEN": access_token})
             self.access_token = access_token
             print("Access token enregistré avec succès.")
 
     def save_expire_access_token(self, expires_in):
         """Enregistrer la durée d'expiration"""
         if expires_in:
-            config = load_config()
-            config["ACCESS_TOKEN_EXPIRES_IN"] = expires_in
-            save_config(config)
+            update_config({"ACCESS_TOKEN_EXPIRES_IN": expires_in})
             self.expires_in = expires_in
 
     def save_access_token_timestamp(self, token_timestamp):
         """Enregistrer la date de génération du token"""
         if token_timestamp:
-            config = load_config()
-            config["ACCESS_TOKEN_TAMESTAMP"] = token_timestamp
-            save_config(config)
+            update_config({"ACCESS_TOKEN_TAMESTAMP": token_timestamp})
             self.token_timestamp = token_timestamp
 
     def save_refresh_token(self, refresh_token):
         """Enregistrer le refresh_token dans le fichier config.txt"""
         if refresh_token:
-            config = load_config()
-            config["ZOHO_REFRESH_TOKEN"] = refresh_token
-            save_config(config)
+            update_config({"ZOHO_REFRESH_TOKEN": refresh_token})
             self.refresh_token = refresh_token
             print("Refresh token enregistré avec succès.")
 
     def delete_refresh_token(self):
         """Supprimer le refresh_token du fichier config.txt uniquement s'il existe"""
-        config = load_config()
-        if "ZOHO_REFRESH_TOKEN" in config:
-            del config["ZOHO_REFRESH_TOKEN"]
-            save_config(config)
+        if "ZOHO_REFRESH_TOKEN" in load_config():
+            update_config({}, remove=("ZOHO_REFRESH_TOKEN",))
             self.refresh_token = None
             print("ZOHO_REFRESH_TOKEN supprimé du fichier config.txt !")
 
@@ -86,7 +96,9 @@ class ZohoAuth:
             "code": self.granted_code
         }
 
-        response = requests.post("https://accounts.zoho.com/oauth/v2/token", data=data)
+        import requests
+
+        response = requests.post(ZOHO_TOKEN_URL, data=data)
         token_data = response.json()
 
         if response.status_code == 200 and "access_token" in token_data:
@@ -94,17 +106,13 @@ class ZohoAuth:
             self.expires_in = token_data["expires_in"]
             self.token_timestamp = time.time()
 
-            self.save_access_token(self.access_token)
-            self.save_expire_access_token(self.expires_in)
-            self.save_access_token_timestamp(self.token_timestamp)
-
             if "refresh_token" in token_data:
                 self.refresh_token = token_data["refresh_token"]
-                self.save_refresh_token(self.refresh_token)
+                self.save_tokens()
                 print("Nouveau Refresh Token reçu et enregistré.")
             else:
                 print("ATTENTION : Aucun refresh_token renvoyé !")
-                self.delete_refresh_token()  # Supprimer si pas de refresh_token
+                self.save_tokens(remove_refresh_token=True)  # Supprimer si pas de refresh_token
 
             print("Access token généré avec succès !")
             return self.access_token
@@ -127,7 +135,9 @@ class ZohoAuth:
             "refresh_token": self.refresh_token
         }
 
-        response = requests.post("https://accounts.zoho.com/oauth/v2/token", data=data)
+        import requests
+
+        response = requests.post(ZOHO_TOKEN_URL, data=data)
         token_data = response.json()
 
         if response.status_code == 200 and "access_token" in token_data:
@@ -135,15 +145,12 @@ class ZohoAuth:
             self.expires_in = token_data["expires_in"]
             self.token_timestamp = time.time()
 
-            self.save_access_token(self.access_token)
-            self.save_expire_access_token(self.expires_in)
-            self.save_access_token_timestamp(self.token_timestamp)
-
-            # Si un nouveau refresh_token est renvoyé, on l'enregistre
+            # Si un nouveau refresh_token est renvoyé, on l'enregistre avec le reste
             new_refresh_token = token_data.get("refresh_token")
             if new_refresh_token:
                 self.refresh_token = new_refresh_token
-                self.save_refresh_token(new_refresh_token)
+            self.save_tokens()
+            if new_refresh_token:
                 print(f"Nouveau Refresh Token reçu et enregistré : {self.refresh_token}")
             else:
                 print("Aucun nouveau refresh_token reçu.")
@@ -156,13 +163,65 @@ class ZohoAuth:
             self.delete_refresh_token()
             return None
 
-    def get_valid_access_token(self):
-        """Retourne un access token valide, en le rafraîchissant si nécessaire"""
+    def token_expires_at(self):
+        """Retourne la date d'expiration (epoch) de l'access token, ou 0 si inconnue"""
+        try:
+            return float(self.token_timestamp) + float(self.expires_in)
+        except (TypeError, ValueError):
+            return 0.0
+
+    def get_valid_access_token(self, margin=0):
+        """
+        Retourne un access token valide, en le rafraîchissant si nécessaire.
+
+        Args:
+            margin: Rafraîchir si le token expire dans moins de `margin` secondes
+        """
         if not self.refresh_token:
             print("generation refresh token depuis granted token!")
             return self.get_access_token()
        
-        if not self.access_token or (time.time() - float(self.token_timestamp)) >= float(self.expires_in):
+        if not self.access_token or time.time() + margin >= self.token_expires_at():
             print("Token expiré ou inexistant. Récupération en cours...")
             return self.refresh_access_token()
         return self.access_token
+
+
+def refresh_zoho_token() -> bool:
+    """
+    Rafraîchit le token Zoho et le sauvegarde dans config.txt.
+
+    Returns:
+        True si un token valide a été obtenu
+    """
+    config = load_config()
+    client_id = config.get("ZOHO_CLIENT_ID")
+    client_secret = config.get("ZOHO_CLIENT_SECRET")
+    granted_code = config.get("GRANTED_CODE")
+
+    if not client_id or not client_secret:
+        print("❌ Erreur : ZOHO_CLIENT_ID ou ZOHO_CLIENT_SECRET manquant dans config.txt")
+        return False
+
+    zoho_auth = ZohoAuth(client_id, client_secret, granted_code)
+
+    print("\n📋 État actuel :")
+    print(f"   - Access Token : {'✅ Présent' if zoho_auth.access_token else '❌ Absent'}")
+    print(f"   - Refresh Token : {'✅ Présent' if zoho_auth.refresh_token else '❌ Absent'}")
+    print(f"   - Granted Code : {'✅ Présent' if granted_code else '❌ Absent'}")
+
+    print("\n🔄 Rafraîchissement en cours...")
+    token = zoho_auth.get_valid_access_token()
+
+    if token:
+        print("\n✅ Token rafraîchi avec succès !")
+        print(f"   Nouveau token : {token[:20]}...")
+        print(f"\n💾 Le token a été sauvegardé dans config.txt")
+        return True
+
+    print("\n❌ Échec du rafraîchissement du token")
+    print("\n💡 Solutions possibles :")
+    print("   1. Vérifiez que ZOHO_CLIENT_ID et ZOHO_CLIENT_SECRET sont corrects")
+    print("   2. Si vous n'avez pas de REFRESH_TOKEN, générez un nouveau GRANTED_CODE")
+    print("   3. Consultez la documentation Zoho OAuth pour obtenir un nouveau code")
+    return False
@@ -0,0 +1,129 @@
+"""
+Mode « staging » : les articles rendus sont écrits dans un bundle au lieu d'être publiés.
+
+Le bundle est un fichier JSONL compressé en gzip (une ligne par article).
+L'extraction peut ainsi tourner sur une machine sans identifiants Zoho ; le
+bundle est ensuite rejoué sur la machine qui les possède (publish_bundle.py),
+via l'outbox et le publisher habituels (concurrence, débit, reprises).
+
+Les catégories Zoho ne sont pas connues au moment du staging : chaque article
+porte un type ("product" ou "tutorial") et sa catégorie est choisie au rejeu.
+"""
+
+import gzip
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from src.config.settings import STAGING_BUNDLE_FILE, get_zoho_config, get_zoho_tutorial_category_id
+from src.zoho.outbox import get_outbox
+from src.zoho.payload import write_article_json, write_article_payload
+from src.zoho.publisher import get_publisher
+
+KIND_PRODUCT = "product"
+KIND_TUTORIAL = "tutorial"
+
+
+class StagingBundle:
+    """Bundle gzip JSONL dans lequel les articles rendus sont ajoutés au fil de l'eau."""
+
+    def __init__(self, path: Path = STAGING_BUNDLE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Mode ajout : plusieurs exécutions (produits, tutoriels) peuvent remplir le même bundle
+        self._file = gzip.open(self.path, "ab")
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def add(self, kind: str, metadata: Dict, answer_parts: Iterable[str], label: str = None):
+        """
+        Ajoute un article au bundle.
+
+        Args:
+            kind: Type d'article (KIND_PRODUCT ou KIND_TUTORIAL), qui détermine sa catégorie
+            metadata: Champs de l'article hors "answer"
+            answer_parts: Morceaux du HTML, dans l'ordre
+            label: Libellé affiché dans les messages
+        """
+        head = json.dumps({"kind": kind, "label": label or metadata.get("title", "")}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(f'{head[:-1]}, "body": '.encode("utf-8"))
+            write_article_json(self._file, metadata, answer_parts)
+            self._file.write(b"}\n")
+            self.count += 1
+        print(f"📦 Article ajouté au bundle : {label or metadata.get('title', '')}")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def iter_bundle(path: Path) -> Iterator[Dict]:
+    """
+    Parcourt les articles d'un bundle, un à un.
+
+    Yields:
+        Dictionnaires { "kind", "label", "body" }
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+_bundle: Optional[StagingBundle] = None
+
+
+def enable_staging(path: Path = STAGING_BUNDLE_FILE) -> StagingBundle:
+    """Active le mode staging : les articles sont écrits dans le bundle au lieu d'être publiés."""
+    global _bundle
+    if _bundle is None:
+        _bundle = StagingBundle(path)
+        print(f"📦 Mode staging : les articles sont écrits dans {_bundle.path}")
+    return _bundle
+
+
+def get_staging_bundle() -> Optional[StagingBundle]:
+    """Retourne le bundle du mode staging, ou None si les articles sont publiés directement."""
+    return _bundle
+
+
+def close_staging():
+    """Ferme le bundle du mode staging (fin de l'exécution)."""
+    global _bundle
+    if _bundle is not None:
+        _bundle.close()
+        print(f"📦 {_bundle.count} article(s) écrit(s) dans {_bundle.path}")
+        _bundle = None
+
+
+def replay_bundle(path: Path = STAGING_BUNDLE_FILE) -> Dict[str, int]:
+    """
+    Publie les articles d'un bundle via l'outbox et le publisher.
+
+    Args:
+        path: Bundle à rejouer
+
+    Returns:
+        Résultat de la publication (voir ZohoPublisher.wait)
+    """
+    categories = {
+        KIND_PRODUCT: get_zoho_config()["product_category_id"],
+        KIND_TUTORIAL: get_zoho_tutorial_category_id(),
+    }
+    outbox = get_outbox()
+    publisher = get_publisher()
+    publisher.start()
+
+    count = 0
+    for record in iter_bundle(path):
+        body = record["body"]
+        answer = body.pop("answer", "")
+        if not body.get("categoryId"):
+            body["categoryId"] = categories.get(record.get("kind"), categories[KIND_PRODUCT])
+        outbox.enqueue(write_article_payload(body, [answer]), label=record.get("label"))
+        count += 1
+    print(f"📬 {count} article(s) du bundle déposé(s) dans l'outbox")
+
+    return publisher.wait()
@@ -0,0 +1,389 @@
+"""
+Client de l'API Zoho Desk pour la base de connaissances.
+
+Maintient un index local permalink -> articleId, construit une seule fois en
+parcourant les articles des catégories configurées puis persisté entre les
+exécutions, afin de mettre à jour les articles existants au lieu de les recréer.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple, Union
+
+from src.config.settings import (
+    ZOHO_API_BASE,
+    ZOHO_ARTICLE_INDEX_FILE,
+    ZOHO_PUBLISH_WORKERS,
+    ZOHO_REQUESTS_PER_SECOND,
+    ZOHO_REQUESTS_BURST,
+    ZOHO_MAX_RETRIES,
+    get_zoho_config,
+)
+from src.utils.metrics import add, span
+from src.utils.run_report import increment
+from src.zoho.payload import SpooledPayload
+from src.zoho.rate_limit import TokenBucket, retry_after_seconds, backoff_delay
+from src.zoho.token_manager import TokenManager, get_token_manager
+
+if TYPE_CHECKING:
+    import requests
+
+ARTICLES_PAGE_SIZE = 50  # Maximum accepté par l'API Zoho Desk
+METADATA_FIELDS = ("title", "permalink", "categoryId", "status")
+
+
+def metadata_hash(body: Dict) -> str:
+    """Calcule l'empreinte stable des métadonnées (METADATA_FIELDS) d'un article."""
+    metadata = {field: body.get(field) for field in METADATA_FIELDS}
+    return hashlib.sha256(json.dumps(metadata, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def article_hashes(body: Dict) -> Tuple[str, str]:
+    """
+    Calcule les empreintes stables d'un article.
+
+    Args:
+        body: Payload de l'article
+
+    Returns:
+        Tuple (empreinte du contenu HTML, empreinte des métadonnées)
+    """
+    content_hash = hashlib.sha256(body.get("answer", "").encode("utf-8")).hexdigest()
+    return content_hash, metadata_hash(body)
+
+
+def is_transient(status_code: int) -> bool:
+    """Indique si un code HTTP correspond à une erreur temporaire à reprendre."""
+    return status_code == 429 or status_code >= 500
+
+
+def read_article_index(index_file: Path = ZOHO_ARTICLE_INDEX_FILE) -> Dict:
+    """
+    Relit l'index local des articles publiés.
+
+    Returns:
+        { "synced_categories": [...], "articles": { permalink: article } } (vide si absent ou illisible)
+    """
+    index_file = Path(index_file)
+    if not index_file.exists():
+        return {}
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Index des articles Zoho illisible ({e}), il sera reconstruit.")
+        return {}
+
+
+class ZohoDeskClient:
+    """
+    Crée ou met à jour les articles Zoho Desk en s'appuyant sur un index local.
+
+    Toutes les requêtes passent par un seau à jetons commun et sont reprises avec
+    un backoff exponentiel (ou le délai Retry-After) sur 429, 5xx et erreurs réseau.
+    Le token d'accès est fourni par le TokenManager et renouvelé une fois si Zoho
+    le refuse (401). Le client peut être partagé entre plusieurs threads.
+    """
+
+    def __init__(self, org_id: str, token_manager: TokenManager = None,
+                 index_file: Path = ZOHO_ARTICLE_INDEX_FILE,
+                 rate_limiter: TokenBucket = None, max_retries: int = ZOHO_MAX_RETRIES):
+        self.token_manager = token_manager or get_token_manager()
+        self.org_id = org_id
+        self.index_file = Path(index_file)
+        self.articles: Dict[str, Dict] = {}
+        self.synced_categories = set()
+        self._index_dirty = False
+        self.rate_limiter = rate_limiter or TokenBucket(ZOHO_REQUESTS_PER_SECOND, ZOHO_REQUESTS_BURST)
+        self.max_retries = max_retries
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(ZOHO_PUBLISH_WORKERS, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.RLock()
+        self._permalink_locks: Dict[str, threading.Lock] = {}
+        self._category_locks: Dict[str, threading.Lock] = {}
+        self._load_index()
+
+    # --- Index local ---
+
+    def _load_index(self):
+        data = read_article_index(self.index_file)
+        self.articles = data.get("articles", {})
+        self.synced_categories = set(data.get("synced_categories", []))
+
+    def save_index(self):
+        """
+        Enregistre l'index permalink -> article sur le disque s'il a changé (écriture atomique).
+        Appelé une fois en fin de publication (ZohoPublisher.wait), et non à chaque article.
+        """
+        with self._lock:
+            if not self._index_dirty:
+                return
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_file.with_name(f"{self.index_file.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "synced_categories": sorted(self.synced_categories),
+                    "articles": self.articles,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_file)
+            self._index_dirty = False
+
+    def _remember(self, article: Dict, hashes: Tuple[str, str] = (None, None)):
+        permalink = article.get("permalink")
+        if permalink and article.get("id"):
+            with self._lock:
+                self.articles[permalink] = {
+                    "id": str(article["id"]),
+                    "categoryId": article.get("categoryId"),
+                    "title": article.get("title"),
+                    "content_hash": hashes[0],
+                    "meta_hash": hashes[1],
+                }
+                self._index_dirty = True
+
+    # --- Appels API ---
+
+    @staticmethod
+    def _json(r: "requests.Response") -> Dict:
+        try:
+            return r.json() or {}
+        except ValueError:
+            return {}
+
+    def _headers(self, access_token: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Zoho-oauthtoken {access_token}",
+            "orgId": self.org_id,
+            "Content-Type": "application/json"
+        }
+
+    def _send(self, method: str, url: str, access_token: str, payload: SpooledPayload = None,
+              **kwargs) -> "requests.Response":
+        headers = self._headers(access_token)
+        with span("zoho_request_seconds", method=method):
+            if payload is None:
+                return self.session.request(method, url, headers=headers, timeout=30, **kwargs)
+            add("zoho_request_bytes_total", payload.size, method=method)
+            # Le fichier est rouvert à chaque essai et envoyé en flux (Content-Length connu)
+            with payload.open() as body:
+                return self.session.request(method, url, headers=headers, timeout=30, data=body, **kwargs)
+
+    def _request(self, method: str, url: str, payload: SpooledPayload = None, **kwargs) -> "requests.Response":
+        """
+        Envoie une requête en respectant le débit autorisé et en reprenant
+        les erreurs transitoires (429, 5xx, erreurs réseau).
+        Un 401 provoque un renouvellement du token puis un seul nouvel essai.
+
+        Args:
+            payload: Corps de la requête écrit sur disque, envoyé en flux
+        """
+        import requests
+
+        attempt = 0
+        token_renewed = False
+        while True:
+            self.rate_limiter.acquire()
+            access_token = self.token_manager.get_token()
+            try:
+                r = self._send(method, url, access_token, payload, **kwargs)
+            except requests.RequestException as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                reason = str(e)
+            else:
+                if r.status_code == 401 and not token_renewed:
+                    print("🔑 Token Zoho refusé (401), renouvellement...")
+                    self.token_manager.invalidate(access_token)
+                    token_renewed = True
+                    continue
+                if not is_transient(r.status_code) or attempt >= self.max_retries:
+                    return r
+                delay = retry_after_seconds(r.headers.get("Retry-After"))
+                if delay is not None:
+                    # Zoho demande explicitement d'attendre : tous les threads patientent
+                    self.rate_limiter.pause(delay)
+                else:
+                    delay = backoff_delay(attempt)
+                reason = f"HTTP {r.status_code}"
+            attempt += 1
+            print(f"⏳ Zoho {method} {reason}, nouvel essai {attempt}/{self.max_retries} dans {delay:.1f}s")
+            time.sleep(delay)
+
+    def list_articles(self, category_id: str) -> Iterator[Dict]:
+        """
+        Parcourt, page par page, les articles d'une catégorie.
+
+        Args:
+            category_id: ID de la catégorie Zoho Desk
+
+        Yields:
+            Articles tels que renvoyés par l'API
+        """
+        start = 1
+        while True:
+            params = {"categoryId": category_id, "from": start, "limit": ARTICLES_PAGE_SIZE}
+            r = self._request("GET", f"{ZOHO_API_BASE}/articles", params=params)
+            if r.status_code == 204:
+                return
+            r.raise_for_status()
+            data = self._json(r).get("data", [])
+            yield from data
+            if len(data) < ARTICLES_PAGE_SIZE:
+                return
+            start += ARTICLES_PAGE_SIZE
+
+    def sync_category(self, category_id: str, force: bool = False):
+        """
+        Indexe les articles existants d'une catégorie (une seule fois, sauf si force=True).
+
+        Args:
+            category_id: ID de la catégorie Zoho Desk
+            force: Reparcourir la catégorie même si elle est déjà indexée
+        """
+        if not category_id or (category_id in self.synced_categories and not force):
+            return
+        with self._lock:
+            category_lock = self._category_locks.setdefault(category_id, threading.Lock())
+        # Un seul parcours par catégorie ; le verrou du client n'est pris que pour fusionner le résultat
+        with category_lock:
+            if category_id in self.synced_categories and not force:
+                return
+            try:
+                articles = list(self.list_articles(category_id))
+            except Exception as e:
+                # Sans index, on risquerait de recréer des articles existants
+                print(f"⚠️ Impossible d'indexer la catégorie {category_id} : {e}")
+                raise
+            with self._lock:
+                for article in articles:
+                    if article.get("permalink") not in self.articles:
+                        self._remember(article)
+                self.synced_categories.add(category_id)
+                self._index_dirty = True
+        print(f"📇 {len(articles)} article(s) existant(s) indexé(s) pour la catégorie {category_id}")
+
+    def find_article_id(self, permalink: str) -> Optional[str]:
+        """Retourne l'ID de l'article correspondant au permalink, s'il est connu."""
+        entry = self.articles.get(permalink)
+        return entry["id"] if entry else None
+
+    def create_article(self, body: Union[Dict, SpooledPayload]) -> "requests.Response":
+        """Crée un article (POST /articles)."""
+        if isinstance(body, SpooledPayload):
+            return self._request("POST", f"{ZOHO_API_BASE}/articles", payload=body)
+        return self._request("POST", f"{ZOHO_API_BASE}/articles", data=json.dumps(body))
+
+    def update_article(self, article_id: str, body: Union[Dict, SpooledPayload]) -> "requests.Response":
+        """Met à jour un article existant (PATCH /articles/{id})."""
+        url = f"{ZOHO_API_BASE}/articles/{article_id}"
+        if isinstance(body, SpooledPayload):
+            return self._request("PATCH", url, payload=body)
+        return self._request("PATCH", url, data=json.dumps(body))
+
+    def upsert_article(self, body: Union[Dict, SpooledPayload]) -> Tuple[str, Optional["requests.Response"]]:
+        """
+        Crée l'article, ou le met à jour si son permalink existe déjà dans Zoho Desk.
+
+        Les empreintes du contenu et des métadonnées sont comparées à celles de la
+        dernière publication : rien n'est envoyé si rien n'a changé, et seules les
+        métadonnées sont envoyées (PATCH) si le HTML est identique.
+
+        Args:
+            body: Payload de l'article (title, permalink, answer, categoryId, status),
+                ou SpooledPayload dont le corps est envoyé en flux depuis le disque
+
+        Returns:
+            Tuple (action, réponse) où action vaut "created", "updated", "skipped"
+            ou "failed" (réponse None pour "skipped")
+        """
+        metadata = body.metadata if isinstance(body, SpooledPayload) else body
+        permalink = metadata.get("permalink")
+        with self._lock:
+            permalink_lock = self._permalink_locks.setdefault(permalink, threading.Lock())
+        # Deux publications simultanées du même permalink ne doivent pas créer deux articles
+        with permalink_lock:
+            action, r = self._upsert(body)
+        if action != "failed":
+            increment(f"articles_{action}")
+        return action, r
+
+    def _upsert(self, body: Union[Dict, SpooledPayload]) -> Tuple[str, Optional["requests.Response"]]:
+        if isinstance(body, SpooledPayload):
+            metadata = body.metadata
+            hashes = (body.content_hash, metadata_hash(metadata))
+        else:
+            metadata = body
+            hashes = article_hashes(body)
+        self.sync_category(metadata.get("categoryId"))
+        permalink = metadata.get("permalink")
+        entry = self.articles.get(permalink)
+
+        if entry:
+            action, r = self._update_existing(entry, body, metadata, hashes)
+            if action != "missing":
+                return action, r
+            # L'article a été supprimé dans Zoho : on le recrée
+            with self._lock:
+                self.articles.pop(permalink, None)
+                self._index_dirty = True
+
+        r = self.create_article(body)
+        if r.status_code in (200, 201):
+            self._remember({**metadata, **self._json(r)}, hashes)
+            return "created", r
+        if r.status_code == 422:
+            # Permalink déjà utilisé (article créé hors de l'index local) : on réindexe puis on met à jour
+            self.sync_category(metadata.get("categoryId"), force=True)
+            entry = self.articles.get(permalink)
+            if entry:
+                action, update_r = self._update_existing(entry, body, metadata, hashes)
+                if action != "missing":
+                    return action, update_r
+        return "failed", r
+
+    def _update_existing(self, entry: Dict, body: Union[Dict, SpooledPayload], metadata: Dict,
+                         hashes: Tuple[str, str]) -> Tuple[str, Optional["requests.Response"]]:
+        """Met à jour un article indexé ; action "missing" s'il n'existe plus dans Zoho (404)."""
+        content_hash, meta_hash = hashes
+        if entry.get("content_hash") == content_hash:
+            if entry.get("meta_hash") == meta_hash:
+                return "skipped", None
+            patch_body = {field: metadata[field] for field in METADATA_FIELDS if field in metadata}
+        else:
+            patch_body = body
+
+        r = self.update_article(entry["id"], patch_body)
+        if r.status_code in (200, 201):
+            self._remember({**metadata, **self._json(r), "id": entry["id"], "permalink": metadata.get("permalink")},
+                           hashes)
+            return "updated", r
+        if r.status_code == 404:
+            return "missing", r
+        return "failed", r
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_zoho_client() -> ZohoDeskClient:
+    """Retourne le client Zoho Desk partagé par le processus."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                zoho_config = get_zoho_config()
+                _client = ZohoDeskClient(zoho_config["org_id"])
+    return _client
@@ -0,0 +1,249 @@
+"""
+File d'attente persistante (outbox) des articles à publier sur Zoho Desk.
+
+Le crawl y dépose les payloads rendus sans attendre Zoho ; le publisher les
+envoie en parallèle et les reprend en cas d'erreur. La file est stockée dans
+SQLite : elle survit aux redémarrages et peut être partagée entre processus.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+from src.config.settings import ZOHO_OUTBOX_FILE, OUTBOX_CLAIM_TIMEOUT
+from src.zoho.payload import SpooledPayload
+from src.zoho.rate_limit import backoff_delay
+
+STATUS_PENDING = "pending"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    permalink TEXT,
+    label TEXT,
+    body TEXT,
+    payload TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    last_action TEXT,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_permalink ON outbox (permalink, status);
+"""
+
+
+class Outbox:
+    """File d'attente SQLite des articles à publier."""
+
+    def __init__(self, path: Path = ZOHO_OUTBOX_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+            if "payload" not in columns:
+                # Outbox créée avant l'écriture des payloads en flux
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN payload TEXT")
+        self.recover_stale_claims()
+
+    def _transaction(self, fn):
+        """Exécute fn(conn) dans une transaction exclusive vis-à-vis des autres processus."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def enqueue(self, body: Union[Dict, SpooledPayload], label: str = None) -> int:
+        """
+        Ajoute un article à publier. Un article encore en attente avec le même
+        permalink est remplacé par la version la plus récente.
+
+        Args:
+            body: Payload de l'article, ou SpooledPayload écrit sur disque (seuls
+                ses métadonnées et le chemin du fichier sont stockés dans la file)
+            label: Libellé affiché dans les messages
+
+        Returns:
+            Identifiant de l'entrée dans la file
+        """
+        if isinstance(body, SpooledPayload):
+            metadata = body.metadata
+            spooled = json.dumps(body.to_dict())
+        else:
+            metadata = body
+            spooled = None
+        permalink = metadata.get("permalink")
+        stored_body = json.dumps(metadata, ensure_ascii=False)
+        label = label or metadata.get("title", "")
+
+        def _enqueue(conn):
+            now = time.time()
+            row = conn.execute(
+                "SELECT id, payload FROM outbox WHERE permalink = ? AND status = ? ORDER BY id DESC LIMIT 1",
+                (permalink, STATUS_PENDING),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE outbox SET body = ?, payload = ?, label = ?, next_attempt_at = 0, updated_at = ? "
+                    "WHERE id = ?",
+                    (stored_body, spooled, label, now, row["id"]),
+                )
+                return row["id"], row["payload"]
+            cur = conn.execute(
+                "INSERT INTO outbox (permalink, label, body, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (permalink, label, stored_body, spooled, STATUS_PENDING, now, now),
+            )
+            return cur.lastrowid, None
+
+        entry_id, replaced_payload = self._transaction(_enqueue)
+        if replaced_payload:
+            self._delete_payload(replaced_payload)
+        return entry_id
+
+    @staticmethod
+    def _delete_payload(spooled: Optional[str]):
+        if spooled:
+            SpooledPayload.from_dict(json.loads(spooled), {}).delete()
+
+    def claim(self, limit: int, exclude: Iterable[int] = ()) -> List[Dict]:
+        """
+        Réserve jusqu'à `limit` articles dont la publication est due.
+
+        Args:
+            limit: Nombre maximal d'articles à réserver
+            exclude: Identifiants à ignorer (ex: tentatives épuisées pour cette exécution)
+
+        Returns:
+            Liste de dictionnaires { "id", "label", "body", "attempts" } ; "body" est
+            un SpooledPayload si l'article a été écrit sur disque
+        """
+        if limit <= 0:
+            return []
+        exclude = list(exclude)
+
+        def _claim(conn):
+            now = time.time()
+            query = ("SELECT id, label, body, payload, attempts FROM outbox "
+                     "WHERE status = ? AND next_attempt_at <= ?")
+            params = [STATUS_PENDING, now]
+            if exclude:
+                query += f" AND id NOT IN ({','.join('?' * len(exclude))})"
+                params.extend(exclude)
+            query += " ORDER BY next_attempt_at, id LIMIT ?"
+            params.append(limit)
+            rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+            for row in rows:
+                conn.execute(
+                    "UPDATE outbox SET status = ?, claimed_at = ?, updated_at = ? WHERE id = ?",
+                    (STATUS_IN_PROGRESS, now, now, row["id"]),
+                )
+                row["body"] = json.loads(row["body"])
+                spooled = row.pop("payload")
+                if spooled:
+                    row["body"] = SpooledPayload.from_dict(json.loads(spooled), row["body"])
+            return rows
+
+        return self._transaction(_claim)
+
+    def mark_done(self, entry_id: int, action: str):
+        """Marque un article comme publié (le payload n'est plus conservé)."""
+        def _done(conn):
+            row = conn.execute("SELECT payload FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            conn.execute(
+                "UPDATE outbox SET status = ?, body = NULL, payload = NULL, last_action = ?, last_error = NULL, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_DONE, action, time.time(), entry_id),
+            )
+            return row["payload"] if row else None
+        self._delete_payload(self._transaction(_done))
+
+    def mark_failed(self, entry_id: int, error: str, transient: bool):
+        """
+        Enregistre un échec de publication.
+
+        Un échec transitoire remet l'article en attente avec un délai croissant ;
+        un échec définitif (ex: payload refusé) le sort de la file et supprime son payload.
+        """
+        def _failed(conn):
+            now = time.time()
+            row = conn.execute("SELECT attempts, payload FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+            attempts = (row["attempts"] if row else 0) + 1
+            if transient:
+                conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (STATUS_PENDING, attempts, error, now + backoff_delay(attempts - 1), now, entry_id),
+                )
+                return None
+            conn.execute(
+                "UPDATE outbox SET status = ?, payload = NULL, attempts = ?, last_error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (STATUS_FAILED, attempts, error, now, entry_id),
+            )
+            return row["payload"] if row else None
+        self._delete_payload(self._transaction(_failed))
+
+    def recover_stale_claims(self, timeout: float = OUTBOX_CLAIM_TIMEOUT):
+        """Remet en attente les articles réservés par un processus interrompu."""
+        def _recover(conn):
+            cur = conn.execute(
+                "UPDATE outbox SET status = ?, claimed_at = NULL WHERE status = ? AND claimed_at < ?",
+                (STATUS_PENDING, STATUS_IN_PROGRESS, time.time() - timeout),
+            )
+            return cur.rowcount
+        recovered = self._transaction(_recover)
+        if recovered:
+            print(f"📬 {recovered} article(s) interrompu(s) remis dans la file de publication")
+
+    def next_due(self, exclude: Iterable[int] = ()) -> Optional[float]:
+        """Retourne l'heure de la prochaine publication prévue, ou None si la file est vide."""
+        exclude = list(exclude)
+        query = "SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?"
+        params = [STATUS_PENDING]
+        if exclude:
+            query += f" AND id NOT IN ({','.join('?' * len(exclude))})"
+            params.extend(exclude)
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def counts(self) -> Dict[str, int]:
+        """Nombre d'articles par statut."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """Retourne l'outbox partagée par le processus."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = Outbox()
+    return _outbox
@@ -0,0 +1,151 @@
+"""
+Construction en flux des payloads JSON des articles Zoho Desk.
+
+Le HTML d'un article (souvent plusieurs dizaines de Mo à cause des images en
+base64) est écrit morceau par morceau dans un fichier JSON, sans jamais être
+assemblé en une seule chaîne. Le fichier est ensuite envoyé tel quel comme
+corps de la requête, et l'empreinte du contenu est calculée pendant l'écriture.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from src.config.settings import ZOHO_PAYLOAD_FOLDER
+
+ANSWER_SEPARATOR = "\n"  # Séparateur entre les morceaux du HTML, comme "\n".join(html)
+
+
+def _json_string_body(text: str) -> bytes:
+    """Encode un texte en chaîne JSON, sans les guillemets qui l'entourent."""
+    return json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+class SpooledPayload:
+    """
+    Payload d'article écrit sur disque.
+
+    Attributes:
+        path: Fichier JSON contenant le corps complet de la requête
+        metadata: Champs de l'article hors "answer" (title, permalink, categoryId, status)
+        content_hash: Empreinte SHA-256 du HTML (identique à article_hashes())
+        size: Taille du fichier en octets
+    """
+
+    def __init__(self, path: Path, metadata: Dict, content_hash: str, size: int):
+        self.path = Path(path)
+        self.metadata = metadata
+        self.content_hash = content_hash
+        self.size = size
+
+    def open(self):
+        """Ouvre le corps de la requête en lecture binaire (à refaire à chaque envoi)."""
+        return open(self.path, "rb")
+
+    def delete(self):
+        """Supprime le fichier du payload."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def to_dict(self) -> Dict:
+        """Représentation JSON conservée dans l'outbox."""
+        return {"path": str(self.path), "content_hash": self.content_hash, "size": self.size}
+
+    @classmethod
+    def from_dict(cls, data: Dict, metadata: Dict) -> "SpooledPayload":
+        return cls(data["path"], metadata, data["content_hash"], data["size"])
+
+
+def write_article_json(f, metadata: Dict, answer_parts: Iterable[str]) -> Tuple[str, int]:
+    """
+    Écrit le corps JSON d'un article dans un fichier binaire déjà ouvert.
+
+    Le résultat est équivalent à json.dumps({**metadata, "answer": "\\n".join(answer_parts)}),
+    mais seul le morceau en cours d'encodage est copié en mémoire.
+
+    Args:
+        f: Fichier ouvert en écriture binaire
+        metadata: Champs de l'article hors "answer"
+        answer_parts: Morceaux du HTML, dans l'ordre
+
+    Returns:
+        Tuple (empreinte SHA-256 du HTML, nombre d'octets écrits)
+    """
+    content_hash = hashlib.sha256()
+    separator = ANSWER_SEPARATOR.encode("utf-8")
+    size = 0
+    head = json.dumps(metadata, ensure_ascii=False)[:-1]
+    if metadata:
+        head += ", "
+    chunk = f'{head}"answer": "'.encode("utf-8")
+    f.write(chunk)
+    size += len(chunk)
+    for i, part in enumerate(answer_parts):
+        if i:
+            content_hash.update(separator)
+            chunk = _json_string_body(ANSWER_SEPARATOR)
+            f.write(chunk)
+            size += len(chunk)
+        content_hash.update(part.encode("utf-8"))
+        chunk = _json_string_body(part)
+        f.write(chunk)
+        size += len(chunk)
+    f.write(b'"}')
+    size += 2
+    return content_hash.hexdigest(), size
+
+
+def answer_json_size(answer_parts: Iterable[str]) -> int:
+    """
+    Taille en octets de morceaux HTML une fois encodés dans le champ "answer"
+    (échappement JSON et un séparateur par morceau compris).
+    """
+    separator_size = len(_json_string_body(ANSWER_SEPARATOR))
+    return sum(len(_json_string_body(part)) + separator_size for part in answer_parts)
+
+
+def article_json_size(metadata: Dict, answer_parts: Iterable[str]) -> int:
+    """Taille en octets (majorée d'un séparateur) du corps écrit par write_article_json."""
+    head = json.dumps(metadata, ensure_ascii=False)[:-1]
+    if metadata:
+        head += ", "
+    return len(f'{head}"answer": "'.encode("utf-8")) + answer_json_size(answer_parts) + 2
+
+
+def write_article_payload(metadata: Dict, answer_parts: Iterable[str],
+                          folder: Path = ZOHO_PAYLOAD_FOLDER, path: Optional[Path] = None) -> SpooledPayload:
+    """
+    Écrit le corps JSON d'un article dans un fichier de payload.
+
+    Args:
+        metadata: Champs de l'article hors "answer"
+        answer_parts: Morceaux du HTML, dans l'ordre
+        folder: Dossier des payloads (ignoré si `path` est fourni)
+        path: Fichier de destination (généré si absent)
+
+    Returns:
+        SpooledPayload décrivant le fichier écrit
+    """
+    if path is None:
+        folder = Path(folder)
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{uuid.uuid4().hex}.json"
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+
+    try:
+        with open(tmp_path, "wb") as f:
+            content_hash, size = write_article_json(f, metadata, answer_parts)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+    return SpooledPayload(path, dict(metadata), content_hash, size)
@@ -0,0 +1,182 @@
+"""
+Publication concurrente des articles vers Zoho Desk.
+
+Le publisher vide l'outbox persistante : un thread de fond réserve les articles
+dus et les envoie par un pool de threads borné, pendant que le crawl continue.
+Le débit et les reprises immédiates sur 429 / 5xx sont gérés par le
+ZohoDeskClient ; les articles toujours en échec sont replanifiés dans l'outbox
+avec un délai croissant, puis laissés pour l'exécution suivante.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from src.config.settings import ZOHO_PUBLISH_WORKERS, OUTBOX_RETRIES_PER_RUN
+from src.utils.run_report import increment, record, set_value
+from src.zoho.client import ZohoDeskClient, get_zoho_client, is_transient
+from src.zoho.outbox import Outbox, get_outbox
+
+POLL_INTERVAL = 0.5  # Secondes entre deux consultations de l'outbox quand elle est vide
+
+
+class ZohoPublisher:
+    """Vide l'outbox vers Zoho Desk avec une concurrence bornée."""
+
+    def __init__(self, outbox: Outbox = None, client: ZohoDeskClient = None,
+                 max_workers: int = ZOHO_PUBLISH_WORKERS, retries_per_run: int = OUTBOX_RETRIES_PER_RUN):
+        self.outbox = outbox or get_outbox()
+        self._client = client
+        self.max_workers = max_workers
+        self.retries_per_run = retries_per_run
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="zoho-publish")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0
+        self._run_attempts: Dict[int, int] = {}
+        self._results = {"created": 0, "updated": 0, "skipped": 0, "failed": 0}  # Cette exécution seulement
+        self._exhausted = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def client(self) -> ZohoDeskClient:
+        return self._ensure_client()
+
+    def _ensure_client(self) -> ZohoDeskClient:
+        """Crée le client sur le thread appelant (start/wait), jamais dans les threads de publication."""
+        if self._client is None:
+            self._client = get_zoho_client()
+        return self._client
+
+    def start(self):
+        """Démarre la publication en arrière-plan (le crawl n'attend plus Zoho)."""
+        if self._thread is not None:
+            return
+        self._ensure_client()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="zoho-outbox", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                dispatched = self._dispatch_due()
+            except Exception as e:
+                print(f"❌ Outbox error: {e}")
+                dispatched = 0
+            if not dispatched:
+                self._stop.wait(POLL_INTERVAL)
+
+    def _dispatch_due(self) -> int:
+        """Réserve et lance autant d'articles dus que de places libres dans le pool."""
+        with self._lock:
+            available = self.max_workers - self._in_flight
+            exclude = set(self._exhausted)
+        entries = self.outbox.claim(available, exclude=exclude)
+        for entry in entries:
+            with self._lock:
+                self._in_flight += 1
+            self._executor.submit(self._publish, entry)
+        return len(entries)
+
+    def _publish(self, entry: Dict):
+        label = entry["label"]
+        try:
+            try:
+                action, r = self.client.upsert_article(entry["body"])
+            except Exception as e:
+                import requests  # Déjà chargé par le client
+
+                action, error, transient = "failed", str(e), isinstance(e, requests.RequestException)
+            else:
+                error = f"HTTP {r.status_code}: {r.text[:200]}" if action == "failed" else ""
+                transient = action == "failed" and is_transient(r.status_code)
+
+            if action != "failed":
+                self.outbox.mark_done(entry["id"], action)
+                with self._lock:
+                    self._results[action] = self._results.get(action, 0) + 1
+                self._print_result(label, action, error)
+                return
+
+            self.outbox.mark_failed(entry["id"], error, transient)
+            with self._lock:
+                attempts = self._run_attempts.get(entry["id"], 0) + 1
+                self._run_attempts[entry["id"]] = attempts
+                if transient and attempts >= self.retries_per_run:
+                    self._exhausted.add(entry["id"])
+            if transient and attempts < self.retries_per_run:
+                print(f"⚠️ Zoho error for '{label}' ({error}), replanifié")
+                return
+            self._print_result(label, action, error)
+            with self._lock:
+                self._results["failed"] += 1
+            increment("articles_failed")
+            record("publish_failures", {"title": label, "error": error, "kept_in_outbox": transient})
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    @staticmethod
+    def _print_result(label: str, action: str, error: str):
+        if action == "failed":
+            print(f"❌ Zoho error for '{label}': {error}")
+        elif action == "skipped":
+            print(f"⏭️ Zoho article unchanged, skipped: {label}")
+        else:
+            print(f"✅ Zoho article {action}: {label}")
+
+    def wait(self) -> Dict[str, int]:
+        """
+        Publie tout ce qui reste dans l'outbox, reprises comprises, puis s'arrête.
+
+        Les articles ayant épuisé leurs tentatives pour cette exécution restent
+        dans l'outbox et seront publiés à la prochaine exécution.
+
+        Returns:
+            Résultat de cette exécution { "created", "updated", "skipped", "failed",
+            "pending" }, "pending" comptant les articles restés dans l'outbox
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._ensure_client()
+
+        while True:
+            self._dispatch_due()
+            with self._lock:
+                while self._in_flight:
+                    self._idle.wait()
+                exclude = set(self._exhausted)
+            next_due = self.outbox.next_due(exclude=exclude)
+            if next_due is None:
+                break
+            time.sleep(max(0.0, min(next_due - time.time(), POLL_INTERVAL * 10)))
+
+        self._client.save_index()
+        counts = self.outbox.counts()
+        set_value("outbox", counts)
+        if counts.get("pending"):
+            print(f"📬 {counts['pending']} article(s) restent dans l'outbox pour la prochaine exécution")
+        with self._lock:
+            results = dict(self._results, pending=counts.get("pending", 0))
+        set_value("publish", results)
+        return results
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher() -> ZohoPublisher:
+    """Retourne le publisher partagé par le processus."""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = ZohoPublisher()
+    return _publisher
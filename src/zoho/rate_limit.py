@@ -0,0 +1,77 @@
+"""
+Limitation de débit et calcul des délais de reprise pour l'API Zoho Desk.
+"""
+
+import random
+import threading
+import time
+from typing import Optional
+
+from src.config.settings import ZOHO_BACKOFF_BASE, ZOHO_BACKOFF_MAX
+
+
+class TokenBucket:
+    """
+    Seau à jetons partagé entre les threads de publication.
+
+    Le seau se remplit de `rate` jetons par seconde jusqu'à `capacity` ;
+    chaque requête consomme un jeton et attend s'il n'y en a plus.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à ce qu'un jeton soit disponible, puis le consomme."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Suspend toutes les requêtes pendant `seconds` (ex: en-tête Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+            self._updated = self._paused_until
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Interprète un en-tête Retry-After (secondes ou date HTTP).
+
+    Returns:
+        Délai en secondes, ou None si l'en-tête est absent ou invalide
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # Rare (date HTTP) : importé à la demande
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = ZOHO_BACKOFF_BASE, maximum: float = ZOHO_BACKOFF_MAX) -> float:
+    """Délai de reprise exponentiel avec gigue pour la tentative `attempt` (0, 1, 2...)."""
+    delay = min(maximum, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
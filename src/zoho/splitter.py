@@ -0,0 +1,133 @@
+"""
+Découpage des notices trop volumineuses en plusieurs articles Zoho Desk.
+
+Les sections sont regroupées en parties sous un budget d'octets. Les coupures
+ne dépendent que du contenu : une partie commence à une section « ancre »
+(choisie d'après l'empreinte de son titre) dès que la partie en cours est à
+moitié pleine, ou quand le budget serait dépassé. Modifier une section ne
+déplace donc en général que les coupures voisines, et les autres parties
+gardent leur contenu. Le permalink d'une partie dérive de sa première section
+(et non de son numéro) : une partie ajoutée ou retirée ne renomme pas les
+suivantes, et la mise à jour reste incrémentale.
+"""
+
+import re
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+from src.config.settings import ARTICLE_SPLIT_MIN_FILL, ZOHO_KB_ARTICLE_URL
+
+ANCHOR_MODULUS = 4  # Environ une section sur N peut ouvrir une nouvelle partie
+PERMALINK_MAX_LENGTH = 100  # Longueur maximale utilisée par sanitize_permalink
+PART_SUFFIX = "-partie-"
+PART_SUFFIX_LENGTH = len(PART_SUFFIX) + 8  # Suffixe suivi de l'empreinte en hexadécimal
+PART_PERMALINK_PATTERN = re.compile(r"(.+)-partie-(?:[0-9a-f]{8}|\d+)")  # \d+ : ancien format numéroté
+
+
+def section_key(section: dict) -> int:
+    """Empreinte stable d'une section, indépendante de sa position dans la notice."""
+    key = section.get("title") or section.get("content", "")[:200]
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def split_sections(sizes: Sequence[int], keys: Sequence[int], budget: int,
+                   min_fill: float = ARTICLE_SPLIT_MIN_FILL) -> List[Tuple[int, int]]:
+    """
+    Répartit des sections consécutives en parties d'au plus `budget` octets.
+
+    Une section plus grande que le budget forme à elle seule une partie : les
+    sections ne sont jamais coupées.
+
+    Args:
+        sizes: Taille en octets du HTML de chaque section
+        keys: Empreinte de chaque section (voir section_key)
+        budget: Taille maximale d'une partie en octets
+        min_fill: Remplissage minimal (fraction du budget) avant une coupure sur ancre
+
+    Returns:
+        Liste d'intervalles (début, fin exclue) d'indices de sections
+    """
+    ranges = []
+    start, current = 0, 0
+    for i, (size, key) in enumerate(zip(sizes, keys)):
+        if i > start:
+            over_budget = current + size > budget
+            at_anchor = current >= budget * min_fill and key % ANCHOR_MODULUS == 0
+            if over_budget or at_anchor:
+                ranges.append((start, i))
+                start, current = i, 0
+        current += size
+    if start < len(sizes):
+        ranges.append((start, len(sizes)))
+    return ranges
+
+
+def part_permalink_base(permalink: str) -> str:
+    """Début commun des permalinks des parties d'un article découpé."""
+    return permalink[:PERMALINK_MAX_LENGTH - PART_SUFFIX_LENGTH].rstrip("-")
+
+
+def part_permalinks(permalink: str, first_keys: Sequence[int]) -> List[str]:
+    """
+    Permalinks des parties d'un article découpé.
+
+    Args:
+        permalink: Permalink de l'article parent
+        first_keys: Empreinte (section_key) de la première section de chaque partie
+
+    Returns:
+        Un permalink par partie, stable tant que la partie commence par la même section
+    """
+    base = part_permalink_base(permalink)
+    permalinks, used = [], set()
+    for key in first_keys:
+        while key in used:  # Deux parties ouvertes par des sections de même titre
+            key = zlib.crc32(key.to_bytes(4, "big"))
+        used.add(key)
+        permalinks.append(f"{base}{PART_SUFFIX}{key:08x}")
+    return permalinks
+
+
+def part_parent_base(permalink: str) -> Optional[str]:
+    """Début commun (voir part_permalink_base) si le permalink est celui d'une partie, sinon None."""
+    match = PART_PERMALINK_PATTERN.fullmatch(permalink)
+    return match.group(1) if match else None
+
+
+def article_url(permalink: str) -> str:
+    """URL d'un article de la base de connaissances à partir de son permalink."""
+    return ZOHO_KB_ARTICLE_URL.format(permalink=permalink)
+
+
+def navigation_html(parent_permalink: str, parent_title: str, previous_permalink: str = None,
+                    next_permalink: str = None) -> str:
+    """
+    Barre de navigation d'une partie : partie précédente, sommaire, partie suivante.
+    """
+    links = []
+    if previous_permalink:
+        links.append(f"<a href='{article_url(previous_permalink)}'>&larr; Partie précédente</a>")
+    links.append(f"<a href='{article_url(parent_permalink)}'>Sommaire : {parent_title}</a>")
+    if next_permalink:
+        links.append(f"<a href='{article_url(next_permalink)}'>Partie suivante &rarr;</a>")
+    return ("<div style='display:flex; justify-content:space-between; margin:14px 0; padding:8px; "
+            "border-top:1px solid #ddd; border-bottom:1px solid #ddd;'>"
+            + " ".join(links) + "</div>")
+
+
+def table_of_contents_html(parts: List[dict]) -> str:
+    """
+    Sommaire de l'article parent.
+
+    Args:
+        parts: Liste de { "title", "permalink", "sections": [titres des sections] }
+    """
+    html = ["<h2 style='color:#2874A6;margin-top:14px;'>Sommaire</h2>", "<ol>"]
+    for part in parts:
+        html.append(f"<li><a href='{article_url(part['permalink'])}'>{part['title']}</a>")
+        section_titles = [title for title in part["sections"] if title]
+        if section_titles:
+            html.append("<ul>" + "".join(f"<li>{title}</li>" for title in section_titles) + "</ul>")
+        html.append("</li>")
+    html.append("</ol>")
+    return "\n".join(html)
@@ -0,0 +1,109 @@
+"""
+Gestion centralisée du token d'accès Zoho.
+
+Le token est gardé en mémoire et rafraîchi avant son expiration. Les
+rafraîchissements simultanés sont regroupés : un seul thread appelle Zoho,
+les autres attendent et réutilisent le nouveau token. Entre processus, le
+rafraîchissement se fait sous le verrou de config.txt, après relecture du
+fichier : un token déjà renouvelé par un autre processus est simplement repris.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from src.config.settings import TOKEN_REFRESH_MARGIN, config_lock, load_config
+from src.zoho.auth import ZohoAuth
+
+
+class TokenManager:
+    """Fournit un access token valide, partagé par tous les threads du processus."""
+
+    def __init__(self, margin: float = TOKEN_REFRESH_MARGIN):
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._expires_at = 0.0
+        self._expires_in = float("inf")  # Durée de validité du token, qui borne la marge
+        self._load_from_config()
+
+    def _load_from_config(self):
+        """Reprend le token enregistré dans config.txt (éventuellement par un autre processus)."""
+        config = load_config()
+        token = config.get("ZOHO_ACCESS_TOKEN")
+        try:
+            expires_in = float(config["ACCESS_TOKEN_EXPIRES_IN"])
+            expires_at = float(config["ACCESS_TOKEN_TAMESTAMP"]) + expires_in
+        except (KeyError, ValueError):
+            # Date d'expiration inconnue : le token est utilisé jusqu'au premier 401
+            expires_in, expires_at = float("inf"), float("inf") if token else 0.0
+        self._access_token, self._expires_at, self._expires_in = token, expires_at, expires_in
+
+    def _is_fresh(self) -> bool:
+        # Un token valable moins longtemps que la marge serait toujours périmé :
+        # la marge est limitée à la moitié de sa durée de validité
+        margin = min(self.margin, self._expires_in / 2)
+        return bool(self._access_token) and time.time() + margin < self._expires_at
+
+    def get_token(self) -> str:
+        """
+        Retourne un access token valide, rafraîchi s'il expire bientôt.
+
+        Returns:
+            Access token Zoho
+
+        Raises:
+            RuntimeError: Si aucun token ne peut être obtenu
+        """
+        token = self._access_token
+        if self._is_fresh():
+            return token
+        with self._lock:
+            if not self._is_fresh():
+                self._refresh(stale_token=token)
+            return self._access_token
+
+    def invalidate(self, token: str):
+        """
+        Signale qu'un token a été refusé par Zoho (401) : le prochain appel à
+        get_token() le renouvellera, sauf si un autre thread l'a déjà fait.
+        """
+        with self._lock:
+            if self._access_token == token:
+                self._expires_at = 0.0
+
+    def _refresh(self, stale_token: Optional[str]):
+        with config_lock():
+            self._load_from_config()
+            if self._is_fresh() and self._access_token != stale_token:
+                print("🔑 Token Zoho déjà renouvelé par un autre processus")
+                return
+
+            config = load_config()
+            auth = ZohoAuth(config.get("ZOHO_CLIENT_ID"), config.get("ZOHO_CLIENT_SECRET"),
+                            config.get("GRANTED_CODE"))
+            if auth.refresh_token:
+                token = auth.refresh_access_token()
+            else:
+                token = auth.get_access_token()
+            if not token:
+                raise RuntimeError("Impossible d'obtenir un access token Zoho")
+            self._access_token = token
+            self._expires_at = auth.token_expires_at() or float("inf")
+            try:
+                self._expires_in = float(auth.expires_in)
+            except (TypeError, ValueError):
+                self._expires_in = float("inf")
+
+
+_token_manager = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> TokenManager:
+    """Retourne le gestionnaire de token partagé par le processus."""
+    global _token_manager
+    with _token_manager_lock:
+        if _token_manager is None:
+            _token_manager = TokenManager()
+    return _token_manager